@@ -6,7 +6,7 @@ from assets.ingestion.facebook_ads import facebook_ads_raw
 from assets.ingestion.google_ads import google_ads_raw
 from assets.ingestion.google_analytics import google_analytics_raw
 from assets.ingestion.google_sheets import google_sheets_assets
-from assets.ingestion.jobs import ingestion_job
+from assets.ingestion.jobs import ingestion_job, stripe_incremental_job
 from assets.ingestion.paypal import paypal_transactions_raw
 from assets.ingestion.resources import (
     bigquery_resource,
@@ -19,8 +19,8 @@ from assets.ingestion.resources import (
     paypal_resource,
     stripe_resource,
 )
-from assets.ingestion.schedules import daily_schedule
-from assets.ingestion.stripe import stripe_charges_raw
+from assets.ingestion.schedules import daily_schedule, incremental_schedule
+from assets.ingestion.stripe import stripe_charges_changes, stripe_charges_raw
 
 ingestion_defs = Definitions(
     assets=[
@@ -29,10 +29,11 @@ ingestion_defs = Definitions(
         google_analytics_raw,
         paypal_transactions_raw,
         stripe_charges_raw,
+        stripe_charges_changes,
         *google_sheets_assets,
     ],
-    jobs=[ingestion_job],
-    schedules=[daily_schedule],
+    jobs=[ingestion_job, stripe_incremental_job],
+    schedules=[daily_schedule, incremental_schedule],
     resources={
         "bigquery": bigquery_resource,
         "ingestion_env": ingestion_env,
@@ -15,6 +15,8 @@ from load.gcs import load as gcs_load
 
 DATASET = "raw"
 TABLE = "facebook_ads"
+ASYNC_REPORT = True
+ACTION_COLUMNS = fb_extract.ACTION_COLUMNS
 
 
 @asset(
@@ -34,12 +36,14 @@ def facebook_ads_raw(
     run_id = str(uuid.uuid4())
     date_str = partition_date.isoformat()
 
-    client = facebook_ads.get_client()
-    table = fb_extract.extract(client, partition_date, partition_date)
-
-    if table.num_rows == 0:
-        context.log.warning(f"Zero rows extracted for {partition_date}")
-        return
+    clients = facebook_ads.get_client()
+    stream = fb_extract.extract_stream(
+        clients,
+        partition_date,
+        partition_date,
+        async_report=ASYNC_REPORT,
+        action_columns=ACTION_COLUMNS,
+    )
 
     gcs_config = GCSConfig(
         bucket=ingestion_env.bucket,
@@ -47,7 +51,24 @@ def facebook_ads_raw(
         partition_date=partition_date,
         run_id=run_id,
     )
-    gcs_uri = gcs_load.load(table, gcs_config, gcs.get_client())
+    gcs_uri, rows_written = gcs_load.load_stream(stream, gcs_config, gcs.get_client())
+
+    rejects = stream.rejects
+    if rejects.num_rows > 0:
+        rejects_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=f"{TABLE}_rejects",
+            partition_date=partition_date,
+            run_id=run_id,
+        )
+        rejects_uri = gcs_load.load(rejects, rejects_config, gcs.get_client())
+        context.log.warning(
+            f"{rejects.num_rows} rows rejected for {partition_date}: {rejects_uri}"
+        )
+
+    if rows_written == 0:
+        context.log.warning(f"Zero rows extracted for {partition_date}")
+        return
 
     bq_config = BigQueryConfig(
         project=ingestion_env.project,
@@ -60,6 +81,7 @@ def facebook_ads_raw(
     context.add_output_metadata(
         {
             "rows_loaded": rows_loaded,
+            "rows_rejected": rejects.num_rows,
             "gcs_uri": gcs_uri,
             "partition_date": date_str,
         }
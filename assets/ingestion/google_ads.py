@@ -1,20 +1,30 @@
 """Google Ads ingestion asset."""
 
+import time
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from dagster import AssetExecutionContext, asset
+import pyarrow as pa
+from dagster import AssetExecutionContext, BackfillPolicy, asset
 from dagster_gcp import BigQueryResource, GCSResource
 
 from assets.ingestion.resources import GoogleAdsResource, IngestionConfig
 from assets.ingestion.schedules import daily_partitions
 from extract.google_ads import extract as ads_extract
+from extract.table import split_by
 from load.bigquery import load as bq_load
 from load.config import BigQueryConfig, GCSConfig
 from load.gcs import load as gcs_load
 
 DATASET = "raw"
 TABLE = "google_ads"
+SEARCH_STREAM = True
+WORKERS = 8
+MAX_BACKFILL_DAYS = 92
+PARTITION_FIELD = "date"
+CUSTOMERS_KEY = "customer_ids"
+CUSTOMERS_LISTED_AT_KEY = "customers_listed_at"
+CUSTOMER_CACHE_SECONDS = 3600
 QUERY = """
     SELECT
         segments.date,
@@ -23,7 +33,7 @@ QUERY = """
         metrics.cost_micros,
         metrics.conversions
     FROM customer
-    WHERE segments.date = '{date}'
+    WHERE segments.date BETWEEN '{start}' AND '{end}'
 """
 
 
@@ -31,6 +41,7 @@ QUERY = """
     name="google_ads_raw",
     partitions_def=daily_partitions,
     group_name="ingestion",
+    backfill_policy=BackfillPolicy.multi_run(max_partitions_per_run=MAX_BACKFILL_DAYS),
 )
 def google_ads_raw(
     context: AssetExecutionContext,
@@ -39,42 +50,133 @@ def google_ads_raw(
     google_ads: GoogleAdsResource,
     ingestion_env: IngestionConfig,
 ) -> None:
-    """Extracts Google Ads data and loads it into GCS and BigQuery."""
-    partition_date = datetime.strptime(context.partition_key, "%Y-%m-%d").date()
+    """Extracts Google Ads data and loads it into GCS and BigQuery.
+
+    A daily run streams its one partition to a single parquet file. A
+    backfill run covers up to MAX_BACKFILL_DAYS partitions with one
+    BETWEEN query per customer, then splits the rows on date and writes
+    one parquet file and partition load per date.
+
+    The client accounts under the customer are recorded in the
+    materialization metadata and reused for CUSTOMER_CACHE_SECONDS, so
+    runs and backfill steps in that window skip the customer_client
+    query.
+    """
+    key_range = context.partition_key_range
+    start_date = datetime.strptime(key_range.start, "%Y-%m-%d").date()
+    end_date = datetime.strptime(key_range.end, "%Y-%m-%d").date()
     run_id = str(uuid.uuid4())
-    date_str = partition_date.isoformat()
+    date_str = start_date.isoformat()
+    if end_date != start_date:
+        date_str = f"{date_str}..{end_date.isoformat()}"
 
     client = google_ads.get_client()
-    table = ads_extract.extract(
+    customer_ids, listed_at = _read_customers(context)
+    if customer_ids is None:
+        customer_ids = google_ads.get_customer_ids(client)
+        listed_at = time.time()
+    context.add_output_metadata(
+        {CUSTOMERS_KEY: customer_ids, CUSTOMERS_LISTED_AT_KEY: listed_at}
+    )
+    stream = ads_extract.extract_stream(
         client,
-        google_ads.customer_id,
-        QUERY.format(date=date_str),
+        customer_ids,
+        QUERY.format(start=start_date.isoformat(), end=end_date.isoformat()),
+        search_stream=SEARCH_STREAM,
+        workers=WORKERS,
     )
+    if start_date == end_date:
+        gcs_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=TABLE,
+            partition_date=start_date,
+            run_id=run_id,
+        )
+        gcs_uri, rows_written = gcs_load.load_stream(
+            stream, gcs_config, gcs.get_client()
+        )
+        gcs_uris = {start_date: gcs_uri} if rows_written > 0 else {}
+    else:
+        gcs_uris = _load_partitions(list(stream), ingestion_env, gcs, run_id)
 
-    if table.num_rows == 0:
-        context.log.warning(f"Zero rows extracted for {partition_date}")
-        return
+    rejects = stream.rejects
+    if rejects.num_rows > 0:
+        rejects_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=f"{TABLE}_rejects",
+            partition_date=start_date,
+            run_id=run_id,
+        )
+        rejects_uri = gcs_load.load(rejects, rejects_config, gcs.get_client())
+        context.log.warning(
+            f"{rejects.num_rows} rows rejected for {date_str}: {rejects_uri}"
+        )
 
-    gcs_config = GCSConfig(
-        bucket=ingestion_env.bucket,
-        source=TABLE,
-        partition_date=partition_date,
-        run_id=run_id,
-    )
-    gcs_uri = gcs_load.load(table, gcs_config, gcs.get_client())
+    if not gcs_uris:
+        context.log.warning(f"Zero rows extracted for {date_str}")
+        return
 
-    bq_config = BigQueryConfig(
-        project=ingestion_env.project,
-        dataset=DATASET,
-        table=TABLE,
-        partition_date=partition_date,
-    )
-    rows_loaded = bq_load.load(gcs_uri, bq_config, bigquery.get_client())
+    rows_loaded = 0
+    for partition_date, gcs_uri in gcs_uris.items():
+        bq_config = BigQueryConfig(
+            project=ingestion_env.project,
+            dataset=DATASET,
+            table=TABLE,
+            partition_date=partition_date,
+            partition_field=PARTITION_FIELD,
+        )
+        rows_loaded += bq_load.load(gcs_uri, bq_config, bigquery.get_client())
 
+    uris = list(gcs_uris.values())
     context.add_output_metadata(
         {
             "rows_loaded": rows_loaded,
-            "gcs_uri": gcs_uri,
+            "rows_rejected": rejects.num_rows,
+            "gcs_uri": uris[0] if len(uris) == 1 else uris,
             "partition_date": date_str,
         }
     )
+
+
+def _read_customers(
+    context: AssetExecutionContext,
+) -> tuple[list[str] | None, float | None]:
+    """Returns the customer IDs recorded by the last materialization.
+
+    Returns the list and when it was queried, or None for both when no
+    list was recorded or it is older than CUSTOMER_CACHE_SECONDS.
+    """
+    event = context.instance.get_latest_materialization_event(context.asset_key)
+    metadata = event.asset_materialization.metadata if event else {}
+    if CUSTOMERS_KEY not in metadata or CUSTOMERS_LISTED_AT_KEY not in metadata:
+        return None, None
+    listed_at = metadata[CUSTOMERS_LISTED_AT_KEY].value
+    if time.time() - listed_at >= CUSTOMER_CACHE_SECONDS:
+        return None, None
+    return list(metadata[CUSTOMERS_KEY].value), listed_at
+
+
+def _load_partitions(
+    batches: list[pa.RecordBatch],
+    ingestion_env: IngestionConfig,
+    gcs: GCSResource,
+    run_id: str,
+) -> dict[date, str]:
+    """Writes one parquet file per date and returns their URIs.
+
+    Dates without rows get no file, so their partitions are left
+    untouched, as in a daily run.
+    """
+    if not batches:
+        return {}
+    table = pa.Table.from_batches(batches)
+    gcs_uris = {}
+    for partition_date, rows in split_by(table, PARTITION_FIELD):
+        gcs_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=TABLE,
+            partition_date=partition_date,
+            run_id=run_id,
+        )
+        gcs_uris[partition_date] = gcs_load.load(rows, gcs_config, gcs.get_client())
+    return gcs_uris
@@ -16,9 +16,11 @@ from load.gcs import load as gcs_load
 
 DATASET = "raw"
 TABLE = "google_analytics"
+WORKERS = 4
 REPORT_CONFIG = ReportConfig(
     dimension_names=["date", "sessionSource", "sessionMedium", "country"],
     metric_names=["sessions", "screenPageViews", "bounceRate", "conversions"],
+    workers=WORKERS,
 )
 
 
@@ -40,7 +42,7 @@ def google_analytics_raw(
     date_str = partition_date.isoformat()
 
     client = google_analytics.get_client()
-    table = ga_extract.extract(
+    stream = ga_extract.extract_stream(
         client,
         google_analytics.property_id,
         partition_date,
@@ -48,17 +50,30 @@ def google_analytics_raw(
         REPORT_CONFIG,
     )
 
-    if table.num_rows == 0:
-        context.log.warning(f"Zero rows extracted for {partition_date}")
-        return
-
     gcs_config = GCSConfig(
         bucket=ingestion_env.bucket,
         source=TABLE,
         partition_date=partition_date,
         run_id=run_id,
     )
-    gcs_uri = gcs_load.load(table, gcs_config, gcs.get_client())
+    gcs_uri, rows_written = gcs_load.load_stream(stream, gcs_config, gcs.get_client())
+
+    rejects = stream.rejects
+    if rejects.num_rows > 0:
+        rejects_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=f"{TABLE}_rejects",
+            partition_date=partition_date,
+            run_id=run_id,
+        )
+        rejects_uri = gcs_load.load(rejects, rejects_config, gcs.get_client())
+        context.log.warning(
+            f"{rejects.num_rows} rows rejected for {partition_date}: {rejects_uri}"
+        )
+
+    if rows_written == 0:
+        context.log.warning(f"Zero rows extracted for {partition_date}")
+        return
 
     bq_config = BigQueryConfig(
         project=ingestion_env.project,
@@ -71,6 +86,7 @@ def google_analytics_raw(
     context.add_output_metadata(
         {
             "rows_loaded": rows_loaded,
+            "rows_rejected": rejects.num_rows,
             "gcs_uri": gcs_uri,
             "partition_date": date_str,
         }
@@ -1,78 +1,169 @@
 """Google Sheets ingestion assets."""
 
 import uuid
-from datetime import datetime
+from collections.abc import Iterator
+from datetime import date, datetime
 
-from dagster import AssetExecutionContext, asset
+import pyarrow as pa
+from dagster import (
+    AssetExecutionContext,
+    AssetKey,
+    AssetRecordsFilter,
+    AssetSpec,
+    MaterializeResult,
+    multi_asset,
+)
 from dagster_gcp import BigQueryResource, GCSResource
 
 from assets.ingestion.resources import GoogleSheetsResource, IngestionConfig
 from assets.ingestion.schedules import daily_partitions
+from extract import cdc
 from extract.google_sheets import extract as sheets_extract
 from load.bigquery import load as bq_load
 from load.config import BigQueryConfig, GCSConfig
 from load.gcs import load as gcs_load
+from transform.metadata import add_loaded_at
 
 SHEET_NAMES = ["students", "programs", "inventory"]
 DATASET = "raw"
+HASH_KEY = "content_hash"
+PARTITION_FIELD = "captured_date"
+CDC = True
+PRIMARY_KEYS = {
+    "students": "student_id",
+    "programs": "program_id",
+    "inventory": "sku_id",
+}
 
 
-def build_google_sheets_asset(sheet_name: str):
-    """Builds a partitioned Dagster asset for a single Google Sheet."""
+def asset_key(sheet_name: str) -> AssetKey:
+    """Returns the asset key of a sheet's raw table."""
+    return AssetKey(f"google_sheets_{sheet_name}_raw")
 
-    @asset(
-        name=f"google_sheets_{sheet_name}_raw",
-        partitions_def=daily_partitions,
-        group_name="ingestion",
+
+@multi_asset(
+    name="google_sheets_raw",
+    specs=[AssetSpec(asset_key(n), group_name="ingestion") for n in SHEET_NAMES],
+    partitions_def=daily_partitions,
+    can_subset=True,
+)
+def google_sheets_raw(
+    context: AssetExecutionContext,
+    gcs: GCSResource,
+    bigquery: BigQueryResource,
+    google_sheets: GoogleSheetsResource,
+    ingestion_env: IngestionConfig,
+) -> Iterator[MaterializeResult]:
+    """Extracts every selected sheet and loads each into GCS and BigQuery."""
+    partition_date = datetime.strptime(context.partition_key, "%Y-%m-%d").date()
+    run_id = str(uuid.uuid4())
+    selected = [n for n in SHEET_NAMES if asset_key(n) in context.selected_asset_keys]
+
+    client = google_sheets.get_client()
+    raws = sheets_extract.fetch_sheets(
+        client,
+        google_sheets.spreadsheet_id,
+        selected,
     )
-    def _asset(
-        context: AssetExecutionContext,
-        gcs: GCSResource,
-        bigquery: BigQueryResource,
-        google_sheets: GoogleSheetsResource,
-        ingestion_env: IngestionConfig,
-    ) -> None:
-        """Extracts a Google Sheet and loads it into GCS and BigQuery."""
-        partition_date = datetime.strptime(context.partition_key, "%Y-%m-%d").date()
-        run_id = str(uuid.uuid4())
-
-        client = google_sheets.get_client()
-        table = sheets_extract.extract(
-            client,
-            google_sheets.spreadsheet_id,
-            sheet_name,
-        )
 
-        if table.num_rows == 0:
-            context.log.warning(f"Zero rows extracted for {partition_date}")
-            return
+    for sheet_name in selected:
+        raw = raws[sheet_name]
+        digest = sheets_extract.content_hash(raw)
+        if digest == _read_hash(context, asset_key(sheet_name)):
+            context.log.info(f"{sheet_name} unchanged, skipping load")
+            yield MaterializeResult(
+                asset_key=asset_key(sheet_name),
+                metadata={
+                    HASH_KEY: digest,
+                    "unchanged": True,
+                    "partition_date": partition_date.isoformat(),
+                    "sheet_name": sheet_name,
+                },
+            )
+            continue
+
+        table = sheets_extract.to_table(raw)
+        if table.num_rows == 0 and not CDC:
+            context.log.warning(
+                f"Zero rows extracted from {sheet_name} for {partition_date}"
+            )
+            yield MaterializeResult(
+                asset_key=asset_key(sheet_name), metadata={HASH_KEY: digest}
+            )
+            continue
+
+        source = f"google_sheets_{sheet_name}"
+        state = None
+        if CDC:
+            previous = gcs_load.read_state(
+                ingestion_env.bucket, source, gcs.get_client()
+            )
+            table, state = cdc.diff(
+                table, previous, PRIMARY_KEYS[sheet_name], partition_date
+            )
+            if table.num_rows == 0:
+                context.log.info(f"No row changes in {sheet_name}, skipping load")
+                yield MaterializeResult(
+                    asset_key=asset_key(sheet_name),
+                    metadata={HASH_KEY: digest, "rows_loaded": 0},
+                )
+                continue
 
         gcs_config = GCSConfig(
             bucket=ingestion_env.bucket,
-            source=f"google_sheets_{sheet_name}",
+            source=source,
             partition_date=partition_date,
             run_id=run_id,
         )
-        gcs_uri = gcs_load.load(table, gcs_config, gcs.get_client())
+        gcs_uri = gcs_load.load(
+            _stamp(table, partition_date), gcs_config, gcs.get_client()
+        )
 
         bq_config = BigQueryConfig(
             project=ingestion_env.project,
             dataset=DATASET,
-            table=f"google_sheets_{sheet_name}",
+            table=source,
             partition_date=partition_date,
+            partition_field=PARTITION_FIELD,
         )
-        rows_loaded = bq_load.load(gcs_uri, bq_config, bigquery.get_client())
+        bq_client = bigquery.get_client()
+        if bq_load.repartition(bq_config, bq_client):
+            context.log.info(f"Repartitioned {source} on {PARTITION_FIELD}")
+        if state is None:
+            rows_loaded = bq_load.load(gcs_uri, bq_config, bq_client)
+        else:
+            rows_loaded = bq_load.append(gcs_uri, bq_config, bq_client)
+            gcs_load.load_state(state, ingestion_env.bucket, source, gcs.get_client())
 
-        context.add_output_metadata(
-            {
+        yield MaterializeResult(
+            asset_key=asset_key(sheet_name),
+            metadata={
+                HASH_KEY: digest,
+                "unchanged": False,
                 "rows_loaded": rows_loaded,
                 "gcs_uri": gcs_uri,
                 "partition_date": partition_date.isoformat(),
                 "sheet_name": sheet_name,
-            }
+            },
         )
 
-    return _asset
+
+def _stamp(table: pa.Table, partition_date: date) -> pa.Table:
+    """Adds the captured_date partition column and loaded_at to a table."""
+    captured = pa.array([partition_date] * table.num_rows, pa.date32())
+    return add_loaded_at(table.append_column(PARTITION_FIELD, captured))
+
+
+def _read_hash(context: AssetExecutionContext, key: AssetKey) -> str | None:
+    """Returns the content hash recorded for a sheet in the run's partition."""
+    records = context.instance.fetch_materializations(
+        AssetRecordsFilter(asset_key=key, asset_partitions=[context.partition_key]),
+        limit=1,
+    ).records
+    materialization = records[0].asset_materialization if records else None
+    if materialization and HASH_KEY in materialization.metadata:
+        return materialization.metadata[HASH_KEY].value
+    return None
 
 
-google_sheets_assets = [build_google_sheets_asset(n) for n in SHEET_NAMES]
+google_sheets_assets = [google_sheets_raw]
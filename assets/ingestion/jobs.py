@@ -12,3 +12,14 @@ ingestion_job = define_asset_job(
         jitter=Jitter.FULL,
     ),
 )
+
+stripe_incremental_job = define_asset_job(
+    name="stripe_incremental_job",
+    selection=AssetSelection.groups("ingestion_incremental"),
+    op_retry_policy=RetryPolicy(
+        max_retries=3,
+        delay=30,
+        backoff=Backoff.EXPONENTIAL,
+        jitter=Jitter.FULL,
+    ),
+)
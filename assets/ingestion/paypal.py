@@ -1,26 +1,33 @@
 """PayPal ingestion asset."""
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
-from dagster import AssetExecutionContext, asset
+import pyarrow as pa
+from dagster import AssetExecutionContext, BackfillPolicy, asset
 from dagster_gcp import BigQueryResource, GCSResource
 
 from assets.ingestion.resources import IngestionConfig, PayPalResource
 from assets.ingestion.schedules import daily_partitions
 from extract.paypal import extract as paypal_extract
+from extract.table import split_by
 from load.bigquery import load as bq_load
 from load.config import BigQueryConfig, GCSConfig
 from load.gcs import load as gcs_load
 
 DATASET = "raw"
 TABLE = "paypal_transactions"
+WORKERS = 4
+PARTITION_FIELD = "transaction_date"
 
 
 @asset(
     name="paypal_transactions_raw",
     partitions_def=daily_partitions,
     group_name="ingestion",
+    backfill_policy=BackfillPolicy.multi_run(
+        max_partitions_per_run=paypal_extract.MAX_WINDOW_DAYS
+    ),
 )
 def paypal_transactions_raw(
     context: AssetExecutionContext,
@@ -29,38 +36,105 @@ def paypal_transactions_raw(
     paypal: PayPalResource,
     ingestion_env: IngestionConfig,
 ) -> None:
-    """Extracts PayPal transactions and loads them into GCS and BigQuery."""
-    partition_date = datetime.strptime(context.partition_key, "%Y-%m-%d").date()
+    """Extracts PayPal transactions and loads them into GCS and BigQuery.
+
+    A daily run streams its one partition to a single parquet file. A
+    backfill run covers up to MAX_WINDOW_DAYS partitions: the range is
+    fetched as one report window, split on transaction_date and written
+    as one parquet file and partition load per date.
+    """
+    key_range = context.partition_key_range
+    start_date = datetime.strptime(key_range.start, "%Y-%m-%d").date()
+    end_date = datetime.strptime(key_range.end, "%Y-%m-%d").date()
     run_id = str(uuid.uuid4())
-    date_str = partition_date.isoformat()
+    date_str = start_date.isoformat()
+    if end_date != start_date:
+        date_str = f"{date_str}..{end_date.isoformat()}"
 
     client = paypal.get_client()
-    table = paypal_extract.extract(client, partition_date, partition_date)
+    if start_date == end_date:
+        stream = paypal_extract.extract_stream(
+            client,
+            start_date,
+            end_date,
+            workers=WORKERS,
+        )
+        gcs_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=TABLE,
+            partition_date=start_date,
+            run_id=run_id,
+        )
+        gcs_uri, rows_written = gcs_load.load_stream(
+            stream, gcs_config, gcs.get_client()
+        )
+        rejects = stream.rejects
+        gcs_uris = {start_date: gcs_uri} if rows_written > 0 else {}
+    else:
+        table, rejects = paypal_extract.extract_batch(
+            client,
+            start_date,
+            end_date,
+            workers=WORKERS,
+        )
+        gcs_uris = _load_partitions(table, ingestion_env, gcs, run_id)
 
-    if table.num_rows == 0:
-        context.log.warning(f"Zero rows extracted for {partition_date}")
-        return
+    if rejects.num_rows > 0:
+        rejects_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=f"{TABLE}_rejects",
+            partition_date=start_date,
+            run_id=run_id,
+        )
+        rejects_uri = gcs_load.load(rejects, rejects_config, gcs.get_client())
+        context.log.warning(
+            f"{rejects.num_rows} rows rejected for {date_str}: {rejects_uri}"
+        )
 
-    gcs_config = GCSConfig(
-        bucket=ingestion_env.bucket,
-        source=TABLE,
-        partition_date=partition_date,
-        run_id=run_id,
-    )
-    gcs_uri = gcs_load.load(table, gcs_config, gcs.get_client())
+    if not gcs_uris:
+        context.log.warning(f"Zero rows extracted for {date_str}")
+        return
 
-    bq_config = BigQueryConfig(
-        project=ingestion_env.project,
-        dataset=DATASET,
-        table=TABLE,
-        partition_date=partition_date,
-    )
-    rows_loaded = bq_load.load(gcs_uri, bq_config, bigquery.get_client())
+    rows_loaded = 0
+    for partition_date, gcs_uri in gcs_uris.items():
+        bq_config = BigQueryConfig(
+            project=ingestion_env.project,
+            dataset=DATASET,
+            table=TABLE,
+            partition_date=partition_date,
+            partition_field=PARTITION_FIELD,
+        )
+        rows_loaded += bq_load.load(gcs_uri, bq_config, bigquery.get_client())
 
+    uris = list(gcs_uris.values())
     context.add_output_metadata(
         {
             "rows_loaded": rows_loaded,
-            "gcs_uri": gcs_uri,
+            "rows_rejected": rejects.num_rows,
+            "gcs_uri": uris[0] if len(uris) == 1 else uris,
             "partition_date": date_str,
         }
     )
+
+
+def _load_partitions(
+    table: pa.Table,
+    ingestion_env: IngestionConfig,
+    gcs: GCSResource,
+    run_id: str,
+) -> dict[date, str]:
+    """Writes one parquet file per transaction_date and returns their URIs.
+
+    Dates without transactions get no file, so their partitions are left
+    untouched, as in a daily run.
+    """
+    gcs_uris = {}
+    for partition_date, rows in split_by(table, PARTITION_FIELD):
+        gcs_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=TABLE,
+            partition_date=partition_date,
+            run_id=run_id,
+        )
+        gcs_uris[partition_date] = gcs_load.load(rows, gcs_config, gcs.get_client())
+    return gcs_uris
@@ -46,7 +46,11 @@ class GoogleAnalyticsResource(ConfigurableResource):
 
 
 class GoogleAdsResource(ConfigurableResource):
-    """Resource for authenticating with the Google Ads API."""
+    """Resource for authenticating with the Google Ads API.
+
+    customer_id may be a manager (MCC) account, in which case every
+    client account beneath it is ingested.
+    """
 
     credentials_path: str
     customer_id: str
@@ -55,16 +59,24 @@ class GoogleAdsResource(ConfigurableResource):
         """Builds and returns an authenticated Google Ads API client."""
         return ads_client.build_client(self.credentials_path)
 
+    def get_customer_ids(self, client: GoogleAdsClient) -> list[str]:
+        """Lists the client accounts to query under customer_id."""
+        return ads_client.list_customers(client, self.customer_id)
+
 
 class FacebookAdsResource(ConfigurableResource):
-    """Resource for authenticating with the Facebook Marketing API."""
+    """Resource for authenticating with the Facebook Marketing API.
+
+    ad_account_ids is a comma-separated list of ad account IDs.
+    """
 
     access_token: str
-    ad_account_id: str
+    ad_account_ids: str
 
-    def get_client(self) -> AdAccount:
-        """Builds and returns an authenticated Facebook Ads API client."""
-        return fb_client.build_client(self.access_token, self.ad_account_id)
+    def get_client(self) -> list[AdAccount]:
+        """Builds authenticated clients for every configured ad account."""
+        ids = [i.strip() for i in self.ad_account_ids.split(",") if i.strip()]
+        return fb_client.build_clients(self.access_token, ids)
 
 
 class PayPalResource(ConfigurableResource):
@@ -113,7 +125,7 @@ google_ads_resource = GoogleAdsResource(
 
 facebook_ads_resource = FacebookAdsResource(
     access_token=EnvVar("FACEBOOK_ADS_ACCESS_TOKEN"),
-    ad_account_id=EnvVar("FACEBOOK_ADS_ACCOUNT_ID"),
+    ad_account_ids=EnvVar("FACEBOOK_ADS_ACCOUNT_IDS"),
 )
 
 paypal_resource = PayPalResource(
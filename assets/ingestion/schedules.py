@@ -2,7 +2,7 @@
 
 from dagster import DailyPartitionsDefinition, ScheduleDefinition
 
-from assets.ingestion.jobs import ingestion_job
+from assets.ingestion.jobs import ingestion_job, stripe_incremental_job
 
 START_DATE = "2024-01-01"
 
@@ -16,3 +16,9 @@ daily_schedule = ScheduleDefinition(
     cron_schedule="0 6 * * *",
     execution_timezone="America/New_York",
 )
+
+incremental_schedule = ScheduleDefinition(
+    job=stripe_incremental_job,
+    cron_schedule="30 * * * *",
+    execution_timezone="America/New_York",
+)
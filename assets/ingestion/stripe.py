@@ -1,7 +1,7 @@
 """Stripe ingestion asset."""
 
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 
 from dagster import AssetExecutionContext, asset
 from dagster_gcp import BigQueryResource, GCSResource
@@ -9,12 +9,19 @@ from dagster_gcp import BigQueryResource, GCSResource
 from assets.ingestion.resources import IngestionConfig, StripeResource
 from assets.ingestion.schedules import daily_partitions
 from extract.stripe import extract as stripe_extract
+from extract.table import split_by
 from load.bigquery import load as bq_load
 from load.config import BigQueryConfig, GCSConfig
 from load.gcs import load as gcs_load
 
 DATASET = "raw"
 TABLE = "stripe_charges"
+PARTITION_FIELD = "charge_date"
+KEY = "charge_id"
+WINDOWS = 4
+BULK_FEES = True
+EVENT_RETENTION_DAYS = 30
+WATERMARK_KEY = "watermark"
 
 
 @asset(
@@ -35,11 +42,13 @@ def stripe_charges_raw(
     date_str = partition_date.isoformat()
 
     client = stripe.get_client()
-    table = stripe_extract.extract(client, partition_date, partition_date)
-
-    if table.num_rows == 0:
-        context.log.warning(f"Zero rows extracted for {partition_date}")
-        return
+    stream = stripe_extract.extract_stream(
+        client,
+        partition_date,
+        partition_date,
+        windows=WINDOWS,
+        bulk_fees=BULK_FEES,
+    )
 
     gcs_config = GCSConfig(
         bucket=ingestion_env.bucket,
@@ -47,20 +56,118 @@ def stripe_charges_raw(
         partition_date=partition_date,
         run_id=run_id,
     )
-    gcs_uri = gcs_load.load(table, gcs_config, gcs.get_client())
+    gcs_uri, rows_written = gcs_load.load_stream(stream, gcs_config, gcs.get_client())
+
+    rejects = stream.rejects
+    if rejects.num_rows > 0:
+        rejects_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=f"{TABLE}_rejects",
+            partition_date=partition_date,
+            run_id=run_id,
+        )
+        rejects_uri = gcs_load.load(rejects, rejects_config, gcs.get_client())
+        context.log.warning(
+            f"{rejects.num_rows} rows rejected for {partition_date}: {rejects_uri}"
+        )
+
+    if rows_written == 0:
+        context.log.warning(f"Zero rows extracted for {partition_date}")
+        return
 
     bq_config = BigQueryConfig(
         project=ingestion_env.project,
         dataset=DATASET,
         table=TABLE,
         partition_date=partition_date,
+        partition_field=PARTITION_FIELD,
     )
     rows_loaded = bq_load.load(gcs_uri, bq_config, bigquery.get_client())
 
     context.add_output_metadata(
         {
             "rows_loaded": rows_loaded,
+            "rows_rejected": rejects.num_rows,
             "gcs_uri": gcs_uri,
             "partition_date": date_str,
         }
     )
+
+
+@asset(
+    name="stripe_charges_changes",
+    group_name="ingestion_incremental",
+)
+def stripe_charges_changes(
+    context: AssetExecutionContext,
+    gcs: GCSResource,
+    bigquery: BigQueryResource,
+    stripe: StripeResource,
+    ingestion_env: IngestionConfig,
+) -> None:
+    """Merges Stripe charges changed since the last run into BigQuery.
+
+    Charge events since the watermark name the charges that changed.
+    Only those charges are refetched, and only the daily partitions they
+    fall in are rewritten, by a MERGE on charge_id. The new watermark is
+    recorded in the materialization metadata, so it only advances once
+    every partition has been merged.
+    """
+    since = _read_watermark(context)
+    run_id = str(uuid.uuid4())
+
+    client = stripe.get_client()
+    table, rejects, watermark = stripe_extract.extract_changed(client, since)
+
+    if rejects.num_rows > 0:
+        rejects_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=f"{TABLE}_changes_rejects",
+            partition_date=datetime.now(tz=UTC).date(),
+            run_id=run_id,
+        )
+        rejects_uri = gcs_load.load(rejects, rejects_config, gcs.get_client())
+        context.log.warning(f"{rejects.num_rows} changed rows rejected: {rejects_uri}")
+
+    rows_merged = 0
+    partitions = []
+    for partition_date, rows in split_by(table, PARTITION_FIELD):
+        gcs_config = GCSConfig(
+            bucket=ingestion_env.bucket,
+            source=f"{TABLE}_changes",
+            partition_date=partition_date,
+            run_id=run_id,
+        )
+        gcs_uri = gcs_load.load(rows, gcs_config, gcs.get_client())
+        bq_config = BigQueryConfig(
+            project=ingestion_env.project,
+            dataset=DATASET,
+            table=TABLE,
+            partition_date=partition_date,
+            partition_field=PARTITION_FIELD,
+        )
+        rows_merged += bq_load.merge(gcs_uri, bq_config, bigquery.get_client(), KEY)
+        partitions.append(partition_date.isoformat())
+
+    context.add_output_metadata(
+        {
+            WATERMARK_KEY: watermark,
+            "charges_changed": table.num_rows,
+            "rows_rejected": rejects.num_rows,
+            "rows_merged": rows_merged,
+            "partitions_rewritten": partitions,
+        }
+    )
+
+
+def _read_watermark(context: AssetExecutionContext) -> int:
+    """Returns the last recorded event watermark as a Unix timestamp.
+
+    The first run starts from the oldest events Stripe still retains.
+    """
+    event = context.instance.get_latest_materialization_event(context.asset_key)
+    materialization = event.asset_materialization if event else None
+    if materialization and WATERMARK_KEY in materialization.metadata:
+        return materialization.metadata[WATERMARK_KEY].value
+    oldest = datetime.now(tz=UTC) - timedelta(days=EVENT_RETENTION_DAYS)
+    return int(oldest.timestamp())
@@ -0,0 +1,96 @@
+"""Vectorized casting of raw Arrow columns into typed Arrow arrays.
+
+Every caster returns an array of the target type in which values that
+cannot be converted are null. split_rejects then routes rows with a
+failed cast into a side table instead of raising for the whole batch.
+"""
+
+from collections.abc import Mapping
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from extract.table import build_table
+
+INT_PATTERN = r"^-?\d{1,18}$"
+FLOAT_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+ISO_DATE_FORMAT = "%Y-%m-%d"
+REASON_COLUMN = "reason"
+
+Column = pa.Array | pa.ChunkedArray
+
+
+def to_int64(values: Column) -> Column:
+    """Casts integer strings to int64, nulling values that do not parse."""
+    if pa.types.is_integer(values.type):
+        return pc.cast(values, pa.int64())
+    return _cast_matching(values, INT_PATTERN, pa.int64())
+
+
+def to_float64(values: Column) -> Column:
+    """Casts numeric strings to float64, nulling values that do not parse."""
+    if pa.types.is_integer(values.type) or pa.types.is_floating(values.type):
+        return pc.cast(values, pa.float64())
+    return _cast_matching(values, FLOAT_PATTERN, pa.float64())
+
+
+def to_date(values: Column, date_format: str = ISO_DATE_FORMAT) -> Column:
+    """Parses date strings into date32, nulling invalid calendar dates.
+
+    strptime normalizes overflowing days (20240230 becomes March 1st),
+    so each parsed value is formatted back and compared to its input.
+    """
+    parsed = pc.strptime(values, format=date_format, unit="s", error_is_null=True)
+    round_trip = pc.equal(pc.strftime(parsed, format=date_format), values)
+    dates = pc.cast(pc.if_else(round_trip, parsed, None), pa.date32())
+    return dates
+
+
+def timestamp_to_date(values: Column) -> Column:
+    """Converts Unix timestamps in seconds to UTC dates."""
+    timestamps = pc.cast(to_int64(values), pa.timestamp("s", tz="UTC"))
+    dates = pc.cast(timestamps, pa.date32())
+    return dates
+
+
+def cents_to_dollars(values: Column) -> Column:
+    """Converts integer cents to float dollars rounded to two places."""
+    cents = pc.cast(to_int64(values), pa.float64())
+    dollars = pc.round(pc.divide(cents, 100.0), 2)
+    return dollars
+
+
+def split_rejects(
+    raw: pa.Table,
+    columns: Mapping[str, Column],
+    schema: pa.Schema,
+) -> tuple[pa.Table, pa.Table]:
+    """Splits cast columns into a typed table and a rejects side table.
+
+    A row is rejected when any of its cast values is null. The rejects
+    table keeps the original raw columns plus a reason column naming the
+    first schema field that failed.
+    """
+    reason = pa.nulls(raw.num_rows, pa.string())
+    for name in reversed(schema.names):
+        failed = pc.is_null(columns[name])
+        reason = pc.if_else(failed, pa.scalar(f"invalid {name}"), reason)
+
+    valid = pc.is_null(reason)
+    table = build_table(
+        {name: pc.filter(columns[name], valid) for name in schema.names},
+        schema,
+    )
+    rejected = pc.invert(valid)
+    rejects = raw.filter(rejected).append_column(
+        REASON_COLUMN,
+        pc.filter(reason, rejected),
+    )
+    return table, rejects
+
+
+def _cast_matching(values: Column, pattern: str, target: pa.DataType) -> Column:
+    """Casts values matching a regex to the target type, nulling the rest."""
+    matches = pc.match_substring_regex(values, pattern)
+    cast = pc.cast(pc.if_else(matches, values, None), target)
+    return cast
@@ -1,10 +1,25 @@
 """Facebook Ads API client."""
 
+from collections.abc import Sequence
+
 from facebook_business.adobjects.adaccount import AdAccount
-from facebook_business.api import FacebookAdsApi
+from facebook_business.api import FacebookSession
+
+from extract.facebook_ads.throttle import ThrottledApi
 
 
 def build_client(access_token: str, ad_account_id: str) -> AdAccount:
     """Builds an authenticated Facebook Ads API client."""
-    FacebookAdsApi.init(access_token=access_token)
-    return AdAccount(ad_account_id)
+    return build_clients(access_token, [ad_account_id])[0]
+
+
+def build_clients(access_token: str, ad_account_ids: Sequence[str]) -> list[AdAccount]:
+    """Builds ad account clients that share one private API instance.
+
+    FacebookAdsApi.init is never called, so no process-global default is
+    set and clients built in other threads or for other tokens do not
+    interfere. Accounts sharing an instance can be batched together, and
+    are paced by its one throttler.
+    """
+    api = ThrottledApi(FacebookSession(access_token=access_token))
+    return [AdAccount(ad_account_id, api=api) for ad_account_id in ad_account_ids]
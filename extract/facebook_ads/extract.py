@@ -1,16 +1,48 @@
 """Facebook Ads data extractor."""
 
+import functools
+import itertools
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from datetime import date
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from facebook_business.adobjects.adaccount import AdAccount
+from facebook_business.adobjects.adreportrun import AdReportRun
 from facebook_business.adobjects.adsinsights import AdsInsights
+from facebook_business.api import FacebookAdsApiBatch, FacebookResponse
+from facebook_business.exceptions import FacebookRequestError
 from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
 
-from extract.table import to_table
+from extract import cast
+from extract.facebook_ads.throttle import THROTTLE_RETRIES, ThrottledApi, is_throttled
+from extract.stream import BatchStream, batched
+from extract.table import build_batch, build_table, to_table
+
+BATCH_SIZE = 500
+ASYNC_PAGE_LIMIT = 5000
+POLL_INTERVAL_SECONDS = 1.0
+POLL_MAX_INTERVAL_SECONDS = 30.0
+POLL_TIMEOUT_SECONDS = 3600.0
+JOB_COMPLETED = "Job Completed"
+PERCENT_COMPLETE = 100
+BATCH_REQUEST_LIMIT = 50
+BATCH_RETRIES = 3
+STATUS_FIELDS = [
+    AdReportRun.Field.async_status,
+    AdReportRun.Field.async_percent_completion,
+]
+JOB_FAILED = {"Job Failed", "Job Skipped"}
+ACTION_COLUMNS = {
+    "link_clicks": "link_click",
+    "leads": "lead",
+    "conversions": "offsite_conversion.fb_pixel_purchase",
+}
 
 INSIGHT_FIELDS = [
     AdsInsights.Field.date_start,
+    AdsInsights.Field.account_id,
     AdsInsights.Field.campaign_id,
     AdsInsights.Field.campaign_name,
     AdsInsights.Field.impressions,
@@ -37,6 +69,7 @@ class Raw(BaseModel):
     model_config = ConfigDict(frozen=True)
 
     date_start: str
+    account_id: str
     campaign_id: str
     campaign_name: str
     impressions: str
@@ -53,6 +86,7 @@ class Record(BaseModel):
     model_config = ConfigDict(frozen=True)
 
     date: date
+    ad_account_id: str
     campaign_id: str
     campaign_name: str
     impressions: int
@@ -85,16 +119,139 @@ class Record(BaseModel):
         return float(v)
 
 
-def extract(client: AdAccount, start_date: date, end_date: date) -> pa.Table:
+ACTION_TYPE = pa.struct([("action_type", pa.string()), ("value", pa.string())])
+
+RAW_SCHEMA = pa.schema(
+    [
+        ("date_start", pa.string()),
+        ("account_id", pa.string()),
+        ("campaign_id", pa.string()),
+        ("campaign_name", pa.string()),
+        ("impressions", pa.string()),
+        ("clicks", pa.string()),
+        ("spend", pa.string()),
+        ("reach", pa.string()),
+        ("frequency", pa.string()),
+        ("actions", pa.list_(ACTION_TYPE)),
+    ]
+)
+
+BASE_FIELDS = [
+    ("date", pa.date32()),
+    ("ad_account_id", pa.string()),
+    ("campaign_id", pa.string()),
+    ("campaign_name", pa.string()),
+    ("impressions", pa.int64()),
+    ("clicks", pa.int64()),
+    ("spend_usd", pa.float64()),
+    ("reach", pa.int64()),
+    ("frequency", pa.float64()),
+]
+
+
+def schema(action_columns: Mapping[str, str] = ACTION_COLUMNS) -> pa.Schema:
+    """Builds the output schema with one int64 count per action column."""
+    fields = BASE_FIELDS + [(name, pa.int64()) for name in action_columns]
+    return pa.schema(fields)
+
+
+SCHEMA = schema()
+
+
+def extract(
+    client: AdAccount | Sequence[AdAccount],
+    start_date: date,
+    end_date: date,
+    async_report: bool = False,
+) -> pa.Table:
     """Extracts Facebook Ads campaign insights into a PyArrow table."""
-    raw_rows = fetch(client, start_date, end_date)
+    raw_rows = fetch(client, start_date, end_date, async_report)
     records = [parse(r) for r in raw_rows]
-    table = to_table(records)
+    table = to_table(records, SCHEMA)
     return table
 
 
-def fetch(client: AdAccount, start_date: date, end_date: date) -> list[Raw]:
-    """Fetches raw campaign insights from the Facebook Ads API."""
+def extract_batch(
+    client: AdAccount | Sequence[AdAccount],
+    start_date: date,
+    end_date: date,
+    async_report: bool = False,
+    action_columns: Mapping[str, str] = ACTION_COLUMNS,
+) -> tuple[pa.Table, pa.Table]:
+    """Extracts Facebook Ads insights using vectorized batch parsing.
+
+    action_columns maps output column names to the action types they
+    count. Returns the typed table and a side table of rejected raw rows.
+    """
+    raw_rows = fetch(client, start_date, end_date, async_report)
+    raw = _to_raw_table(raw_rows)
+    table, rejects = parse_batch(raw, action_columns)
+    return table, rejects
+
+
+def extract_stream(
+    client: AdAccount | Sequence[AdAccount],
+    start_date: date,
+    end_date: date,
+    async_report: bool = False,
+    action_columns: Mapping[str, str] = ACTION_COLUMNS,
+) -> BatchStream:
+    """Extracts Facebook Ads insights as a lazily parsed stream of record batches.
+
+    action_columns maps output column names to the action types they count.
+    """
+    raw_batches = fetch_batches(client, start_date, end_date, async_report)
+    parser = functools.partial(parse_batch, action_columns=action_columns)
+    stream = BatchStream(raw_batches, RAW_SCHEMA, parser)
+    return stream
+
+
+def fetch(
+    client: AdAccount | Sequence[AdAccount],
+    start_date: date,
+    end_date: date,
+    async_report: bool = False,
+) -> list[Raw]:
+    """Fetches raw campaign insights from the Facebook Ads API.
+
+    With async_report, the insights are computed by an asynchronous
+    report job instead of the synchronous endpoint. See _insights().
+    """
+    insights = _insights(client, start_date, end_date, async_report)
+    raw_rows = [_to_raw(dict(row)) for row in insights]
+    return raw_rows
+
+
+def fetch_batches(
+    client: AdAccount | Sequence[AdAccount],
+    start_date: date,
+    end_date: date,
+    async_report: bool = False,
+) -> Iterator[pa.RecordBatch]:
+    """Yields raw record batches of BATCH_SIZE rows as the SDK cursor pages."""
+    insights = _insights(client, start_date, end_date, async_report)
+    raw_rows = (_to_raw(dict(row)) for row in insights)
+    for chunk in batched(raw_rows, BATCH_SIZE):
+        yield build_batch(_to_raw_columns(chunk), RAW_SCHEMA)
+
+
+def _insights(
+    client: AdAccount | Sequence[AdAccount],
+    start_date: date,
+    end_date: date,
+    async_report: bool = False,
+) -> Iterable:
+    """Requests daily campaign insights and returns a lazy iterable of rows.
+
+    The synchronous endpoint times out on wide ranges. With async_report
+    an AdReportRun is submitted instead, polled until it completes, and
+    its results are paged ASYNC_PAGE_LIMIT rows at a time.
+
+    Several accounts must share one API instance. Their requests, job
+    submissions and status polls go out as Graph API batches, and their
+    rows are returned one account after another.
+    """
+    accounts = list(client) if isinstance(client, Sequence) else [client]
     params = {
         "level": "campaign",
         "time_range": {
@@ -103,15 +260,188 @@ def fetch(client: AdAccount, start_date: date, end_date: date) -> list[Raw]:
         },
         "time_increment": 1,
     }
-    insights = client.get_insights(fields=INSIGHT_FIELDS, params=params)
-    raw_rows = [_to_raw(dict(row)) for row in insights]
-    return raw_rows
+    if not async_report:
+        if len(accounts) == 1:
+            return accounts[0].get_insights(fields=INSIGHT_FIELDS, params=params)
+        return _batched_insights(accounts, params)
+
+    jobs = _submit_reports(accounts, params)
+    _wait_for_reports(jobs)
+    insights = itertools.chain.from_iterable(
+        job.get_result(params={"limit": ASYNC_PAGE_LIMIT}) for job in jobs
+    )
+    return insights
+
+
+def _batched_insights(accounts: list[AdAccount], params: dict) -> Iterator[dict]:
+    """Fetches each account's first insights page in batches, then pages on.
+
+    An account with more rows continues from its after cursor through
+    the regular SDK cursor.
+    """
+    page_params = {**params, "limit": ASYNC_PAGE_LIMIT}
+    bodies = _batch_call(
+        accounts,
+        lambda account, batch, success, failure: account.get_insights(
+            fields=INSIGHT_FIELDS,
+            params=page_params,
+            batch=batch,
+            success=success,
+            failure=failure,
+        ),
+    )
+    for account, body in zip(accounts, bodies, strict=True):
+        yield from body["data"]
+        paging = body.get("paging", {})
+        if "next" in paging:
+            yield from account.get_insights(
+                fields=INSIGHT_FIELDS,
+                params={**page_params, "after": paging["cursors"]["after"]},
+            )
+
+
+def _submit_reports(accounts: list[AdAccount], params: dict) -> list[AdReportRun]:
+    """Submits one async insights report per account."""
+    if len(accounts) == 1:
+        job = accounts[0].get_insights(
+            fields=INSIGHT_FIELDS, params=params, is_async=True
+        )
+        return [job]
+
+    bodies = _batch_call(
+        accounts,
+        lambda account, batch, success, failure: account.get_insights(
+            fields=INSIGHT_FIELDS,
+            params=dict(params),
+            is_async=True,
+            batch=batch,
+            success=success,
+            failure=failure,
+        ),
+    )
+    api = accounts[0].get_api_assured()
+    jobs = [AdReportRun(body["report_run_id"], api=api) for body in bodies]
+    return jobs
+
+
+def _wait_for_reports(jobs: list[AdReportRun]) -> None:
+    """Polls async report jobs until all complete, backing off each time.
+
+    Only jobs still running are polled again. The poll interval doubles
+    up to POLL_MAX_INTERVAL_SECONDS. A failed or skipped job raises
+    RuntimeError and one still running after POLL_TIMEOUT_SECONDS
+    raises TimeoutError.
+    """
+    deadline = time.monotonic() + POLL_TIMEOUT_SECONDS
+    interval = POLL_INTERVAL_SECONDS
+    pending = jobs
+    while True:
+        running = []
+        for job, (status, percent) in zip(
+            pending, _poll_statuses(pending), strict=True
+        ):
+            if status == JOB_COMPLETED and percent == PERCENT_COMPLETE:
+                continue
+            if status in JOB_FAILED:
+                raise RuntimeError(
+                    f"Facebook Ads report {job.get_id()} ended: {status}"
+                )
+            running.append((job, status, percent))
+        if not running:
+            return
+        if time.monotonic() >= deadline:
+            job, status, percent = running[0]
+            raise TimeoutError(
+                f"Facebook Ads report {job.get_id()} still {status} at {percent}%"
+            )
+        pending = [job for job, _, _ in running]
+        time.sleep(interval)
+        interval = min(interval * 2, POLL_MAX_INTERVAL_SECONDS)
+
+
+def _poll_statuses(jobs: list[AdReportRun]) -> list[tuple[str, int]]:
+    """Reads the status and percent completion of each report job."""
+    if len(jobs) == 1:
+        job = jobs[0]
+        job.api_get(fields=STATUS_FIELDS)
+        return [(job[STATUS_FIELDS[0]], job[STATUS_FIELDS[1]])]
+
+    bodies = _batch_call(
+        jobs,
+        lambda job, batch, success, failure: job.api_get(
+            fields=STATUS_FIELDS,
+            batch=batch,
+            success=success,
+            failure=failure,
+        ),
+    )
+    return [(body[STATUS_FIELDS[0]], body[STATUS_FIELDS[1]]) for body in bodies]
+
+
+def _batch_call(nodes: Sequence, add_request: Callable) -> list[dict]:
+    """Sends one request per node as Graph API batches and returns the bodies.
+
+    add_request(node, batch, success, failure) queues the node's request.
+    Nodes are sent BATCH_REQUEST_LIMIT to an HTTP call, the most the
+    Graph API accepts. Sub-requests that got no response are resent up
+    to BATCH_RETRIES times. Rate-limited sub-requests are resent after
+    the API's throttler pauses until the reset time. Any other failed
+    sub-request raises its error. Each successful sub-response's usage
+    headers are recorded by the throttler, so per-account usage paces
+    calls before one is rejected.
+    """
+    results: list = [None] * len(nodes)
+    api = nodes[0].get_api_assured()
+    pending = list(range(len(nodes)))
+    for attempt in range(THROTTLE_RETRIES + 1):
+        for offset in range(0, len(pending), BATCH_REQUEST_LIMIT):
+            batch = api.new_batch()
+            for index in pending[offset : offset + BATCH_REQUEST_LIMIT]:
+                store = functools.partial(_store_result, api, results, index)
+                add_request(nodes[index], batch, store, store)
+            _execute(batch)
+
+        errors = [results[i] for i in pending if isinstance(results[i], Exception)]
+        for error in errors:
+            if not isinstance(error, FacebookRequestError) or not is_throttled(error):
+                raise error
+        pending = [i for i in pending if isinstance(results[i], Exception)]
+        if not pending:
+            return results
+        if attempt == THROTTLE_RETRIES:
+            raise errors[0]
+        api.throttler.pause(errors[0].http_headers())
+    return results
+
+
+def _execute(batch: FacebookAdsApiBatch) -> None:
+    """Executes a batch, resending sub-requests that got no response."""
+    for _ in range(BATCH_RETRIES + 1):
+        batch = batch.execute()
+        if batch is None:
+            return
+    raise RuntimeError("Facebook Ads batch requests got no response")
+
+
+def _store_result(
+    api: ThrottledApi, results: list, index: int, response: FacebookResponse
+) -> None:
+    """Stores a sub-request's JSON body, or its error, at its index.
+
+    A successful sub-response's usage headers are passed to the throttler.
+    """
+    if response.is_success():
+        api.throttler.record(response.headers())
+        results[index] = response.json()
+    else:
+        results[index] = response.error()
 
 
 def _to_raw(row: dict) -> Raw:
     """Converts a Facebook Ads API row dict into a Raw instance."""
     return Raw(
         date_start=row["date_start"],
+        account_id=row["account_id"],
         campaign_id=row["campaign_id"],
         campaign_name=row["campaign_name"],
         impressions=row["impressions"],
@@ -123,12 +453,34 @@ def _to_raw(row: dict) -> Raw:
     )
 
 
+def _to_raw_table(raw_rows: list[Raw]) -> pa.Table:
+    """Converts Raw rows into a table with actions as a list<struct> column."""
+    table = build_table(_to_raw_columns(raw_rows), RAW_SCHEMA)
+    return table
+
+
+def _to_raw_columns(raw_rows: list[Raw]) -> dict[str, list]:
+    """Reads Raw rows into RAW_SCHEMA columns, keeping actions as structs."""
+    columns = {
+        name: [getattr(r, name) for r in raw_rows]
+        for name in RAW_SCHEMA.names
+        if name != "actions"
+    }
+    columns["actions"] = [[a.model_dump() for a in r.actions] for r in raw_rows]
+    return columns
+
+
 def parse(raw: Raw) -> Record:
-    """Converts a Raw Facebook Ads row into a typed Record."""
+    """Converts a Raw Facebook Ads row into a typed Record.
+
+    Record has a field for each default action column only. Custom
+    action columns go through parse_batch().
+    """
     actions = {a.action_type: a.value for a in raw.actions}
     try:
         return Record(
             date=raw.date_start,
+            ad_account_id=raw.account_id,
             campaign_id=raw.campaign_id,
             campaign_name=raw.campaign_name,
             impressions=raw.impressions,
@@ -136,16 +488,69 @@ def parse(raw: Raw) -> Record:
             spend_usd=raw.spend,
             reach=raw.reach,
             frequency=raw.frequency,
-            link_clicks=int(float(actions.get("link_click", "0"))),
-            leads=int(float(actions.get("lead", "0"))),
-            conversions=int(
-                float(
-                    actions.get(
-                        "offsite_conversion.fb_pixel_purchase",
-                        "0",
-                    )
-                )
-            ),
+            **{
+                name: int(float(actions.get(action_type, "0")))
+                for name, action_type in ACTION_COLUMNS.items()
+            },
         )
     except ValidationError as exc:
         raise ValueError(f"Failed to parse Facebook Ads row: {raw}") from exc
+
+
+def parse_batch(
+    raw: pa.Table,
+    action_columns: Mapping[str, str] = ACTION_COLUMNS,
+) -> tuple[pa.Table, pa.Table]:
+    """Casts a raw Facebook Ads table into typed columns and rejects.
+
+    The actions list is pivoted into one count column per entry of
+    action_columns, in order.
+    """
+    columns = {
+        "date": cast.to_date(raw["date_start"]),
+        "ad_account_id": raw["account_id"],
+        "campaign_id": raw["campaign_id"],
+        "campaign_name": raw["campaign_name"],
+        "impressions": cast.to_int64(raw["impressions"]),
+        "clicks": cast.to_int64(raw["clicks"]),
+        "spend_usd": cast.to_float64(raw["spend"]),
+        "reach": cast.to_int64(raw["reach"]),
+        "frequency": cast.to_float64(raw["frequency"]),
+        **_pivot_actions(raw["actions"].combine_chunks(), action_columns),
+    }
+    table, rejects = cast.split_rejects(raw, columns, schema(action_columns))
+    return table, rejects
+
+
+def _pivot_actions(
+    actions: pa.ListArray,
+    action_columns: Mapping[str, str],
+) -> dict[str, pa.Array]:
+    """Pivots each row's actions list into one int64 count per action column."""
+    rows = len(actions)
+    unique_types = list(dict.fromkeys(action_columns.values()))
+    action_types = pa.array(unique_types, pa.string())
+    entries = pc.list_flatten(actions)
+    type_index = pc.index_in(pc.struct_field(entries, "action_type"), action_types)
+    keys = pc.add(
+        pc.multiply(pc.cast(type_index, pa.int64()), rows),
+        pc.cast(pc.list_parent_indices(actions), pa.int64()),
+    )
+    matches = pa.table(
+        {
+            "key": keys,
+            "value": cast.to_float64(pc.struct_field(entries, "value")),
+        }
+    ).filter(pc.is_valid(type_index))
+    latest = matches.group_by("key", use_threads=False).aggregate(
+        [("value", "last", pc.ScalarAggregateOptions(skip_nulls=False))]
+    )
+    grid = pa.arange(0, rows * len(action_types))
+    positions = pc.index_in(grid, latest["key"])
+    values = pc.take(latest["value_last"], positions)
+    values = pc.if_else(pc.is_null(positions), 0.0, values)
+    counts = pc.cast(pc.trunc(values), pa.int64())
+    return {
+        name: counts.slice(unique_types.index(action_type) * rows, rows)
+        for name, action_type in action_columns.items()
+    }
@@ -0,0 +1,152 @@
+"""Usage-aware pacing for Facebook Marketing API calls."""
+
+import json
+import threading
+import time
+from collections.abc import Mapping
+
+from facebook_business.api import FacebookAdsApi, FacebookResponse
+from facebook_business.exceptions import FacebookRequestError
+from pydantic import BaseModel, ConfigDict
+
+BUSINESS_USAGE_HEADER = "x-business-use-case-usage"
+ACCOUNT_USAGE_HEADER = "x-ad-account-usage"
+PACE_THRESHOLD_PCT = 75.0
+FULL_USAGE_PCT = 100.0
+MAX_PACE_SECONDS = 10.0
+THROTTLE_PAUSE_SECONDS = 60.0
+THROTTLE_RETRIES = 5
+THROTTLE_ERROR_CODES = frozenset(
+    {4, 17, 32, 613, 80000, 80001, 80002, 80003, 80004, 80005, 80006, 80008, 80014}
+)
+
+
+class Usage(BaseModel):
+    """The highest rate-limit usage reported by a response."""
+
+    model_config = ConfigDict(frozen=True)
+
+    percent: float = 0.0
+    reset_seconds: float = 0.0
+
+
+def parse_usage(headers: Mapping[str, str] | list[dict] | None) -> Usage:
+    """Reads the business use case and ad account usage headers.
+
+    Every call count, CPU time and wall time percentage across use cases
+    counts, and the highest wins. The reset time is the longest of the
+    regain-access estimates (given in minutes) and the account's reset
+    duration (given in seconds). Batch sub-responses list their headers
+    as name/value pairs, which are accepted too.
+    """
+    if isinstance(headers, list):
+        headers = {h["name"].lower(): h["value"] for h in headers}
+    headers = headers or {}
+    percents = [0.0]
+    resets = [0.0]
+    business = headers.get(BUSINESS_USAGE_HEADER)
+    if business:
+        for entries in json.loads(business).values():
+            for entry in entries:
+                percents.append(entry.get("call_count", 0))
+                percents.append(entry.get("total_cputime", 0))
+                percents.append(entry.get("total_time", 0))
+                resets.append(entry.get("estimated_time_to_regain_access", 0) * 60)
+    account = headers.get(ACCOUNT_USAGE_HEADER)
+    if account:
+        data = json.loads(account)
+        percents.append(data.get("acc_id_util_pct", 0))
+        resets.append(data.get("reset_time_duration", 0))
+    return Usage(percent=max(percents), reset_seconds=max(resets))
+
+
+def is_throttled(error: FacebookRequestError) -> bool:
+    """Whether a Graph API error is a rate-limit error."""
+    return error.api_error_code() in THROTTLE_ERROR_CODES
+
+
+class Throttler:
+    """Spaces out calls as usage nears the limit and pauses until reset.
+
+    Below PACE_THRESHOLD_PCT calls go out back to back. Above it the gap
+    between calls grows linearly, reaching MAX_PACE_SECONDS at full
+    usage. Once a limit is hit, no call goes out until the reset time
+    the headers announce. Calls reserve their slot under a lock, so
+    threads sharing a throttler are paced together.
+    """
+
+    def __init__(self) -> None:
+        """Starts with no pacing."""
+        self._lock = threading.Lock()
+        self._next_call = 0.0
+        self._interval = 0.0
+
+    def wait(self) -> None:
+        """Blocks until the next call may be sent."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_call)
+            self._next_call = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+    def record(self, headers: Mapping[str, str] | list[dict] | None) -> None:
+        """Adjusts pacing to the usage reported by a successful response."""
+        usage = parse_usage(headers)
+        with self._lock:
+            self._interval = _pace_seconds(usage.percent)
+            if usage.percent >= FULL_USAGE_PCT and usage.reset_seconds > 0:
+                self._pause(usage.reset_seconds)
+
+    def pause(self, headers: Mapping[str, str] | list[dict] | None) -> None:
+        """Holds every call until the reset time of a throttled response.
+
+        Without a reset time in the headers, waits THROTTLE_PAUSE_SECONDS.
+        """
+        usage = parse_usage(headers)
+        with self._lock:
+            self._interval = MAX_PACE_SECONDS
+            self._pause(usage.reset_seconds or THROTTLE_PAUSE_SECONDS)
+
+    def _pause(self, seconds: float) -> None:
+        """Pushes the next call out by seconds from now. Caller holds the lock."""
+        self._next_call = max(self._next_call, time.monotonic() + seconds)
+
+
+class ThrottledApi(FacebookAdsApi):
+    """FacebookAdsApi whose calls are paced by a Throttler.
+
+    Every HTTP call, including batch calls and cursor pages, waits for
+    its slot first and reports its usage headers afterwards. A rate-limit
+    error pauses until the reset time and the call is retried, up to
+    THROTTLE_RETRIES times.
+    """
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        """Initializes the API with its own throttler."""
+        super().__init__(*args, **kwargs)
+        self.throttler = Throttler()
+
+    def call(self, *args: object, **kwargs: object) -> FacebookResponse:
+        """Sends a Graph API call once the throttler allows it."""
+        retries = 0
+        while True:
+            self.throttler.wait()
+            try:
+                response = super().call(*args, **kwargs)
+            except FacebookRequestError as exc:
+                retries += 1
+                if not is_throttled(exc) or retries > THROTTLE_RETRIES:
+                    raise
+                self.throttler.pause(exc.http_headers())
+                continue
+            self.throttler.record(response.headers())
+            return response
+
+
+def _pace_seconds(percent: float) -> float:
+    """Returns the gap between calls for a usage percentage."""
+    if percent <= PACE_THRESHOLD_PCT:
+        return 0.0
+    fraction = (percent - PACE_THRESHOLD_PCT) / (FULL_USAGE_PCT - PACE_THRESHOLD_PCT)
+    return MAX_PACE_SECONDS * min(fraction, 1.0)
@@ -2,8 +2,30 @@
 
 from google.ads.googleads.client import GoogleAdsClient
 
+CUSTOMER_CLIENTS_QUERY = """
+    SELECT customer_client.id
+    FROM customer_client
+    WHERE customer_client.manager = FALSE
+        AND customer_client.status = 'ENABLED'
+"""
+
 
 def build_client(credentials_path: str) -> GoogleAdsClient:
     """Builds an authenticated Google Ads API client."""
     client = GoogleAdsClient.load_from_storage(credentials_path)
     return client
+
+
+def list_customers(client: GoogleAdsClient, customer_id: str) -> list[str]:
+    """Lists the enabled, non-manager accounts under a customer.
+
+    One customer_client query covers the whole hierarchy. For a manager
+    (MCC) account it returns every client account beneath it. For a
+    regular account it returns the account itself.
+    """
+    service = client.get_service("GoogleAdsService")
+    response = service.search_stream(
+        customer_id=customer_id, query=CUSTOMER_CLIENTS_QUERY
+    )
+    ids = [str(row.customer_client.id) for batch in response for row in batch.results]
+    return ids
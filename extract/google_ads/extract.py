@@ -1,13 +1,23 @@
 """Google Ads data extractor."""
 
+from collections.abc import Iterator, Sequence
 from datetime import date
+from typing import Any
 
 import pyarrow as pa
 from google.ads.googleads.client import GoogleAdsClient
 from google.protobuf.json_format import MessageToDict
 from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
 
-from extract.table import to_table
+from extract import cast
+from extract.google_ads.query import Query, compile_query
+from extract.stream import BatchStream, batched, fan_out
+from extract.table import to_batch, to_table
+
+BATCH_SIZE = 10_000
+QUEUE_BATCHES_PER_WORKER = 2
+
+CustomerIds = str | Sequence[str]
 
 
 class Raw(BaseModel):
@@ -59,35 +69,153 @@ class Record(BaseModel):
         return parsed
 
 
+RAW_SCHEMA = pa.schema(
+    [
+        ("date", pa.string()),
+        ("clicks", pa.string()),
+        ("impressions", pa.string()),
+        ("cost_micros", pa.string()),
+        ("conversions", pa.string()),
+        ("customer_id", pa.string()),
+    ]
+)
+
+SCHEMA = pa.schema(
+    [
+        ("date", pa.date32()),
+        ("clicks", pa.int64()),
+        ("impressions", pa.int64()),
+        ("cost_micros", pa.int64()),
+        ("conversions", pa.float64()),
+        ("customer_id", pa.string()),
+    ]
+)
+
+
 def extract(
     client: GoogleAdsClient,
-    customer_id: str,
+    customer_id: CustomerIds,
     query: str,
 ) -> pa.Table:
     """Extracts Google Ads data into a PyArrow table."""
     raw_rows = fetch(client, customer_id, query)
     records = [parse(r) for r in raw_rows]
-    table = to_table(records)
+    table = to_table(records, SCHEMA)
     return table
 
 
+def extract_batch(
+    client: GoogleAdsClient,
+    customer_id: CustomerIds,
+    query: str,
+) -> tuple[pa.Table, pa.Table]:
+    """Extracts Google Ads data using vectorized batch parsing.
+
+    Returns the typed table and a side table of rejected raw rows.
+    """
+    raw_rows = fetch(client, customer_id, query)
+    raw = to_table(raw_rows, RAW_SCHEMA)
+    table, rejects = parse_batch(raw)
+    return table, rejects
+
+
+def extract_stream(
+    client: GoogleAdsClient,
+    customer_id: CustomerIds,
+    query: str,
+    search_stream: bool = False,
+    workers: int = 1,
+) -> BatchStream:
+    """Extracts Google Ads data as a lazily parsed stream of record batches.
+
+    With search_stream, rows are read through GoogleAdsService.SearchStream
+    and decoded straight off the protobuf messages. The columns then
+    follow the query's SELECT list instead of SCHEMA. Several customers
+    are then queried by up to workers threads sharing one
+    GoogleAdsService, at most QUEUE_BATCHES_PER_WORKER batches each
+    ahead of the consumer.
+    """
+    if search_stream:
+        compiled = compile_query(client, query)
+        raw_batches = _stream_batches(client, customer_id, compiled, workers)
+        return BatchStream(raw_batches, compiled.raw_schema, compiled.parse_batch)
+    raw_batches = fetch_batches(client, customer_id, query)
+    stream = BatchStream(raw_batches, RAW_SCHEMA, parse_batch)
+    return stream
+
+
 def fetch(
     client: GoogleAdsClient,
-    customer_id: str,
+    customer_id: CustomerIds,
     query: str,
 ) -> list[Raw]:
     """Fetches raw data from the Google Ads API."""
-    service = client.get_service("GoogleAdsService")
-    response = service.search(customer_id=customer_id, query=query)
-    raw_rows = []
-    for row in response:
-        row_dict = MessageToDict(row._pb)
-        flattened = _flatten_row(row_dict)
-        raw = _to_raw(flattened, customer_id)
-        raw_rows.append(raw)
+    raw_rows = list(_rows(client, customer_id, query))
     return raw_rows
 
 
+def fetch_batches(
+    client: GoogleAdsClient,
+    customer_id: CustomerIds,
+    query: str,
+) -> Iterator[pa.RecordBatch]:
+    """Yields raw record batches of BATCH_SIZE rows as the pager advances."""
+    for chunk in batched(_rows(client, customer_id, query), BATCH_SIZE):
+        yield to_batch(chunk, RAW_SCHEMA)
+
+
+def _stream_batches(
+    client: GoogleAdsClient,
+    customer_id: CustomerIds,
+    query: Query,
+    workers: int = 1,
+) -> Iterator[pa.RecordBatch]:
+    """Runs a SearchStream per customer and decodes each response."""
+    customer_ids = _customer_ids(customer_id)
+    service = client.get_service("GoogleAdsService")
+    if workers <= 1 or len(customer_ids) == 1:
+        for cid in customer_ids:
+            yield from _customer_batches(service, cid, query)
+        return
+
+    yield from fan_out(
+        lambda cid: _customer_batches(service, cid, query),
+        customer_ids,
+        workers,
+        workers * QUEUE_BATCHES_PER_WORKER,
+    )
+
+
+def _customer_batches(
+    service: Any,
+    customer_id: str,
+    query: Query,
+) -> Iterator[pa.RecordBatch]:
+    """Streams one customer's query and decodes each response."""
+    for response in service.search_stream(customer_id=customer_id, query=query.text):
+        yield query.decode(response._pb.results, customer_id)
+
+
+def _customer_ids(customer_id: CustomerIds) -> list[str]:
+    """Normalizes one customer ID or a sequence of them to a list."""
+    if isinstance(customer_id, str):
+        return [customer_id]
+    return list(customer_id)
+
+
+def _rows(
+    client: GoogleAdsClient, customer_id: CustomerIds, query: str
+) -> Iterator[Raw]:
+    """Runs a paged search per customer and yields each row as a Raw instance."""
+    service = client.get_service("GoogleAdsService")
+    for cid in _customer_ids(customer_id):
+        response = service.search(customer_id=cid, query=query)
+        for row in response:
+            row_dict = MessageToDict(row._pb)
+            flattened = _flatten_row(row_dict)
+            yield _to_raw(flattened, cid)
+
+
 def _flatten_row(row_dict: dict) -> dict:
     """Flattens a nested protobuf dict into dot-notation keys.
 
@@ -112,13 +240,19 @@ def _flatten_row(row_dict: dict) -> dict:
 
 
 def _to_raw(row_dict: dict, customer_id: str) -> Raw:
-    """Converts a flattened protobuf dict into a Raw instance."""
+    """Converts a flattened protobuf dict into a Raw instance.
+
+    MessageToDict renders int64 fields as strings but doubles as floats,
+    so conversions is normalized to a string to match the other metrics.
+    It also omits fields left at their zero default, so a missing metric
+    reads as zero.
+    """
     raw = Raw(
         date=row_dict["segments.date"],
-        clicks=row_dict["metrics.clicks"],
-        impressions=row_dict["metrics.impressions"],
-        cost_micros=row_dict["metrics.costMicros"],
-        conversions=row_dict["metrics.conversions"],
+        clicks=row_dict.get("metrics.clicks", "0"),
+        impressions=row_dict.get("metrics.impressions", "0"),
+        cost_micros=row_dict.get("metrics.costMicros", "0"),
+        conversions=str(row_dict.get("metrics.conversions", 0)),
         customer_id=customer_id,
     )
     return raw
@@ -130,3 +264,17 @@ def parse(raw: Raw) -> Record:
         return Record(**raw.model_dump())
     except ValidationError as exc:
         raise ValueError(f"Failed to parse Google Ads row: {raw}") from exc
+
+
+def parse_batch(raw: pa.Table) -> tuple[pa.Table, pa.Table]:
+    """Casts a raw Google Ads table into typed columns and rejects."""
+    columns = {
+        "date": cast.to_date(raw["date"]),
+        "clicks": cast.to_int64(raw["clicks"]),
+        "impressions": cast.to_int64(raw["impressions"]),
+        "cost_micros": cast.to_int64(raw["cost_micros"]),
+        "conversions": cast.to_float64(raw["conversions"]),
+        "customer_id": raw["customer_id"],
+    }
+    table, rejects = cast.split_rejects(raw, columns, SCHEMA)
+    return table, rejects
@@ -0,0 +1,161 @@
+"""GAQL queries compiled into protobuf field accessors and Arrow types."""
+
+import re
+from collections.abc import Sequence
+from operator import attrgetter
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from google.ads.googleads.client import GoogleAdsClient
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+
+from extract import cast
+
+SELECT_PATTERN = re.compile(r"\bSELECT\b(.*?)\bFROM\b", re.IGNORECASE | re.DOTALL)
+GENERIC_PREFIXES = ("segments", "metrics")
+DATE_SEGMENTS = frozenset(
+    {"segments.date", "segments.week", "segments.month", "segments.quarter"}
+)
+CUSTOMER_ID_COLUMN = "customer_id"
+ARROW_TYPES = {
+    FieldDescriptor.CPPTYPE_INT32: pa.int64(),
+    FieldDescriptor.CPPTYPE_INT64: pa.int64(),
+    FieldDescriptor.CPPTYPE_UINT32: pa.int64(),
+    FieldDescriptor.CPPTYPE_UINT64: pa.uint64(),
+    FieldDescriptor.CPPTYPE_DOUBLE: pa.float64(),
+    FieldDescriptor.CPPTYPE_FLOAT: pa.float64(),
+    FieldDescriptor.CPPTYPE_BOOL: pa.bool_(),
+    FieldDescriptor.CPPTYPE_STRING: pa.string(),
+    FieldDescriptor.CPPTYPE_ENUM: pa.string(),
+}
+
+
+class Field:
+    """One selected GAQL field with its compiled accessor and Arrow type.
+
+    Enum values are read as numbers and mapped to their names with one
+    vectorized lookup per batch.
+    """
+
+    def __init__(self, path: str, descriptor: FieldDescriptor) -> None:
+        """Compiles the accessor and Arrow type of a leaf field."""
+        if descriptor.cpp_type not in ARROW_TYPES:
+            raise ValueError(f"GAQL field {path} is not a scalar field")
+        self.path = path
+        self.column = column_name(path)
+        self._get = attrgetter(path)
+        self._repeated = descriptor.is_repeated
+        self._enum = None
+        if descriptor.cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+            values = descriptor.enum_type.values
+            self._enum = (
+                pa.array([v.number for v in values], pa.int32()),
+                pa.array([v.name for v in values], pa.string()),
+            )
+        value_type = ARROW_TYPES[descriptor.cpp_type]
+        self.type = pa.list_(value_type) if self._repeated else value_type
+
+    def read(self, rows: Sequence) -> pa.Array:
+        """Reads the field from every protobuf row into one Arrow array."""
+        values = [self._get(row) for row in rows]
+        if self._repeated:
+            values = [list(v) for v in values]
+        if self._enum is None:
+            return pa.array(values, self.type)
+        numbers, names = self._enum
+        if self._repeated:
+            flat = pa.array(values, pa.list_(pa.int32()))
+            labels = pc.take(names, pc.index_in(pc.list_flatten(flat), numbers))
+            return pa.ListArray.from_arrays(flat.offsets, labels)
+        return pc.take(names, pc.index_in(pa.array(values, pa.int32()), numbers))
+
+
+class Query:
+    """A GAQL query compiled against the GoogleAdsRow message.
+
+    The SELECT list is parsed once. Each field gets an attribute getter
+    and the Arrow type of its protobuf field, so any resource and field
+    list decodes straight from protobuf rows into typed record batches.
+    Rows are tagged with the customer_id they were queried for, unless
+    the query selects customer.id itself.
+    """
+
+    def __init__(self, text: str, row: Descriptor) -> None:
+        """Compiles every field of the query's SELECT list."""
+        self.text = text
+        self.fields = [Field(path, _resolve(path, row)) for path in select(text)]
+        columns = [f.column for f in self.fields]
+        duplicates = sorted({c for c in columns if columns.count(c) > 1})
+        if duplicates:
+            raise ValueError(f"GAQL fields share column names: {duplicates}")
+        raw_fields = [(f.column, f.type) for f in self.fields]
+        if CUSTOMER_ID_COLUMN not in columns:
+            raw_fields.append((CUSTOMER_ID_COLUMN, pa.string()))
+        self.raw_schema = pa.schema(raw_fields)
+        self._dates = {f.column for f in self.fields if f.path in DATE_SEGMENTS}
+        self.schema = pa.schema(
+            [
+                (f.name, pa.date32() if f.name in self._dates else f.type)
+                for f in self.raw_schema
+            ]
+        )
+
+    def decode(self, rows: Sequence, customer_id: str) -> pa.RecordBatch:
+        """Decodes protobuf GoogleAdsRow messages into a raw_schema batch."""
+        columns = {f.column: f.read(rows) for f in self.fields}
+        if CUSTOMER_ID_COLUMN not in columns:
+            columns[CUSTOMER_ID_COLUMN] = pa.array([customer_id] * len(rows))
+        return pa.RecordBatch.from_pydict(columns, schema=self.raw_schema)
+
+    def parse_batch(self, raw: pa.Table) -> tuple[pa.Table, pa.Table]:
+        """Parses date segments into dates and splits off rejected rows.
+
+        Every other column is already typed by decode().
+        """
+        columns = {
+            name: cast.to_date(raw[name]) if name in self._dates else raw[name]
+            for name in self.schema.names
+        }
+        table, rejects = cast.split_rejects(raw, columns, self.schema)
+        return table, rejects
+
+
+def compile_query(client: GoogleAdsClient, text: str) -> Query:
+    """Compiles a GAQL query against the client's GoogleAdsRow version."""
+    row = client.get_type("GoogleAdsRow")
+    query = Query(text, row._pb.DESCRIPTOR)
+    return query
+
+
+def select(text: str) -> list[str]:
+    """Returns the field paths of a GAQL query's SELECT list, in order."""
+    match = SELECT_PATTERN.search(text)
+    if match is None:
+        raise ValueError(f"No SELECT clause in Google Ads query: {text}")
+    fields = [field.strip() for field in match.group(1).split(",")]
+    return [field for field in fields if field]
+
+
+def column_name(path: str) -> str:
+    """Names the output column of a GAQL field path.
+
+    Segments and metrics keep their own name (segments.date is date).
+    Resource attributes are qualified by their resource (campaign.id is
+    campaign_id), so fields of different resources do not collide.
+    """
+    prefix, _, name = path.partition(".")
+    if prefix in GENERIC_PREFIXES:
+        return name.replace(".", "_")
+    return path.replace(".", "_")
+
+
+def _resolve(path: str, row: Descriptor) -> FieldDescriptor:
+    """Finds the protobuf field a dotted GAQL path points to."""
+    message = row
+    field = None
+    for part in path.split("."):
+        if message is None or part not in message.fields_by_name:
+            raise ValueError(f"Unknown GAQL field: {path}")
+        field = message.fields_by_name[part]
+        message = field.message_type
+    return field
@@ -1,9 +1,13 @@
 """Google Analytics Data API client."""
 
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from extract.google_analytics.quota import QuotaClient
 
 
-def build_client(credentials_path: str) -> BetaAnalyticsDataClient:
-    """Builds an authenticated Google Analytics Data API client."""
-    client = BetaAnalyticsDataClient.from_service_account_file(credentials_path)
+def build_client(credentials_path: str) -> QuotaClient:
+    """Builds an authenticated Google Analytics Data API client.
+
+    Report calls are scheduled against the property's quota, so pages
+    fetched in parallel share one concurrency and token budget.
+    """
+    client = QuotaClient.from_service_account_file(credentials_path)
     return client
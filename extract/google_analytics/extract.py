@@ -1,26 +1,61 @@
 """Google Analytics data extractor."""
 
+import functools
+from collections.abc import Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 
 import pyarrow as pa
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
     DateRange,
     Dimension,
     Metric,
+    MetricType,
     RunReportRequest,
     RunReportResponse,
 )
-from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from extract import cast
+from extract.stream import BatchStream
+from extract.table import build_table
+
+GA4_DATE_FORMAT = "%Y%m%d"
+PAGE_SIZE = 100_000
+MAX_PAGE_SIZE = 250_000
+BATCH_REPORT_LIMIT = 5
+METRIC_CASTS = {
+    MetricType.TYPE_INTEGER: cast.to_int64,
+    MetricType.TYPE_FLOAT: cast.to_float64,
+    MetricType.TYPE_SECONDS: cast.to_float64,
+    MetricType.TYPE_MILLISECONDS: cast.to_float64,
+    MetricType.TYPE_MINUTES: cast.to_float64,
+    MetricType.TYPE_HOURS: cast.to_float64,
+    MetricType.TYPE_STANDARD: cast.to_float64,
+    MetricType.TYPE_CURRENCY: cast.to_float64,
+    MetricType.TYPE_FEET: cast.to_float64,
+    MetricType.TYPE_MILES: cast.to_float64,
+    MetricType.TYPE_METERS: cast.to_float64,
+    MetricType.TYPE_KILOMETERS: cast.to_float64,
+}
 
 
 class ReportConfig(BaseModel):
-    """Defines the dimensions and metrics for a GA4 report request."""
+    """Defines the dimensions and metrics for a GA4 report request.
+
+    Reports are requested page_size rows at a time, at most
+    MAX_PAGE_SIZE, the largest limit the API accepts. The pages after
+    the first are fetched by up to workers threads.
+    """
 
     model_config = ConfigDict(frozen=True)
 
     dimension_names: list[str]
     metric_names: list[str]
+    page_size: int = Field(default=PAGE_SIZE, gt=0, le=MAX_PAGE_SIZE)
+    workers: int = Field(default=1, ge=1)
 
 
 class Raw(BaseModel):
@@ -68,6 +103,117 @@ def extract(
     return table
 
 
+def extract_batch(
+    client: BetaAnalyticsDataClient,
+    property_id: str,
+    start_date: date,
+    end_date: date,
+    config: ReportConfig,
+) -> tuple[pa.Table, pa.Table]:
+    """Extracts Google Analytics data using vectorized batch parsing.
+
+    Returns the typed table and a side table of rejected raw rows.
+    """
+    responses = list(_responses(client, property_id, start_date, end_date, config))
+    table, rejects = _parse_responses(responses, config)
+    return table, rejects
+
+
+def extract_stream(
+    client: BetaAnalyticsDataClient,
+    property_id: str,
+    start_date: date,
+    end_date: date,
+    config: ReportConfig,
+) -> BatchStream:
+    """Extracts Google Analytics data as a lazily parsed stream of record batches.
+
+    Metric types are read from each page's headers as it is fetched, so
+    they are known before the stream parses that page.
+    """
+    types: dict[str, MetricType] = {}
+
+    def raw_batches() -> Iterator[pa.RecordBatch]:
+        """Decodes each page, recording its metric types first."""
+        for response in _responses(client, property_id, start_date, end_date, config):
+            types.update(metric_types(response))
+            yield decode(response)
+
+    stream = BatchStream(
+        raw_batches(),
+        _build_raw_schema(config),
+        functools.partial(parse_batch, config=config, metric_types=types),
+    )
+    return stream
+
+
+def extract_reports(
+    client: BetaAnalyticsDataClient,
+    property_id: str,
+    date_ranges: Sequence[tuple[date, date]],
+    configs: Sequence[ReportConfig],
+    workers: int = 1,
+) -> list[tuple[pa.Table, pa.Table]]:
+    """Extracts several GA4 reports through batched API calls.
+
+    Every config is requested for every date range, and the requests
+    share batch_run_reports calls BATCH_REPORT_LIMIT at a time, the most
+    the API accepts. Returns one (table, rejects) pair per config, in
+    config order, with the rows of all its date ranges. See
+    fetch_reports().
+    """
+    reports = fetch_reports(client, property_id, date_ranges, configs, workers)
+    results = []
+    for config, responses in zip(configs, reports, strict=True):
+        results.append(_parse_responses(responses, config))
+    return results
+
+
+def _parse_responses(
+    responses: Sequence[RunReportResponse], config: ReportConfig
+) -> tuple[pa.Table, pa.Table]:
+    """Decodes and casts response pages, or an empty table when there are none."""
+    if not responses:
+        return parse_batch(_build_raw_schema(config).empty_table(), config)
+    raw = pa.Table.from_batches([decode(r) for r in responses])
+    table, rejects = parse_batch(raw, config, metric_types(responses[0]))
+    return table, rejects
+
+
+def fetch_reports(
+    client: BetaAnalyticsDataClient,
+    property_id: str,
+    date_ranges: Sequence[tuple[date, date]],
+    configs: Sequence[ReportConfig],
+    workers: int = 1,
+) -> list[list[RunReportResponse]]:
+    """Fetches several GA4 reports and returns the response pages of each config.
+
+    First pages go out in batches of BATCH_REPORT_LIMIT requests. Reports
+    with more rows than their page_size then have their remaining pages
+    batched the same way. Batches are sent by up to workers threads.
+    """
+    requests = [
+        (index, _build_request(property_id, start, end, config))
+        for index, config in enumerate(configs)
+        for start, end in date_ranges
+    ]
+    first_pages = _run_batches(client, property_id, [r for _, r in requests], workers)
+
+    more = [
+        (index, RunReportRequest(request, offset=offset))
+        for (index, request), response in zip(requests, first_pages, strict=True)
+        for offset in range(request.limit, response.row_count, request.limit)
+    ]
+    next_pages = _run_batches(client, property_id, [r for _, r in more], workers)
+
+    reports: list[list[RunReportResponse]] = [[] for _ in configs]
+    pages = zip(requests + more, first_pages + next_pages, strict=True)
+    for (index, _), response in pages:
+        reports[index].append(response)
+    return reports
+
+
 def fetch(
     client: BetaAnalyticsDataClient,
     property_id: str,
@@ -75,20 +221,127 @@ def fetch(
     end_date: date,
     config: ReportConfig,
 ) -> list[Raw]:
-    """Fetches raw data from the GA4 API."""
-    request = _build_request(property_id, start_date, end_date, config)
-    response = client.run_report(request)
-    raw_rows = _parse_response(response, config)
+    """Fetches raw data from the GA4 API, following every page."""
+    responses = _responses(client, property_id, start_date, end_date, config)
+    raw_rows = [row for r in responses for row in _parse_response(r, config)]
     return raw_rows
 
 
+def fetch_batches(
+    client: BetaAnalyticsDataClient,
+    property_id: str,
+    start_date: date,
+    end_date: date,
+    config: ReportConfig,
+) -> Iterator[pa.RecordBatch]:
+    """Yields one decoded record batch per report page, in page order."""
+    for response in _responses(client, property_id, start_date, end_date, config):
+        yield decode(response)
+
+
+def decode(response: RunReportResponse) -> pa.RecordBatch:
+    """Decodes a GA4 response page column by column into a string batch.
+
+    Column names are read once from the dimension and metric headers,
+    and each column is read straight off the protobuf rows. Values stay
+    strings, so rejected rows keep what the API sent. parse_batch casts
+    them by metric_types(). date stays a YYYYMMDD string, added empty
+    when it is not a dimension.
+    """
+    message = response._pb
+    rows = message.rows
+    columns: dict[str, pa.Array] = {}
+    for i, header in enumerate(message.dimension_headers):
+        columns[header.name] = pa.array(
+            [row.dimension_values[i].value for row in rows], pa.string()
+        )
+    for i, header in enumerate(message.metric_headers):
+        columns[header.name] = pa.array(
+            [row.metric_values[i].value for row in rows], pa.string()
+        )
+    if "date" not in columns:
+        columns["date"] = pa.array([""] * len(rows), pa.string())
+    batch = pa.RecordBatch.from_pydict(columns)
+    return batch
+
+
+def metric_types(response: RunReportResponse) -> dict[str, MetricType]:
+    """Reads each metric's type from a response's metric headers."""
+    types = {header.name: header.type_ for header in response._pb.metric_headers}
+    return types
+
+
+def _responses(
+    client: BetaAnalyticsDataClient,
+    property_id: str,
+    start_date: date,
+    end_date: date,
+    config: ReportConfig,
+) -> Iterator[RunReportResponse]:
+    """Runs a report page by page and yields the responses in page order.
+
+    The first page is fetched alone for the report's row_count. The
+    remaining offsets are then requested one after another, or by up to
+    config.workers threads.
+    """
+
+    def run_page(offset: int) -> RunReportResponse:
+        """Runs the report page starting at offset."""
+        request = _build_request(property_id, start_date, end_date, config, offset)
+        return client.run_report(request)
+
+    first = run_page(0)
+    yield first
+    offsets = range(config.page_size, first.row_count, config.page_size)
+
+    if config.workers <= 1:
+        for offset in offsets:
+            yield run_page(offset)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=config.workers)
+    try:
+        yield from executor.map(run_page, offsets)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _run_batches(
+    client: BetaAnalyticsDataClient,
+    property_id: str,
+    requests: list[RunReportRequest],
+    workers: int = 1,
+) -> list[RunReportResponse]:
+    """Sends report requests through batch_run_reports, keeping their order."""
+    chunks = [
+        requests[i : i + BATCH_REPORT_LIMIT]
+        for i in range(0, len(requests), BATCH_REPORT_LIMIT)
+    ]
+
+    def run_batch(chunk: list[RunReportRequest]) -> list[RunReportResponse]:
+        """Runs one batch of reports."""
+        batch = BatchRunReportsRequest(
+            property=f"properties/{property_id}",
+            requests=chunk,
+        )
+        return list(client.batch_run_reports(batch).reports)
+
+    if workers <= 1 or len(chunks) <= 1:
+        return [report for chunk in chunks for report in run_batch(chunk)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run_batch, chunks))
+    return [report for reports in results for report in reports]
+
+
 def _build_request(
     property_id: str,
     start_date: date,
     end_date: date,
     config: ReportConfig,
+    offset: int = 0,
 ) -> RunReportRequest:
-    """Builds a GA4 RunReportRequest."""
+    """Builds a GA4 RunReportRequest for the page starting at offset."""
     request = RunReportRequest(
         property=f"properties/{property_id}",
         date_ranges=[
@@ -99,6 +352,8 @@ def _build_request(
         ],
         dimensions=[Dimension(name=d) for d in config.dimension_names],
         metrics=[Metric(name=m) for m in config.metric_names],
+        limit=config.page_size,
+        offset=offset,
     )
     return request
 
@@ -108,16 +363,15 @@ def _parse_response(
     config: ReportConfig,
 ) -> list[Raw]:
     """Parses a GA4 API response into a list of Raw rows."""
+    date_index = (
+        config.dimension_names.index("date")
+        if "date" in config.dimension_names
+        else None
+    )
     rows = []
     for row in response.rows:
         dimension_values = [v.value for v in row.dimension_values]
         metric_values = [v.value for v in row.metric_values]
-
-        date_index = (
-            config.dimension_names.index("date")
-            if "date" in config.dimension_names
-            else None
-        )
         date_value = dimension_values[date_index] if date_index is not None else ""
 
         raw = Raw(
@@ -145,12 +399,70 @@ def parse(raw: Raw, config: ReportConfig) -> Record:
 
 def to_table(records: list[Record], config: ReportConfig) -> pa.Table:
     """Converts a list of Records into a PyArrow table."""
-    rows = []
-    for record in records:
-        row: dict[str, str] = {}
-        row.update(record.dimensions)
-        row.update(record.metrics)
-        row["date"] = record.date.isoformat()
-        rows.append(row)
-    table = pa.Table.from_pylist(rows)
+    schema = _build_schema(config)
+    columns: dict[str, list] = {}
+    for name in config.dimension_names:
+        columns[name] = [record.dimensions[name] for record in records]
+    for name in config.metric_names:
+        columns[name] = [record.metrics[name] for record in records]
+    columns["date"] = [record.date for record in records]
+    table = build_table(columns, schema)
     return table
+
+
+def parse_batch(
+    raw: pa.Table,
+    config: ReportConfig,
+    metric_types: Mapping[str, MetricType] | None = None,
+) -> tuple[pa.Table, pa.Table]:
+    """Casts a raw GA4 table into typed columns and rejects.
+
+    Metrics are cast by their header type in metric_types: integers to
+    int64 and every other numeric type (float, currency, durations,
+    distances) to float64. Metrics of unknown type stay strings. A row
+    with a value that does not fit its type is rejected as sent.
+    """
+    metric_types = metric_types or {}
+    columns = {name: raw[name] for name in config.dimension_names}
+    for name in config.metric_names:
+        to_type = METRIC_CASTS.get(metric_types.get(name))
+        columns[name] = raw[name] if to_type is None else to_type(raw[name])
+    columns["date"] = cast.to_date(raw["date"], GA4_DATE_FORMAT)
+    schema = _build_schema(
+        config, {name: columns[name].type for name in config.metric_names}
+    )
+    table, rejects = cast.split_rejects(raw, columns, schema)
+    return table, rejects
+
+
+def _build_raw_schema(config: ReportConfig) -> pa.Schema:
+    """Builds the all-string Arrow schema of a raw GA4 report."""
+    names = [*config.dimension_names, *config.metric_names]
+    if "date" not in config.dimension_names:
+        names.append("date")
+    schema = pa.schema([(name, pa.string()) for name in names])
+    return schema
+
+
+def _build_schema(
+    config: ReportConfig, metric_arrow_types: Mapping[str, pa.DataType] | None = None
+) -> pa.Schema:
+    """Builds the Arrow schema for a GA4 report.
+
+    The date dimension is typed as date32 and every other dimension is a
+    string. Metrics take their type from metric_arrow_types when given,
+    and are otherwise kept as strings, matching the GA4 response values.
+    """
+    metric_arrow_types = metric_arrow_types or {}
+    fields = [
+        (name, pa.date32() if name == "date" else pa.string())
+        for name in config.dimension_names
+    ]
+    fields.extend(
+        (name, metric_arrow_types.get(name, pa.string()))
+        for name in config.metric_names
+    )
+    if "date" not in config.dimension_names:
+        fields.append(("date", pa.date32()))
+    schema = pa.schema(fields)
+    return schema
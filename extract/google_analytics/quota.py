@@ -0,0 +1,212 @@
+"""Property-quota-aware scheduling for GA4 Data API requests."""
+
+import functools
+import threading
+import time
+from collections.abc import Callable, Sequence
+from typing import TypeVar
+
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
+    BatchRunReportsResponse,
+    PropertyQuota,
+    RunReportRequest,
+    RunReportResponse,
+)
+from google.api_core.exceptions import ResourceExhausted
+from pydantic import BaseModel, ConfigDict
+
+CONCURRENT_REQUESTS = 10
+PACE_REQUESTS = 50
+HOUR_SECONDS = 3600.0
+QUOTA_PAUSE_SECONDS = 60.0
+QUOTA_RETRIES = 5
+DAILY_QUOTA_MESSAGE = (
+    "GA4 daily token quota exhausted for the property; "
+    "it refills at midnight Pacific time"
+)
+
+T = TypeVar("T")
+
+
+class Quota(BaseModel):
+    """The property quota reported by one API call."""
+
+    model_config = ConfigDict(frozen=True)
+
+    tokens_consumed: int
+    tokens_remaining: int
+    concurrent_remaining: int
+    daily_tokens_remaining: int | None = None
+
+
+def parse_quota(responses: Sequence[RunReportResponse]) -> Quota | None:
+    """Reads the property quota of the reports returned by one call.
+
+    A batch call returns one quota per report. Their token costs add up,
+    and the lowest remaining budget wins. Hourly tokens are the lower of
+    the property's and, when reported, the Cloud project's. Daily tokens
+    are kept when reported. Returns None when no report carries a quota.
+    """
+    quotas = [r.property_quota for r in responses if "property_quota" in r]
+    if not quotas:
+        return None
+    daily = [q.tokens_per_day.remaining for q in quotas if "tokens_per_day" in q]
+    return Quota(
+        tokens_consumed=sum(q.tokens_per_hour.consumed for q in quotas),
+        tokens_remaining=min(_hourly_tokens_remaining(q) for q in quotas),
+        concurrent_remaining=min(q.concurrent_requests.remaining for q in quotas),
+        daily_tokens_remaining=min(daily) if daily else None,
+    )
+
+
+class QuotaScheduler:
+    """Paces report calls to the property's concurrency and token quota."""
+
+    def __init__(self) -> None:
+        """Starts with the full concurrency and no pacing."""
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._concurrent = CONCURRENT_REQUESTS
+        self._next_call = 0.0
+        self._interval = 0.0
+        self._exhausted = False
+        self._daily_exhausted = False
+
+    @property
+    def daily_exhausted(self) -> bool:
+        """Whether the last reported daily tokens cannot cover another call."""
+        return self._daily_exhausted
+
+    def acquire(self) -> None:
+        """Blocks until a call fits the concurrency and token budget.
+
+        Raises ResourceExhausted once the daily tokens have run out.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < self._concurrent)
+            if self._daily_exhausted:
+                raise ResourceExhausted(DAILY_QUOTA_MESSAGE)
+            self._in_flight += 1
+            now = time.monotonic()
+            start = max(now, self._next_call)
+            self._next_call = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+    def release(self, quota: Quota | None) -> None:
+        """Frees the call's slot and adjusts to the quota it reported."""
+        with self._condition:
+            if quota is not None:
+                self._record(quota)
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def pause(self) -> None:
+        """Holds every call after the API rejected one for quota.
+
+        Waits until the hour rolls over when the last call left no tokens
+        for another, and QUOTA_PAUSE_SECONDS otherwise.
+        """
+        with self._condition:
+            seconds = _seconds_to_next_hour() if self._exhausted else 0.0
+            self._pause(max(seconds, QUOTA_PAUSE_SECONDS))
+
+    def _record(self, quota: Quota) -> None:
+        """Sets concurrency and pacing from a quota. Caller holds the lock."""
+        self._concurrent = max(
+            1, min(CONCURRENT_REQUESTS, self._in_flight + quota.concurrent_remaining)
+        )
+        cost = max(quota.tokens_consumed, 1)
+        daily = quota.daily_tokens_remaining
+        self._daily_exhausted = daily is not None and daily < cost
+        calls_left = quota.tokens_remaining // cost
+        self._exhausted = calls_left == 0
+        if self._exhausted:
+            self._interval = 0.0
+            self._pause(_seconds_to_next_hour())
+        elif calls_left < PACE_REQUESTS:
+            self._interval = _seconds_to_next_hour() / calls_left
+        else:
+            self._interval = 0.0
+
+    def _pause(self, seconds: float) -> None:
+        """Pushes the next call out by seconds from now. Caller holds the lock."""
+        self._next_call = max(self._next_call, time.monotonic() + seconds)
+
+
+class QuotaClient(BetaAnalyticsDataClient):
+    """BetaAnalyticsDataClient whose report calls follow a QuotaScheduler.
+
+    Every run_report and batch_run_reports call asks for the property
+    quota, waits for its slot first and reports the quota afterwards. A
+    call rejected for quota pauses the scheduler and is retried, up to
+    QUOTA_RETRIES times, unless the daily tokens have run out.
+    """
+
+    def __init__(self, *args: object, **kwargs: object) -> None:
+        """Initializes the client with its own scheduler."""
+        super().__init__(*args, **kwargs)
+        self.scheduler = QuotaScheduler()
+
+    def run_report(
+        self, request: RunReportRequest, **kwargs: object
+    ) -> RunReportResponse:
+        """Runs a report once the quota allows it."""
+        request = RunReportRequest(request, return_property_quota=True)
+        return self._call(functools.partial(super().run_report, request, **kwargs))
+
+    def batch_run_reports(
+        self, request: BatchRunReportsRequest, **kwargs: object
+    ) -> BatchRunReportsResponse:
+        """Runs a batch of reports once the quota allows it."""
+        request = BatchRunReportsRequest(
+            property=request.property,
+            requests=[
+                RunReportRequest(r, return_property_quota=True)
+                for r in request.requests
+            ],
+        )
+        send = functools.partial(super().batch_run_reports, request, **kwargs)
+        return self._call(send)
+
+    def _call(self, send: Callable[[], T]) -> T:
+        """Sends a scheduled call, retrying it after quota errors."""
+        retries = 0
+        while True:
+            self.scheduler.acquire()
+            quota = None
+            try:
+                response = send()
+                quota = parse_quota(_reports(response))
+                return response
+            except ResourceExhausted:
+                retries += 1
+                if retries > QUOTA_RETRIES or self.scheduler.daily_exhausted:
+                    raise
+                self.scheduler.pause()
+            finally:
+                self.scheduler.release(quota)
+
+
+def _reports(
+    response: RunReportResponse | BatchRunReportsResponse,
+) -> Sequence[RunReportResponse]:
+    """The reports of a single or batch call."""
+    if isinstance(response, BatchRunReportsResponse):
+        return response.reports
+    return [response]
+
+
+def _hourly_tokens_remaining(quota: PropertyQuota) -> int:
+    """The lower of the property's and the project's hourly tokens left."""
+    remaining = quota.tokens_per_hour.remaining
+    if "tokens_per_project_per_hour" in quota:
+        remaining = min(remaining, quota.tokens_per_project_per_hour.remaining)
+    return remaining
+
+
+def _seconds_to_next_hour() -> float:
+    """Seconds until the next clock hour, when hourly quotas refill."""
+    return HOUR_SECONDS - time.time() % HOUR_SECONDS
@@ -1,8 +1,14 @@
 """Google Sheets data extraction."""
 
+import hashlib
+import json
+from collections.abc import Sequence
+
 import pyarrow as pa
 from pydantic import BaseModel, ConfigDict
 
+from extract.table import build_table
+
 
 class Raw(BaseModel):
     """Mirrors the raw row structure returned by the Sheets API."""
@@ -24,8 +30,7 @@ class Record(BaseModel):
 def extract(client, spreadsheet_id: str, sheet_name: str) -> pa.Table:
     """Extracts Google Sheet data into a PyArrow table."""
     raw = fetch(client, spreadsheet_id, sheet_name)
-    records = parse(raw)
-    table = pa.Table.from_pylist([record.data for record in records])
+    table = to_table(raw)
     return table
 
 
@@ -35,7 +40,35 @@ def fetch(client, spreadsheet_id: str, sheet_name: str) -> Raw:
     response = (
         sheet.values().get(spreadsheetId=spreadsheet_id, range=sheet_name).execute()
     )
-    values = response.get("values", [])
+    raw = _to_raw(response, spreadsheet_id, sheet_name)
+    return raw
+
+
+def fetch_sheets(
+    client, spreadsheet_id: str, sheet_names: Sequence[str]
+) -> dict[str, Raw]:
+    """Fetches several tabs of a spreadsheet in one batchGet request.
+
+    The API returns one value range per requested range, in request
+    order. Returns each tab's Raw keyed by sheet name.
+    """
+    sheet = client.spreadsheets()
+    response = (
+        sheet.values()
+        .batchGet(spreadsheetId=spreadsheet_id, ranges=list(sheet_names))
+        .execute()
+    )
+    value_ranges = response.get("valueRanges", [])
+    raws = {
+        name: _to_raw(value_range, spreadsheet_id, name)
+        for name, value_range in zip(sheet_names, value_ranges, strict=True)
+    }
+    return raws
+
+
+def _to_raw(value_range: dict, spreadsheet_id: str, sheet_name: str) -> Raw:
+    """Splits a value range into its header row and data rows."""
+    values = value_range.get("values", [])
     if not values:
         raise ValueError(
             f"Sheet '{sheet_name}' in spreadsheet '{spreadsheet_id}' "
@@ -46,9 +79,39 @@ def fetch(client, spreadsheet_id: str, sheet_name: str) -> Raw:
     return Raw(headers=headers, rows=rows)
 
 
+def content_hash(raw: Raw) -> str:
+    """Returns a SHA-256 hex digest of a sheet's headers and cell values.
+
+    Two fetches of an unchanged sheet hash the same, so a load can be
+    skipped when the digest matches the last one loaded.
+    """
+    payload = json.dumps([raw.headers, raw.rows], ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 def parse(raw: Raw) -> list[Record]:
     """Converts a Raw sheet response into a list of Records."""
     records = [
         Record(data=dict(zip(raw.headers, row, strict=True))) for row in raw.rows
     ]
     return records
+
+
+def to_table(raw: Raw) -> pa.Table:
+    """Converts a Raw sheet response into a string-typed PyArrow table.
+
+    Sheet cells carry no type information, so every header becomes a
+    string column and typing is left to the staging models.
+    """
+    width = len(raw.headers)
+    for index, row in enumerate(raw.rows):
+        if len(row) != width:
+            raise ValueError(
+                f"Sheet row {index + 1} has {len(row)} values, expected {width}"
+            )
+    schema = pa.schema([(header, pa.string()) for header in raw.headers])
+    columns = {
+        header: [row[i] for row in raw.rows] for i, header in enumerate(raw.headers)
+    }
+    table = build_table(columns, schema)
+    return table
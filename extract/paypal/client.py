@@ -1,41 +1,123 @@
 """PayPal REST API client."""
 
+import threading
+import time
+
 import requests
+from pydantic import BaseModel, ConfigDict
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 PAYPAL_BASE_URL = "https://api-m.paypal.com"
+POOL_MAXSIZE = 8
+RETRY_TOTAL = 5
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+TIMEOUT_SECONDS = 60
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+
+
+class Token(BaseModel):
+    """An OAuth2 access token and the monotonic time it expires at."""
+
+    model_config = ConfigDict(frozen=True)
+
+    access_token: str
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        """Whether the token is expired or about to expire."""
+        return time.monotonic() >= self.expires_at - TOKEN_EXPIRY_MARGIN_SECONDS
+
+
+_tokens: dict[str, Token] = {}
+_tokens_lock = threading.Lock()
 
 
 class PayPalClient:
-    """Authenticated PayPal REST API client."""
+    """Authenticated PayPal REST API client.
+
+    Requests share one pooled keep-alive session. Connection errors, 429s
+    and 5xx responses are retried by the transport with exponential
+    backoff, honoring Retry-After. Access tokens are cached per client ID
+    for the life of the process, so the requests of a step, including
+    concurrent pages and backfill windows, reuse one token until it
+    expires or the API rejects it. Steps run in separate processes each
+    fetch their own.
+    """
 
     def __init__(self, client_id: str, client_secret: str) -> None:
-        """Initializes the client and fetches an access token."""
+        """Initializes the client and its pooled session."""
         self.base_url = PAYPAL_BASE_URL
-        self._access_token = self._fetch_token(client_id, client_secret)
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._session = _build_session()
+
+    def get(self, path: str, params: dict | None = None) -> dict:
+        """Makes an authenticated GET request to the PayPal API.
+
+        A 401 means the cached token was revoked or expired early, so it
+        is refreshed and the request is retried once.
+        """
+        response = self._get(path, params, self._token())
+        if response.status_code == requests.codes.unauthorized:
+            response = self._get(path, params, self._token(refresh=True))
+        response.raise_for_status()
+        return response.json()
 
-    def _fetch_token(self, client_id: str, client_secret: str) -> str:
+    def _get(self, path: str, params: dict | None, token: str) -> requests.Response:
+        """Sends one GET request with the given bearer token."""
+        return self._session.get(
+            f"{self.base_url}{path}",
+            headers={"Authorization": f"Bearer {token}"},
+            params=params or {},
+            timeout=TIMEOUT_SECONDS,
+        )
+
+    def _token(self, refresh: bool = False) -> str:
+        """Returns a cached access token, fetching one when needed."""
+        with _tokens_lock:
+            token = _tokens.get(self._client_id)
+            if refresh or token is None or token.expired:
+                token = self._fetch_token()
+                _tokens[self._client_id] = token
+            return token.access_token
+
+    def _fetch_token(self) -> Token:
         """Exchanges client credentials for an OAuth2 access token."""
-        response = requests.post(
+        response = self._session.post(
             f"{self.base_url}/v1/oauth2/token",
             headers={"Accept": "application/json"},
-            auth=(client_id, client_secret),
+            auth=(self._client_id, self._client_secret),
             data={"grant_type": "client_credentials"},
+            timeout=TIMEOUT_SECONDS,
         )
         response.raise_for_status()
         data = response.json()
-        return data["access_token"]
-
-    def get(self, path: str, params: dict | None = None) -> dict:
-        """Makes an authenticated GET request to the PayPal API."""
-        response = requests.get(
-            f"{self.base_url}{path}",
-            headers={"Authorization": f"Bearer {self._access_token}"},
-            params=params or {},
+        return Token(
+            access_token=data["access_token"],
+            expires_at=time.monotonic() + data["expires_in"],
         )
-        response.raise_for_status()
-        return response.json()
 
 
 def build_client(client_id: str, client_secret: str) -> PayPalClient:
     """Builds an authenticated PayPal REST API client."""
     return PayPalClient(client_id, client_secret)
+
+
+def _build_session() -> requests.Session:
+    """Builds a keep-alive session with a connection pool and retries."""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
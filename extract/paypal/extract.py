@@ -1,8 +1,11 @@
 """PayPal transaction data extractor."""
 
-from datetime import date
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from pydantic import (
     AliasChoices,
     BaseModel,
@@ -12,10 +15,14 @@ from pydantic import (
     field_validator,
 )
 
+from extract import cast
 from extract.paypal.client import PayPalClient
-from extract.table import to_table
+from extract.stream import BatchStream
+from extract.table import to_batch, to_table
 
 PAGE_SIZE = 500
+TRANSACTIONS_PATH = "/v1/reporting/transactions"
+MAX_WINDOW_DAYS = 31
 
 
 class Raw(BaseModel):
@@ -23,11 +30,11 @@ class Raw(BaseModel):
 
     model_config = ConfigDict(frozen=True)
 
-    transaction_id: str
-    transaction_date: str
-    transaction_amount: str
-    currency_code: str
-    transaction_status: str
+    transaction_id: str | None
+    transaction_date: str | None
+    transaction_amount: str | None
+    currency_code: str | None
+    transaction_status: str | None
     transaction_subject: str
     payer_email: str
     payer_name: str
@@ -74,43 +81,196 @@ class Record(BaseModel):
         return float(v)
 
 
-def extract(client: PayPalClient, start_date: date, end_date: date) -> pa.Table:
+RAW_SCHEMA = pa.schema(
+    [
+        ("transaction_id", pa.string()),
+        ("transaction_date", pa.string()),
+        ("transaction_amount", pa.string()),
+        ("currency_code", pa.string()),
+        ("transaction_status", pa.string()),
+        ("transaction_subject", pa.string()),
+        ("payer_email", pa.string()),
+        ("payer_name", pa.string()),
+        ("fee_amount", pa.string()),
+        ("net_amount", pa.string()),
+    ]
+)
+
+SCHEMA = pa.schema(
+    [
+        ("transaction_id", pa.string()),
+        ("transaction_date", pa.date32()),
+        ("gross_amount_usd", pa.float64()),
+        ("currency_code", pa.string()),
+        ("transaction_status", pa.string()),
+        ("transaction_subject", pa.string()),
+        ("payer_email", pa.string()),
+        ("payer_name", pa.string()),
+        ("fee_amount_usd", pa.float64()),
+        ("net_amount_usd", pa.float64()),
+    ]
+)
+
+
+def extract(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+) -> pa.Table:
     """Extracts PayPal transactions into a PyArrow table."""
-    raw_rows = fetch(client, start_date, end_date)
+    raw_rows = fetch(client, start_date, end_date, workers)
     records = [parse(r) for r in raw_rows]
-    table = to_table(records)
+    table = to_table(records, SCHEMA)
     return table
 
 
-def fetch(client: PayPalClient, start_date: date, end_date: date) -> list[Raw]:
-    """Fetches all transactions for the given date range from PayPal API."""
-    raw_rows: list[Raw] = []
-    page = 1
-
-    while True:
-        response = client.get(
-            "/v1/reporting/transactions",
-            params={
-                "start_date": f"{start_date.isoformat()}T00:00:00-0000",
-                "end_date": f"{end_date.isoformat()}T23:59:59-0000",
-                "fields": "all",
-                "page_size": PAGE_SIZE,
-                "page": page,
-            },
-        )
-        transactions = response.get("transaction_details", [])
-        raw_rows.extend(_parse_transaction(t) for t in transactions)
+def extract_batch(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+) -> tuple[pa.Table, pa.Table]:
+    """Extracts PayPal transactions using vectorized batch parsing.
 
-        total_pages = response.get("total_pages", 1)
-        if page >= total_pages:
-            break
-        page += 1
+    Returns the typed table and a side table of rejected raw rows.
+    """
+    raw_rows = fetch(client, start_date, end_date, workers)
+    raw = to_table(raw_rows, RAW_SCHEMA)
+    table, rejects = parse_batch(raw)
+    return table, rejects
 
+
+def extract_stream(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+) -> BatchStream:
+    """Extracts PayPal transactions as a lazily parsed stream of record batches."""
+    raw_batches = fetch_batches(client, start_date, end_date, workers)
+    stream = BatchStream(raw_batches, RAW_SCHEMA, parse_batch)
+    return stream
+
+
+def fetch(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+) -> list[Raw]:
+    """Fetches all transactions for the given date range from PayPal API.
+
+    Ranges longer than MAX_WINDOW_DAYS are requested as consecutive
+    windows of that length. With workers above one, pages after the
+    first are requested concurrently. See _pages().
+    """
+    pages = _pages(client, start_date, end_date, workers)
+    raw_rows = [r for page in pages for r in page]
     return raw_rows
 
 
+def fetch_batches(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+) -> Iterator[pa.RecordBatch]:
+    """Yields one raw record batch per page of PayPal transactions."""
+    for page in _pages(client, start_date, end_date, workers):
+        yield to_batch(page, RAW_SCHEMA)
+
+
+def _pages(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+) -> Iterator[list[Raw]]:
+    """Yields the transactions of each PayPal reporting page as Raw rows.
+
+    The range is walked one MAX_WINDOW_DAYS window at a time, the most
+    the API accepts per request.
+    """
+    for window_start, window_end in _date_windows(start_date, end_date):
+        yield from _window_pages(client, window_start, window_end, workers)
+
+
+def _window_pages(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    workers: int = 1,
+) -> Iterator[list[Raw]]:
+    """Yields the pages of one report window as Raw rows.
+
+    The first page is fetched alone for its total_pages. With a single
+    worker the rest follow one after another. Otherwise pages 2..N are
+    requested by up to workers threads and yielded in page order.
+    """
+    response = _get_page(client, start_date, end_date, 1)
+    yield _page_rows(response)
+    total_pages = response.get("total_pages", 1)
+
+    if workers <= 1:
+        for page in range(2, total_pages + 1):
+            response = _get_page(client, start_date, end_date, page)
+            yield _page_rows(response)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        responses = executor.map(
+            lambda page: _get_page(client, start_date, end_date, page),
+            range(2, total_pages + 1),
+        )
+        for response in responses:
+            yield _page_rows(response)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _date_windows(start_date: date, end_date: date) -> list[tuple[date, date]]:
+    """Splits an inclusive date range into windows of MAX_WINDOW_DAYS."""
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=MAX_WINDOW_DAYS - 1), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+
+def _get_page(
+    client: PayPalClient,
+    start_date: date,
+    end_date: date,
+    page: int,
+) -> dict:
+    """Requests one page of the transactions report."""
+    return client.get(
+        TRANSACTIONS_PATH,
+        params={
+            "start_date": f"{start_date.isoformat()}T00:00:00-0000",
+            "end_date": f"{end_date.isoformat()}T23:59:59-0000",
+            "fields": "all",
+            "page_size": PAGE_SIZE,
+            "page": page,
+        },
+    )
+
+
+def _page_rows(response: dict) -> list[Raw]:
+    """Parses the transactions of one report page into Raw rows."""
+    transactions = response.get("transaction_details", [])
+    return [_parse_transaction(t) for t in transactions]
+
+
 def _parse_transaction(transaction: dict) -> Raw:
-    """Converts a PayPal API transaction dict into a Raw instance."""
+    """Converts a PayPal API transaction dict into a Raw instance.
+
+    Missing required fields are left null for parse_batch to reject.
+    """
     info = transaction.get("transaction_info", {})
     payer = transaction.get("payer_info", {})
     amount = info.get("transaction_amount", {})
@@ -127,11 +287,11 @@ def _parse_transaction(transaction: dict) -> Raw:
         )
     )
     return Raw(
-        transaction_id=info.get("paypal_reference_id") or info["transaction_id"],
-        transaction_date=info["transaction_initiation_date"],
-        transaction_amount=amount["value"],
-        currency_code=amount["currency_code"],
-        transaction_status=info["transaction_status"],
+        transaction_id=info.get("paypal_reference_id") or info.get("transaction_id"),
+        transaction_date=info.get("transaction_initiation_date"),
+        transaction_amount=amount.get("value"),
+        currency_code=amount.get("currency_code"),
+        transaction_status=info.get("transaction_status"),
         transaction_subject=info.get("transaction_subject", ""),
         payer_email=payer.get("email_address", ""),
         payer_name=full_name,
@@ -146,3 +306,22 @@ def parse(raw: Raw) -> Record:
         return Record(**raw.model_dump())
     except ValidationError as exc:
         raise ValueError(f"Failed to parse PayPal transaction: {raw}") from exc
+
+
+def parse_batch(raw: pa.Table) -> tuple[pa.Table, pa.Table]:
+    """Casts a raw PayPal transaction table into typed columns and rejects."""
+    initiation_dates = pc.utf8_slice_codeunits(raw["transaction_date"], 0, 10)
+    columns = {
+        "transaction_id": raw["transaction_id"],
+        "transaction_date": cast.to_date(initiation_dates),
+        "gross_amount_usd": cast.to_float64(raw["transaction_amount"]),
+        "currency_code": raw["currency_code"],
+        "transaction_status": raw["transaction_status"],
+        "transaction_subject": raw["transaction_subject"],
+        "payer_email": raw["payer_email"],
+        "payer_name": raw["payer_name"],
+        "fee_amount_usd": cast.to_float64(raw["fee_amount"]),
+        "net_amount_usd": cast.to_float64(raw["net_amount"]),
+    }
+    table, rejects = cast.split_rejects(raw, columns, SCHEMA)
+    return table, rejects
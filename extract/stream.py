@@ -0,0 +1,119 @@
+"""Streaming extraction over one raw RecordBatch per API page."""
+
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import TypeVar
+
+import pyarrow as pa
+
+from extract.cast import REASON_COLUMN
+
+T = TypeVar("T")
+S = TypeVar("S")
+
+PUT_POLL_SECONDS = 0.1
+
+ParseBatch = Callable[[pa.Table], tuple[pa.Table, pa.Table]]
+
+
+class BatchStream:
+    """Lazily parses raw page batches and collects rejected rows on the side.
+
+    Iterating yields typed record batches one page at a time, so only the
+    current page is held in memory. Rejected rows are usually rare and
+    are kept until the stream is drained, then read from rejects.
+    """
+
+    def __init__(
+        self,
+        raw_batches: Iterable[pa.RecordBatch],
+        raw_schema: pa.Schema,
+        parse_batch: ParseBatch,
+    ) -> None:
+        """Wraps a raw batch iterable with the source's batch parser."""
+        self._raw_batches = raw_batches
+        self._rejects_schema = raw_schema.append(pa.field(REASON_COLUMN, pa.string()))
+        self._parse_batch = parse_batch
+        self._rejects: list[pa.Table] = []
+
+    def __iter__(self) -> Iterator[pa.RecordBatch]:
+        """Yields typed record batches, one or more per raw page."""
+        for raw_batch in self._raw_batches:
+            raw = pa.Table.from_batches([raw_batch])
+            table, rejects = self._parse_batch(raw)
+            if rejects.num_rows > 0:
+                self._rejects.append(rejects)
+            yield from table.to_batches()
+
+    @property
+    def rejects(self) -> pa.Table:
+        """Returns every row rejected so far as a single table."""
+        if not self._rejects:
+            return self._rejects_schema.empty_table()
+        rejects = pa.concat_tables(self._rejects)
+        return rejects
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Groups an iterable into lists of at most size items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def fan_out(
+    produce: Callable[[S], Iterable[T]],
+    sources: Sequence[S],
+    workers: int,
+    buffer: int,
+) -> Iterator[T]:
+    """Yields the items of every source as up to workers threads produce them.
+
+    Items are handed over on a queue of at most buffer items, so workers
+    wait for the consumer instead of running ahead of it. A worker error
+    is re-raised here, and an error or closing the iterator stops the
+    other workers before their next item.
+    """
+    items: queue.Queue = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+
+    def run(source: S) -> None:
+        try:
+            for item in produce(source):
+                if not _put(items, item, stop):
+                    return
+        except Exception as exc:
+            _put(items, exc, stop)
+        else:
+            _put(items, None, stop)
+
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(sources)))
+    try:
+        for source in sources:
+            executor.submit(run, source)
+        remaining = len(sources)
+        while remaining:
+            item = items.get()
+            if isinstance(item, Exception):
+                raise item
+            if item is None:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _put(items: queue.Queue, item: object, stop: threading.Event) -> bool:
+    """Puts an item on a bounded queue unless stop is set while it is full."""
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=PUT_POLL_SECONDS)
+        except queue.Full:
+            continue
+        return True
+    return False
@@ -1,8 +1,13 @@
 """Stripe charge data extractor."""
 
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, date, datetime
+from typing import Any
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from pydantic import (
     AliasChoices,
     BaseModel,
@@ -11,11 +16,19 @@ from pydantic import (
     ValidationError,
     field_validator,
 )
-from stripe import StripeClient
+from stripe import RateLimitError, StripeClient
 
-from extract.table import to_table
+from extract import cast
+from extract.stream import BatchStream, fan_out
+from extract.table import build_table, to_batch, to_table
 
 PAGE_SIZE = 100
+MAX_WORKERS = 4
+QUEUE_PAGES_PER_WORKER = 2
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_BACKOFF_SECONDS = 1.0
+CHARGE_EXPAND = ["data.balance_transaction"]
+CHARGE_EVENT_TYPE = "charge.*"
 
 
 class Raw(BaseModel):
@@ -23,18 +36,19 @@ class Raw(BaseModel):
 
     model_config = ConfigDict(frozen=True)
 
-    charge_id: str
-    created: int
-    amount: int
-    amount_captured: int
+    charge_id: str | None
+    created: int | None
+    amount: int | None
+    amount_captured: int | None
     fee: int
     net: int
-    currency: str
-    status: str
+    currency: str | None
+    status: str | None
     description: str
     customer_email: str
     customer_name: str
     payment_intent_id: str
+    balance_transaction_id: str = ""
 
 
 class Record(BaseModel):
@@ -91,39 +105,397 @@ class Record(BaseModel):
         return dollars
 
 
-def extract(client: StripeClient, start_date: date, end_date: date) -> pa.Table:
+RAW_SCHEMA = pa.schema(
+    [
+        ("charge_id", pa.string()),
+        ("created", pa.int64()),
+        ("amount", pa.int64()),
+        ("amount_captured", pa.int64()),
+        ("fee", pa.int64()),
+        ("net", pa.int64()),
+        ("currency", pa.string()),
+        ("status", pa.string()),
+        ("description", pa.string()),
+        ("customer_email", pa.string()),
+        ("customer_name", pa.string()),
+        ("payment_intent_id", pa.string()),
+        ("balance_transaction_id", pa.string()),
+    ]
+)
+
+BALANCE_TRANSACTION_SCHEMA = pa.schema(
+    [
+        ("balance_transaction_id", pa.string()),
+        ("fee", pa.int64()),
+        ("net", pa.int64()),
+    ]
+)
+
+SCHEMA = pa.schema(
+    [
+        ("charge_id", pa.string()),
+        ("charge_date", pa.date32()),
+        ("gross_amount_usd", pa.float64()),
+        ("amount_captured_usd", pa.float64()),
+        ("fee_usd", pa.float64()),
+        ("net_usd", pa.float64()),
+        ("currency", pa.string()),
+        ("status", pa.string()),
+        ("description", pa.string()),
+        ("customer_email", pa.string()),
+        ("customer_name", pa.string()),
+        ("payment_intent_id", pa.string()),
+    ]
+)
+
+
+def extract(
+    client: StripeClient,
+    start_date: date,
+    end_date: date,
+    windows: int = 1,
+    bulk_fees: bool = False,
+) -> pa.Table:
     """Extracts Stripe charges into a PyArrow table."""
-    raw_rows = fetch(client, start_date, end_date)
+    raw_rows = fetch(client, start_date, end_date, windows, bulk_fees)
     records = [parse(r) for r in raw_rows]
-    table = to_table(records)
+    table = to_table(records, SCHEMA)
     return table
 
 
-def fetch(client: StripeClient, start_date: date, end_date: date) -> list[Raw]:
-    """Fetches all charges for the given date range from Stripe API."""
-    raw_rows: list[Raw] = []
+def extract_batch(
+    client: StripeClient,
+    start_date: date,
+    end_date: date,
+    windows: int = 1,
+    bulk_fees: bool = False,
+) -> tuple[pa.Table, pa.Table]:
+    """Extracts Stripe charges using vectorized batch parsing.
+
+    Returns the typed table and a side table of rejected raw rows.
+    """
+    raw_rows = fetch(client, start_date, end_date, windows, bulk_fees)
+    raw = to_table(raw_rows, RAW_SCHEMA)
+    table, rejects = parse_batch(raw)
+    return table, rejects
+
+
+def extract_stream(
+    client: StripeClient,
+    start_date: date,
+    end_date: date,
+    windows: int = 1,
+    bulk_fees: bool = False,
+) -> BatchStream:
+    """Extracts Stripe charges as a lazily parsed stream of record batches."""
+    raw_batches = fetch_batches(client, start_date, end_date, windows, bulk_fees)
+    stream = BatchStream(raw_batches, RAW_SCHEMA, parse_batch)
+    return stream
+
+
+def extract_changed(
+    client: StripeClient,
+    since: int,
+) -> tuple[pa.Table, pa.Table, int]:
+    """Extracts the charges changed by events created after since.
+
+    Returns the typed table of changed charges, a side table of rejected
+    raw rows, and the watermark to pass as since on the next run.
+    """
+    raw_rows, watermark = fetch_changed(client, since)
+    raw = to_table(raw_rows, RAW_SCHEMA)
+    table, rejects = parse_batch(raw)
+    return table, rejects, watermark
+
+
+def fetch(
+    client: StripeClient,
+    start_date: date,
+    end_date: date,
+    windows: int = 1,
+    bulk_fees: bool = False,
+) -> list[Raw]:
+    """Fetches all charges for the given date range from Stripe API.
+
+    With windows above one, the created range is split into that many
+    sub-windows that are paginated concurrently. See _pages(). With
+    bulk_fees, fees come from a balance transactions join instead of
+    per-charge expansion. See fetch_batches().
+    """
+    if bulk_fees:
+        batches = fetch_batches(client, start_date, end_date, windows, bulk_fees)
+        table = pa.Table.from_batches(batches, schema=RAW_SCHEMA)
+        return [Raw(**row) for row in table.to_pylist()]
+    pages = _pages(client, start_date, end_date, windows)
+    raw_rows = [r for page in pages for r in page]
+    return raw_rows
+
+
+def fetch_batches(
+    client: StripeClient,
+    start_date: date,
+    end_date: date,
+    windows: int = 1,
+    bulk_fees: bool = False,
+) -> Iterator[pa.RecordBatch]:
+    """Yields one raw record batch per page of Stripe charges.
+
+    With bulk_fees, charges are listed without expanding their balance
+    transaction. The window's balance transactions are listed up front
+    instead and hash-joined to each page on balance_transaction_id to
+    fill fee and net.
+    """
+    pages = _pages(client, start_date, end_date, windows, expand=not bulk_fees)
+    if not bulk_fees:
+        for page in pages:
+            yield to_batch(page, RAW_SCHEMA)
+        return
+
+    fees = _balance_transactions(client, start_date, end_date, windows)
+    for page in pages:
+        batch, fees = _join_fees(client, to_batch(page, RAW_SCHEMA), fees)
+        yield batch
+
+
+def fetch_changed(client: StripeClient, since: int) -> tuple[list[Raw], int]:
+    """Refetches the charges touched by charge events created after since.
+
+    Every charge.* event since the watermark, including refunds and
+    disputes, marks its charge as changed. Each changed charge is then
+    retrieved once with its balance transaction expanded, so the rows
+    reflect the charge's current state rather than the event snapshot.
+
+    Returns the Raw rows and the created timestamp of the newest event,
+    or since itself when there were no events.
+    """
+    charge_ids, watermark = _changed_charge_ids(client, since)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        charges = executor.map(lambda c: _retrieve_charge(client, c), charge_ids)
+        raw_rows = [_to_raw(dict(charge)) for charge in charges]
+    return raw_rows, watermark
+
+
+def _changed_charge_ids(client: StripeClient, since: int) -> tuple[list[str], int]:
+    """Lists charge events after since and collects their charge IDs."""
+    params = {
+        "type": CHARGE_EVENT_TYPE,
+        "created": {"gt": since},
+        "limit": PAGE_SIZE,
+    }
+    charge_ids: dict[str, None] = {}
+    watermark = since
+    for events in _list_pages(client.events.list, params):
+        for event in events:
+            charge_id = _event_charge_id(event["data"]["object"])
+            if charge_id:
+                charge_ids[charge_id] = None
+            watermark = max(watermark, event["created"])
+    return list(charge_ids), watermark
+
+
+def _event_charge_id(event_object: dict) -> str | None:
+    """Returns the charge ID of a charge event's object.
+
+    charge.* events carry the charge itself, while charge.refund.* and
+    charge.dispute.* events carry a refund or dispute that references it.
+    """
+    if event_object.get("object") == "charge":
+        return event_object["id"]
+    return event_object.get("charge")
+
+
+def _retrieve_charge(client: StripeClient, charge_id: str) -> dict:
+    """Retrieves one charge with its balance transaction expanded."""
+    charge = _with_backoff(
+        client.charges.retrieve,
+        charge_id,
+        params={"expand": ["balance_transaction"]},
+    )
+    return charge
+
+
+def _pages(
+    client: StripeClient,
+    start_date: date,
+    end_date: date,
+    windows: int = 1,
+    expand: bool = True,
+) -> Iterator[list[Raw]]:
+    """Yields the charges of each Stripe list page as Raw rows.
+
+    A single window is walked serially with starting_after. Several
+    windows are paginated by up to MAX_WORKERS threads, at most
+    QUEUE_PAGES_PER_WORKER pages each ahead of the consumer, and their
+    pages are yielded as they arrive, de-duplicated on charge_id.
+    """
     start_ts = _date_to_timestamp(start_date)
     end_ts = _date_to_timestamp(end_date, end_of_day=True)
+    slices = _split_range(start_ts, end_ts, windows)
+    if len(slices) == 1:
+        yield from _window_pages(client, start_ts, end_ts, expand)
+        return
+
+    seen: set[str] = set()
+    pages = fan_out(
+        lambda window: _window_pages(client, *window, expand),
+        slices,
+        MAX_WORKERS,
+        MAX_WORKERS * QUEUE_PAGES_PER_WORKER,
+    )
+    for page in pages:
+        unique = []
+        for raw in page:
+            if raw.charge_id is None or raw.charge_id not in seen:
+                seen.add(raw.charge_id)
+                unique.append(raw)
+        yield unique
+
+
+def _split_range(start_ts: int, end_ts: int, windows: int) -> list[tuple[int, int]]:
+    """Splits an inclusive timestamp range into contiguous sub-windows."""
+    span = end_ts - start_ts + 1
+    count = max(1, min(windows, span))
+    edges = [start_ts + span * i // count for i in range(count + 1)]
+    slices = [(edges[i], edges[i + 1] - 1) for i in range(count)]
+    return slices
+
+
+def _window_pages(
+    client: StripeClient,
+    start_ts: int,
+    end_ts: int,
+    expand: bool = True,
+) -> Iterator[list[Raw]]:
+    """Walks one created window of charges page by page."""
+    params: dict = {
+        "created": {"gte": start_ts, "lte": end_ts},
+        "limit": PAGE_SIZE,
+    }
+    if expand:
+        params["expand"] = CHARGE_EXPAND
+    for charges in _list_pages(client.charges.list, params):
+        yield [_to_raw(dict(c)) for c in charges]
+
+
+def _list_pages(list_method: Callable, params: dict) -> Iterator[list]:
+    """Walks a Stripe list endpoint page by page with starting_after."""
     has_more = True
     starting_after = None
 
     while has_more:
-        params: dict = {
-            "created": {"gte": start_ts, "lte": end_ts},
-            "limit": PAGE_SIZE,
-            "expand": ["data.balance_transaction"],
-        }
+        page_params = dict(params)
         if starting_after:
-            params["starting_after"] = starting_after
+            page_params["starting_after"] = starting_after
 
-        response = client.charges.list(params=params)
-        charges = response.data
-        raw_rows.extend(_to_raw(dict(c)) for c in charges)
+        response = _with_backoff(list_method, params=page_params)
+        data = response.data
+        yield data
         has_more = response.has_more
-        if has_more and charges:
-            starting_after = charges[-1].id
+        if has_more and data:
+            starting_after = data[-1].id
+
+
+def _with_backoff(method: Callable, *args: object, **kwargs: object) -> Any:
+    """Calls a Stripe API method, backing off when rate limited.
+
+    Stripe answers 429 once the account's read limit is exceeded, which
+    concurrent windows make more likely. Each retry doubles the wait.
+    """
+    for attempt in range(RATE_LIMIT_RETRIES):
+        try:
+            return method(*args, **kwargs)
+        except RateLimitError:
+            time.sleep(RATE_LIMIT_BACKOFF_SECONDS * 2**attempt)
+    return method(*args, **kwargs)
 
-    return raw_rows
+
+def _balance_transactions(
+    client: StripeClient,
+    start_date: date,
+    end_date: date,
+    windows: int = 1,
+) -> pa.Table:
+    """Lists the balance transactions created in the date range.
+
+    Only the id, fee and net of each transaction are kept. Windows are
+    listed concurrently, as for charges.
+    """
+    start_ts = _date_to_timestamp(start_date)
+    end_ts = _date_to_timestamp(end_date, end_of_day=True)
+    slices = _split_range(start_ts, end_ts, windows)
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(slices))) as executor:
+        tables = list(
+            executor.map(lambda w: _window_balance_transactions(client, *w), slices)
+        )
+    fees = pa.concat_tables(tables)
+    return fees
+
+
+def _window_balance_transactions(
+    client: StripeClient,
+    start_ts: int,
+    end_ts: int,
+) -> pa.Table:
+    """Lists one created window of balance transactions as a table."""
+    params = {"created": {"gte": start_ts, "lte": end_ts}, "limit": PAGE_SIZE}
+    transactions = [
+        txn
+        for page in _list_pages(client.balance_transactions.list, params)
+        for txn in page
+    ]
+    fees = _to_fees_table(transactions)
+    return fees
+
+
+def _join_fees(
+    client: StripeClient,
+    batch: pa.RecordBatch,
+    fees: pa.Table,
+) -> tuple[pa.RecordBatch, pa.Table]:
+    """Fills a page's fee and net by joining it to balance transactions.
+
+    A charge captured after its window closes has a balance transaction
+    outside the bulk listing. Those few are retrieved one by one and
+    added to fees, which is returned for the next page. Charges without
+    a balance transaction keep a fee and net of zero, as with expansion.
+    """
+    ids = batch["balance_transaction_id"]
+    known = pc.is_in(ids, value_set=fees["balance_transaction_id"])
+    missing = pc.filter(ids, pc.and_(pc.not_equal(ids, ""), pc.invert(known)))
+    if len(missing) > 0:
+        retrieved = [
+            _with_backoff(client.balance_transactions.retrieve, txn_id)
+            for txn_id in pc.unique(missing).to_pylist()
+        ]
+        fees = pa.concat_tables([fees, _to_fees_table(retrieved)])
+
+    charges = pa.Table.from_batches([batch]).drop_columns(["fee", "net"])
+    charges = charges.append_column("row", pa.arange(0, batch.num_rows))
+    joined = charges.join(
+        fees,
+        keys="balance_transaction_id",
+        join_type="left outer",
+        use_threads=False,
+    ).sort_by("row")
+    columns = {name: joined[name] for name in RAW_SCHEMA.names}
+    columns["fee"] = pc.fill_null(joined["fee"], 0)
+    columns["net"] = pc.fill_null(joined["net"], 0)
+    joined_batch = pa.RecordBatch.from_arrays(
+        [columns[name].combine_chunks() for name in RAW_SCHEMA.names],
+        schema=RAW_SCHEMA,
+    )
+    return joined_batch, fees
+
+
+def _to_fees_table(transactions: list) -> pa.Table:
+    """Reads the id, fee and net of balance transactions into a table."""
+    columns = {
+        "balance_transaction_id": [t.id for t in transactions],
+        "fee": [t.fee for t in transactions],
+        "net": [t.net for t in transactions],
+    }
+    fees = build_table(columns, BALANCE_TRANSACTION_SCHEMA)
+    return fees
 
 
 def _date_to_timestamp(d: date, end_of_day: bool = False) -> int:
@@ -136,24 +508,28 @@ def _date_to_timestamp(d: date, end_of_day: bool = False) -> int:
 
 
 def _to_raw(charge: dict) -> Raw:
-    """Converts a Stripe charge dict into a Raw instance."""
-    billing = charge["billing_details"]
+    """Converts a Stripe charge dict into a Raw instance.
+
+    Missing required fields are left null for parse_batch to reject.
+    """
+    billing = charge.get("billing_details") or {}
     balance_txn = charge.get("balance_transaction") or {}
-    fee = balance_txn.get("fee", 0) if isinstance(balance_txn, dict) else 0
-    net = balance_txn.get("net", 0) if isinstance(balance_txn, dict) else 0
+    if isinstance(balance_txn, str):
+        balance_txn = {"id": balance_txn}
     return Raw(
-        charge_id=charge["id"],
-        created=charge["created"],
-        amount=charge["amount"],
-        amount_captured=charge["amount_captured"],
-        fee=fee,
-        net=net,
-        currency=charge["currency"],
-        status=charge["status"],
+        charge_id=charge.get("id"),
+        created=charge.get("created"),
+        amount=charge.get("amount"),
+        amount_captured=charge.get("amount_captured"),
+        fee=balance_txn.get("fee", 0),
+        net=balance_txn.get("net", 0),
+        currency=charge.get("currency"),
+        status=charge.get("status"),
         description=charge.get("description") or "",
         customer_email=billing.get("email") or charge.get("receipt_email") or "",
         customer_name=billing.get("name") or "",
         payment_intent_id=charge.get("payment_intent") or "",
+        balance_transaction_id=balance_txn.get("id") or "",
     )
 
 
@@ -163,3 +539,23 @@ def parse(raw: Raw) -> Record:
         return Record(**raw.model_dump())
     except ValidationError as exc:
         raise ValueError(f"Failed to parse Stripe charge: {raw}") from exc
+
+
+def parse_batch(raw: pa.Table) -> tuple[pa.Table, pa.Table]:
+    """Casts a raw Stripe charge table into typed columns and rejects."""
+    columns = {
+        "charge_id": raw["charge_id"],
+        "charge_date": cast.timestamp_to_date(raw["created"]),
+        "gross_amount_usd": cast.cents_to_dollars(raw["amount"]),
+        "amount_captured_usd": cast.cents_to_dollars(raw["amount_captured"]),
+        "fee_usd": cast.cents_to_dollars(raw["fee"]),
+        "net_usd": cast.cents_to_dollars(raw["net"]),
+        "currency": raw["currency"],
+        "status": raw["status"],
+        "description": raw["description"],
+        "customer_email": raw["customer_email"],
+        "customer_name": raw["customer_name"],
+        "payment_intent_id": raw["payment_intent_id"],
+    }
+    table, rejects = cast.split_rejects(raw, columns, SCHEMA)
+    return table, rejects
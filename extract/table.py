@@ -1,15 +1,78 @@
-"""Shared conversion from Pydantic records to PyArrow tables."""
+"""Shared schema-first conversion to PyArrow tables."""
 
-from collections.abc import Sequence
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from pydantic import BaseModel
 
 
-def to_table(records: Sequence[BaseModel]) -> pa.Table:
-    """Converts a list of Pydantic records into a PyArrow table."""
-    if not records:
-        return pa.Table.from_pylist([])
-    rows = [r.model_dump(mode="json") for r in records]
-    table = pa.Table.from_pylist(rows)
+def to_table(records: Sequence[BaseModel], schema: pa.Schema) -> pa.Table:
+    """Converts a list of Pydantic records into a typed PyArrow table.
+
+    Each schema field is read straight off the record attributes, so
+    dates and numbers keep their Python types instead of round-tripping
+    through JSON strings.
+    """
+    columns = _to_columns(records, schema)
+    table = build_table(columns, schema)
+    return table
+
+
+def to_batch(records: Sequence[BaseModel], schema: pa.Schema) -> pa.RecordBatch:
+    """Converts a list of Pydantic records into a typed PyArrow record batch."""
+    columns = _to_columns(records, schema)
+    batch = build_batch(columns, schema)
+    return batch
+
+
+def build_table(columns: Mapping[str, Sequence], schema: pa.Schema) -> pa.Table:
+    """Builds a PyArrow table column by column from an explicit schema.
+
+    Every array is created with its declared Arrow type, so no type
+    inference happens and the output schema is stable across runs,
+    including empty ones.
+    """
+    arrays = _to_arrays(columns, schema)
+    table = pa.Table.from_arrays(arrays, schema=schema)
     return table
+
+
+def build_batch(columns: Mapping[str, Sequence], schema: pa.Schema) -> pa.RecordBatch:
+    """Builds a PyArrow record batch column by column from an explicit schema."""
+    arrays = _to_arrays(columns, schema)
+    batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+    return batch
+
+
+def split_by(table: pa.Table, column: str) -> Iterator[tuple[Any, pa.Table]]:
+    """Splits a table into one slice per distinct value of a column.
+
+    The table is sorted on the column once and the run ends of the
+    sorted column mark each value's slice, so no filter pass is made per
+    value. Values are yielded in ascending order. The column must not
+    contain nulls.
+    """
+    if table.num_rows == 0:
+        return
+    table = table.sort_by(column)
+    runs = pc.run_end_encode(table[column].combine_chunks())
+    start = 0
+    for value, end in zip(
+        runs.values.to_pylist(), runs.run_ends.to_pylist(), strict=True
+    ):
+        yield value, table.slice(start, end - start)
+        start = end
+
+
+def _to_columns(records: Sequence[BaseModel], schema: pa.Schema) -> dict[str, list]:
+    """Reads each schema field off the records into a column list."""
+    columns = {name: [getattr(r, name) for r in records] for name in schema.names}
+    return columns
+
+
+def _to_arrays(columns: Mapping[str, Sequence], schema: pa.Schema) -> list[pa.Array]:
+    """Creates one typed Arrow array per schema field."""
+    arrays = [pa.array(columns[field.name], type=field.type) for field in schema]
+    return arrays
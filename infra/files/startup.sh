@@ -39,7 +39,7 @@ STRIPE_SECRET_KEY=$(gcloud secrets versions access latest --secret=stripe-secret
 PAYPAL_CLIENT_ID=$(gcloud secrets versions access latest --secret=paypal-client-id --project=$${PROJECT_ID})
 PAYPAL_CLIENT_SECRET=$(gcloud secrets versions access latest --secret=paypal-client-secret --project=$${PROJECT_ID})
 FACEBOOK_ADS_ACCESS_TOKEN=$(gcloud secrets versions access latest --secret=facebook-ads-access-token --project=$${PROJECT_ID})
-FACEBOOK_ADS_ACCOUNT_ID=$(gcloud secrets versions access latest --secret=facebook-ads-account-id --project=$${PROJECT_ID})
+FACEBOOK_ADS_ACCOUNT_IDS=$(gcloud secrets versions access latest --secret=facebook-ads-account-ids --project=$${PROJECT_ID})
 GOOGLE_ADS_CUSTOMER_ID=$(gcloud secrets versions access latest --secret=google-ads-customer-id --project=$${PROJECT_ID})
 GOOGLE_ANALYTICS_PROPERTY_ID=$(gcloud secrets versions access latest --secret=google-analytics-property-id --project=$${PROJECT_ID})
 GOOGLE_SHEETS_SPREADSHEET_ID=$(gcloud secrets versions access latest --secret=google-sheets-spreadsheet-id --project=$${PROJECT_ID})
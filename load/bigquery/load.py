@@ -1,5 +1,8 @@
 """BigQuery partition loader."""
 
+import uuid
+
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 
 from load.config import BigQueryConfig
@@ -18,6 +21,103 @@ def load(
     Returns the number of rows loaded.
     """
     job_config = _build_job_config(config)
+    rows_loaded = _run_load(gcs_uri, config, client, job_config)
+    return rows_loaded
+
+
+def append(
+    gcs_uri: str,
+    config: BigQueryConfig,
+    client: bigquery.Client,
+) -> int:
+    """Appends a GCS parquet file to a BigQuery date partition.
+
+    Unlike load(), rows already in the partition are kept, so repeated
+    loads for the same date add up. Used for change logs, whose rows are
+    never rewritten.
+
+    Returns the number of rows appended.
+    """
+    job_config = _build_job_config(config, bigquery.WriteDisposition.WRITE_APPEND)
+    rows_appended = _run_load(gcs_uri, config, client, job_config)
+    return rows_appended
+
+
+def merge(
+    gcs_uri: str,
+    config: BigQueryConfig,
+    client: bigquery.Client,
+    key: str,
+) -> int:
+    """Upserts a GCS parquet file into a BigQuery date partition on key.
+
+    The file is loaded into a staging table, then MERGEd into the target
+    partition: rows whose key already exists are updated in place and new
+    keys are inserted. Other rows in the partition are left untouched,
+    unlike load(). The staging table is dropped afterwards.
+
+    Returns the number of rows updated or inserted.
+    """
+    staging_ref = _build_staging_ref(config)
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        autodetect=False,
+    )
+    try:
+        client.load_table_from_uri(gcs_uri, staging_ref, job_config=job_config).result()
+        columns = [field.name for field in client.get_table(staging_ref).schema]
+        query = _build_merge_query(config, staging_ref, key, columns)
+        query_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter(
+                    "partition_date", "DATE", config.partition_date
+                )
+            ]
+        )
+        job = client.query(query, job_config=query_config)
+        job.result()
+    finally:
+        client.delete_table(staging_ref, not_found_ok=True)
+
+    rows_merged = job.num_dml_affected_rows
+    if rows_merged is None:
+        raise ValueError(
+            f"BigQuery MERGE reported no row count for "
+            f"{config.project}.{config.dataset}.{config.table}"
+        )
+    return rows_merged
+
+
+def repartition(config: BigQueryConfig, client: bigquery.Client) -> bool:
+    """Recreates a table partitioned on config.partition_field, if it is not.
+
+    Existing rows get the new field from the date of the partition they
+    were in. A missing or already repartitioned table is left alone.
+    Returns whether the table was recreated.
+    """
+    target = f"{config.project}.{config.dataset}.{config.table}"
+    try:
+        table = client.get_table(target)
+    except NotFound:
+        return False
+    partitioning = table.time_partitioning
+    if partitioning is None or partitioning.field is None:
+        raise ValueError(f"{target} is not partitioned on a column")
+    if partitioning.field == config.partition_field:
+        return False
+    query = _build_repartition_query(config, partitioning.field)
+    client.query(query).result()
+    return True
+
+
+def _run_load(
+    gcs_uri: str,
+    config: BigQueryConfig,
+    client: bigquery.Client,
+    job_config: bigquery.LoadJobConfig,
+) -> int:
+    """Runs a load job into the configured partition and returns its row count."""
     partition_ref = _build_partition_ref(config)
     job = client.load_table_from_uri(gcs_uri, partition_ref, job_config=job_config)
     job.result()
@@ -30,16 +130,25 @@ def load(
     return rows_loaded
 
 
-def _build_job_config(config: BigQueryConfig) -> bigquery.LoadJobConfig:
-    """Builds a BigQuery LoadJobConfig for a partitioned parquet load."""
+def _build_job_config(
+    config: BigQueryConfig,
+    write_disposition: str = bigquery.WriteDisposition.WRITE_TRUNCATE,
+) -> bigquery.LoadJobConfig:
+    """Builds a BigQuery LoadJobConfig for a partitioned parquet load.
+
+    New nullable columns are added to the table schema, so an extractor
+    can gain a column without a manual migration. Older partitions read
+    them as null.
+    """
     job_config = bigquery.LoadJobConfig(
         source_format=bigquery.SourceFormat.PARQUET,
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        write_disposition=write_disposition,
         time_partitioning=bigquery.TimePartitioning(
             type_=bigquery.TimePartitioningType.DAY,
             field=config.partition_field,
         ),
         clustering_fields=config.cluster_fields or None,
+        schema_update_options=[bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
         autodetect=False,
     )
     return job_config
@@ -56,3 +165,58 @@ def _build_partition_ref(config: BigQueryConfig) -> str:
     date_str = config.partition_date.strftime("%Y%m%d")
     partition_ref = f"{config.project}.{config.dataset}.{config.table}${date_str}"
     return partition_ref
+
+
+def _build_staging_ref(config: BigQueryConfig) -> str:
+    """Builds a unique staging table reference next to the target table."""
+    date_str = config.partition_date.strftime("%Y%m%d")
+    suffix = uuid.uuid4().hex[:8]
+    staging_ref = (
+        f"{config.project}.{config.dataset}.{config.table}__merge_{date_str}_{suffix}"
+    )
+    return staging_ref
+
+
+def _build_merge_query(
+    config: BigQueryConfig,
+    staging_ref: str,
+    key: str,
+    columns: list[str],
+) -> str:
+    """Builds a MERGE of a staging table into one target date partition.
+
+    Matching on the partition field as well as the key lets BigQuery
+    prune the scan of the target table to that single partition. Only
+    the staging columns are written, so the target may have more, such
+    as loaded_at or fields added by later loads, which stay null on
+    insert and untouched on update.
+    """
+    target = f"{config.project}.{config.dataset}.{config.table}"
+    updates = ", ".join(f"{c} = source.{c}" for c in columns)
+    names = ", ".join(columns)
+    values = ", ".join(f"source.{c}" for c in columns)
+    query = (
+        f"MERGE `{target}` AS target\n"
+        f"USING `{staging_ref}` AS source\n"
+        f"ON target.{key} = source.{key}\n"
+        f"  AND target.{config.partition_field} = @partition_date\n"
+        f"WHEN MATCHED THEN UPDATE SET {updates}\n"
+        f"WHEN NOT MATCHED THEN INSERT ({names}) VALUES ({values})"
+    )
+    return query
+
+
+def _build_repartition_query(config: BigQueryConfig, old_field: str) -> str:
+    """Builds DDL that recreates a table partitioned on config.partition_field."""
+    target = f"{config.project}.{config.dataset}.{config.table}"
+    cluster = ""
+    if config.cluster_fields:
+        cluster = f"CLUSTER BY {', '.join(config.cluster_fields)}\n"
+    query = (
+        f"CREATE OR REPLACE TABLE `{target}`\n"
+        f"PARTITION BY {config.partition_field}\n"
+        f"{cluster}"
+        f"AS SELECT *, DATE({old_field}) AS {config.partition_field}\n"
+        f"FROM `{target}`"
+    )
+    return query
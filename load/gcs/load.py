@@ -1,13 +1,20 @@
 """GCS parquet loader."""
 
 import io
+import itertools
+from collections.abc import Iterable
 
 import pyarrow as pa
 import pyarrow.parquet as pq
+from google.api_core.exceptions import NotFound
 from google.cloud import storage
 
 from load.config import GCSConfig
-from load.gcs.partition import build_gcs_blob_path
+from load.gcs.partition import build_gcs_blob_path, build_state_blob_path
+
+CONTENT_TYPE = "application/octet-stream"
+ROW_GROUP_SIZE = 50_000
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
 
 
 def load(
@@ -29,6 +36,62 @@ def load(
     return gcs_uri
 
 
+def load_stream(
+    batches: Iterable[pa.RecordBatch],
+    config: GCSConfig,
+    client: storage.Client,
+) -> tuple[str, int]:
+    """Streams record batches to GCS as a single parquet file.
+
+    Batches are buffered into row groups of ROW_GROUP_SIZE rows and
+    uploaded in resumable chunks, so peak memory is bounded by one row
+    group rather than the whole extract. Nothing is uploaded when the
+    stream yields no rows.
+
+    Returns the full GCS URI of the blob and the number of rows written.
+    """
+    blob_path = build_gcs_blob_path(
+        config.source,
+        config.partition_date,
+        config.run_id,
+    )
+    blob = client.bucket(config.bucket).blob(blob_path)
+    rows_written = _write_stream(batches, blob)
+    gcs_uri = f"gs://{config.bucket}/{blob_path}"
+    return gcs_uri, rows_written
+
+
+def load_state(
+    table: pa.Table,
+    bucket_name: str,
+    source: str,
+    client: storage.Client,
+) -> str:
+    """Overwrites a source's change capture state with a new table.
+
+    The state lives at one fixed path per source, outside the date
+    partitions, so only the latest state is kept. Returns its GCS URI.
+    """
+    blob_path = build_state_blob_path(source)
+    gcs_uri = _upload(client, bucket_name, blob_path, _serialize(table))
+    return gcs_uri
+
+
+def read_state(
+    bucket_name: str,
+    source: str,
+    client: storage.Client,
+) -> pa.Table | None:
+    """Reads a source's change capture state, or None if none was saved."""
+    blob = client.bucket(bucket_name).blob(build_state_blob_path(source))
+    try:
+        data = blob.download_as_bytes()
+    except NotFound:
+        return None
+    table = pq.read_table(io.BytesIO(data))
+    return table
+
+
 def _serialize(table: pa.Table) -> bytes:
     """Serializes a PyArrow table to parquet bytes."""
     buffer = io.BytesIO()
@@ -46,6 +109,42 @@ def _upload(
     """Uploads bytes to GCS and returns the GCS URI."""
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(blob_path)
-    blob.upload_from_string(data, content_type="application/octet-stream")
+    blob.upload_from_string(data, content_type=CONTENT_TYPE)
     gcs_uri = f"gs://{bucket_name}/{blob_path}"
     return gcs_uri
+
+
+def _write_stream(batches: Iterable[pa.RecordBatch], blob: storage.Blob) -> int:
+    """Writes non-empty batches to a blob as snappy parquet row groups.
+
+    The blob is only opened once the first row arrives, and its schema
+    is taken from that batch.
+    """
+    non_empty = (b for b in batches if b.num_rows > 0)
+    first = next(non_empty, None)
+    if first is None:
+        return 0
+
+    rows_written = 0
+    buffer: list[pa.RecordBatch] = []
+    buffered = 0
+    with (
+        blob.open(
+            "wb",
+            content_type=CONTENT_TYPE,
+            chunk_size=UPLOAD_CHUNK_SIZE,
+            ignore_flush=True,
+        ) as sink,
+        pq.ParquetWriter(sink, first.schema, compression="snappy") as writer,
+    ):
+        for batch in itertools.chain([first], non_empty):
+            buffer.append(batch)
+            buffered += batch.num_rows
+            if buffered >= ROW_GROUP_SIZE:
+                writer.write_table(pa.Table.from_batches(buffer))
+                rows_written += buffered
+                buffer, buffered = [], 0
+        if buffer:
+            writer.write_table(pa.Table.from_batches(buffer))
+            rows_written += buffered
+    return rows_written
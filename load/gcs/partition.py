@@ -9,3 +9,9 @@ def build_gcs_blob_path(source: str, partition_date: date, run_id: str) -> str:
     filename = f"{source}-{run_id}.parquet"
     blob_path = f"{source}/date={date_str}/{filename}"
     return blob_path
+
+
+def build_state_blob_path(source: str) -> str:
+    """Builds the fixed GCS blob path of a source's change capture state."""
+    blob_path = f"{source}/_state/{source}-state.parquet"
+    return blob_path
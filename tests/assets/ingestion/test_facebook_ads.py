@@ -7,13 +7,19 @@ import pyarrow as pa
 import pytest
 from dagster import DailyPartitionsDefinition, materialize
 
-from assets.ingestion.facebook_ads import TABLE, facebook_ads_raw
+from assets.ingestion.facebook_ads import (
+    ACTION_COLUMNS,
+    ASYNC_REPORT,
+    TABLE,
+    facebook_ads_raw,
+)
 from assets.ingestion.resources import (
     FacebookAdsResource,
     IngestionConfig,
     bigquery_resource,
     gcs_resource,
 )
+from extract.stream import BatchStream
 
 ingestion_config = IngestionConfig(project="fake-project", bucket="my-bucket")
 
@@ -24,7 +30,12 @@ FAKE_ACCESS_TOKEN = "fake-access-token"
 FAKE_AD_ACCOUNT_ID = "act_123456789"
 FAKE_PROJECT = "fake-project"
 FAKE_BUCKET = "my-bucket"
-EXPECTED_METADATA_KEYS = {"rows_loaded", "gcs_uri", "partition_date"}
+EXPECTED_METADATA_KEYS = {
+    "rows_loaded",
+    "rows_rejected",
+    "gcs_uri",
+    "partition_date",
+}
 
 SAMPLE_TABLE = pa.table(
     {
@@ -41,6 +52,12 @@ SAMPLE_TABLE = pa.table(
         "conversions": [1],
     }
 )
+EXTRACT_STREAM = BatchStream(
+    SAMPLE_TABLE.to_batches(),
+    SAMPLE_TABLE.schema,
+    lambda raw: (raw, raw.slice(0, 0)),
+)
+STREAM_RESULT = (FAKE_GCS_URI, SAMPLE_TABLE.num_rows)
 
 
 @pytest.fixture
@@ -55,7 +72,7 @@ def facebook_ads_resource():
     """FacebookAdsResource with fake credentials."""
     return FacebookAdsResource(
         access_token=FAKE_ACCESS_TOKEN,
-        ad_account_id=FAKE_AD_ACCOUNT_ID,
+        ad_account_ids=FAKE_AD_ACCOUNT_ID,
     )
 
 
@@ -76,14 +93,14 @@ def test_asset_name():
 
 def test_materialize_gcs_source_is_table_name(env_vars, facebook_ads_resource):
     """GCS load is called with source equal to TABLE constant."""
-    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_gcs_load = MagicMock(return_value=STREAM_RESULT)
 
     with (
         patch(
-            "assets.ingestion.facebook_ads.fb_extract.extract",
-            return_value=SAMPLE_TABLE,
+            "assets.ingestion.facebook_ads.fb_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
         ),
-        patch("assets.ingestion.facebook_ads.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.facebook_ads.gcs_load.load_stream", mock_gcs_load),
         patch(
             "assets.ingestion.facebook_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -113,10 +130,13 @@ def test_materialize_output_metadata_keys(env_vars, facebook_ads_resource):
     """Output metadata contains all expected keys."""
     with (
         patch(
-            "assets.ingestion.facebook_ads.fb_extract.extract",
-            return_value=SAMPLE_TABLE,
+            "assets.ingestion.facebook_ads.fb_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.facebook_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
-        patch("assets.ingestion.facebook_ads.gcs_load.load", return_value=FAKE_GCS_URI),
         patch(
             "assets.ingestion.facebook_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -145,11 +165,14 @@ def test_materialize_output_metadata_keys(env_vars, facebook_ads_resource):
 
 def test_materialize_passes_date_range_to_extract(env_vars, facebook_ads_resource):
     """extract() is called with start and end date equal to partition date."""
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+    mock_extract = MagicMock(return_value=EXTRACT_STREAM)
 
     with (
-        patch("assets.ingestion.facebook_ads.fb_extract.extract", mock_extract),
-        patch("assets.ingestion.facebook_ads.gcs_load.load", return_value=FAKE_GCS_URI),
+        patch("assets.ingestion.facebook_ads.fb_extract.extract_stream", mock_extract),
+        patch(
+            "assets.ingestion.facebook_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
+        ),
         patch(
             "assets.ingestion.facebook_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -174,16 +197,21 @@ def test_materialize_passes_date_range_to_extract(env_vars, facebook_ads_resourc
     args = mock_extract.call_args[0]
     assert args[1] == date.fromisoformat(PARTITION_KEY)
     assert args[2] == date.fromisoformat(PARTITION_KEY)
+    assert mock_extract.call_args.kwargs["async_report"] == ASYNC_REPORT
+    assert mock_extract.call_args.kwargs["action_columns"] == ACTION_COLUMNS
 
 
 def test_materialize_succeeds(env_vars, facebook_ads_resource):
     """Asset materializes without error using mocked dependencies."""
     with (
         patch(
-            "assets.ingestion.facebook_ads.fb_extract.extract",
-            return_value=SAMPLE_TABLE,
+            "assets.ingestion.facebook_ads.fb_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.facebook_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
-        patch("assets.ingestion.facebook_ads.gcs_load.load", return_value=FAKE_GCS_URI),
         patch(
             "assets.ingestion.facebook_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -1,18 +1,34 @@
 """Tests for Google Ads ingestion asset."""
 
+from datetime import date
 from unittest.mock import MagicMock, patch
 
 import pyarrow as pa
 import pytest
-from dagster import DailyPartitionsDefinition, materialize
+from dagster import (
+    BackfillPolicy,
+    DagsterInstance,
+    DailyPartitionsDefinition,
+    materialize,
+)
 
-from assets.ingestion.google_ads import QUERY, TABLE, google_ads_raw
+from assets.ingestion.google_ads import (
+    CUSTOMER_CACHE_SECONDS,
+    MAX_BACKFILL_DAYS,
+    PARTITION_FIELD,
+    QUERY,
+    SEARCH_STREAM,
+    TABLE,
+    WORKERS,
+    google_ads_raw,
+)
 from assets.ingestion.resources import (
     GoogleAdsResource,
     IngestionConfig,
     bigquery_resource,
     gcs_resource,
 )
+from extract.stream import BatchStream
 
 ingestion_config = IngestionConfig(project="fake-project", bucket="my-bucket")
 
@@ -21,9 +37,16 @@ FAKE_GCS_URI = "gs://my-bucket/google_ads/date=2024-01-15/google_ads-run-id.parq
 FAKE_ROWS_LOADED = 50
 FAKE_CREDENTIALS_PATH = "/tmp/ads-creds.json"
 FAKE_CUSTOMER_ID = "1234567890"
+CUSTOMER_IDS = ["1111111111", "2222222222"]
 FAKE_PROJECT = "fake-project"
+LISTED_AT = 1705300000.0
 FAKE_BUCKET = "my-bucket"
-EXPECTED_METADATA_KEYS = {"rows_loaded", "gcs_uri", "partition_date"}
+EXPECTED_METADATA_KEYS = {
+    "rows_loaded",
+    "rows_rejected",
+    "gcs_uri",
+    "partition_date",
+}
 
 SAMPLE_TABLE = pa.table(
     {
@@ -35,6 +58,25 @@ SAMPLE_TABLE = pa.table(
         "customer_id": [FAKE_CUSTOMER_ID],
     }
 )
+EXTRACT_STREAM = BatchStream(
+    SAMPLE_TABLE.to_batches(),
+    SAMPLE_TABLE.schema,
+    lambda raw: (raw, raw.slice(0, 0)),
+)
+STREAM_RESULT = (FAKE_GCS_URI, SAMPLE_TABLE.num_rows)
+RANGE_START = "2024-01-14"
+RANGE_END = "2024-01-16"
+RANGE_TAGS = {
+    "dagster/asset_partition_range_start": RANGE_START,
+    "dagster/asset_partition_range_end": RANGE_END,
+}
+RANGE_TABLE = pa.table(
+    {
+        "date": [date(2024, 1, 16), date(2024, 1, 14), date(2024, 1, 16)],
+        "clicks": [1, 2, 3],
+        "customer_id": CUSTOMER_IDS + CUSTOMER_IDS[:1],
+    }
+)
 
 
 @pytest.fixture
@@ -70,13 +112,14 @@ def test_asset_name():
 
 def test_materialize_gcs_source_is_table_name(env_vars, google_ads_resource):
     """GCS load is called with source equal to TABLE constant."""
-    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_gcs_load = MagicMock(return_value=STREAM_RESULT)
 
     with (
         patch(
-            "assets.ingestion.google_ads.ads_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.google_ads.ads_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
         ),
-        patch("assets.ingestion.google_ads.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.google_ads.gcs_load.load_stream", mock_gcs_load),
         patch(
             "assets.ingestion.google_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -86,6 +129,10 @@ def test_materialize_gcs_source_is_table_name(env_vars, google_ads_resource):
             "assets.ingestion.resources.GoogleAdsResource.get_client",
             return_value=MagicMock(),
         ),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_customer_ids",
+            return_value=CUSTOMER_IDS,
+        ),
     ):
         materialize(
             [google_ads_raw],
@@ -106,9 +153,13 @@ def test_materialize_output_metadata_keys(env_vars, google_ads_resource):
     """Output metadata contains all expected keys."""
     with (
         patch(
-            "assets.ingestion.google_ads.ads_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.google_ads.ads_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.google_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
-        patch("assets.ingestion.google_ads.gcs_load.load", return_value=FAKE_GCS_URI),
         patch(
             "assets.ingestion.google_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -118,6 +169,10 @@ def test_materialize_output_metadata_keys(env_vars, google_ads_resource):
             "assets.ingestion.resources.GoogleAdsResource.get_client",
             return_value=MagicMock(),
         ),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_customer_ids",
+            return_value=CUSTOMER_IDS,
+        ),
     ):
         result = materialize(
             [google_ads_raw],
@@ -135,13 +190,16 @@ def test_materialize_output_metadata_keys(env_vars, google_ads_resource):
     assert EXPECTED_METADATA_KEYS.issubset(metadata_keys)
 
 
-def test_materialize_passes_customer_id_to_extract(env_vars, google_ads_resource):
-    """extract() is called with customer_id from the resource."""
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+def test_materialize_passes_customer_ids_to_extract(env_vars, google_ads_resource):
+    """extract() is called with the client accounts under customer_id."""
+    mock_extract = MagicMock(return_value=EXTRACT_STREAM)
 
     with (
-        patch("assets.ingestion.google_ads.ads_extract.extract", mock_extract),
-        patch("assets.ingestion.google_ads.gcs_load.load", return_value=FAKE_GCS_URI),
+        patch("assets.ingestion.google_ads.ads_extract.extract_stream", mock_extract),
+        patch(
+            "assets.ingestion.google_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
+        ),
         patch(
             "assets.ingestion.google_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -151,6 +209,10 @@ def test_materialize_passes_customer_id_to_extract(env_vars, google_ads_resource
             "assets.ingestion.resources.GoogleAdsResource.get_client",
             return_value=MagicMock(),
         ),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_customer_ids",
+            return_value=CUSTOMER_IDS,
+        ),
     ):
         materialize(
             [google_ads_raw],
@@ -163,16 +225,20 @@ def test_materialize_passes_customer_id_to_extract(env_vars, google_ads_resource
             },
         )
 
-    assert mock_extract.call_args[0][1] == FAKE_CUSTOMER_ID
+    assert mock_extract.call_args[0][1] == CUSTOMER_IDS
+    assert mock_extract.call_args.kwargs["workers"] == WORKERS
 
 
 def test_materialize_passes_formatted_query_to_extract(env_vars, google_ads_resource):
     """extract() is called with the partition date substituted into the query."""
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+    mock_extract = MagicMock(return_value=EXTRACT_STREAM)
 
     with (
-        patch("assets.ingestion.google_ads.ads_extract.extract", mock_extract),
-        patch("assets.ingestion.google_ads.gcs_load.load", return_value=FAKE_GCS_URI),
+        patch("assets.ingestion.google_ads.ads_extract.extract_stream", mock_extract),
+        patch(
+            "assets.ingestion.google_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
+        ),
         patch(
             "assets.ingestion.google_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -182,6 +248,10 @@ def test_materialize_passes_formatted_query_to_extract(env_vars, google_ads_reso
             "assets.ingestion.resources.GoogleAdsResource.get_client",
             return_value=MagicMock(),
         ),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_customer_ids",
+            return_value=CUSTOMER_IDS,
+        ),
     ):
         materialize(
             [google_ads_raw],
@@ -195,17 +265,21 @@ def test_materialize_passes_formatted_query_to_extract(env_vars, google_ads_reso
         )
 
     query_arg = mock_extract.call_args[0][2]
-    assert PARTITION_KEY in query_arg
-    assert "{date}" not in query_arg
+    assert f"BETWEEN '{PARTITION_KEY}' AND '{PARTITION_KEY}'" in query_arg
+    assert mock_extract.call_args.kwargs["search_stream"] == SEARCH_STREAM
 
 
 def test_materialize_succeeds(env_vars, google_ads_resource):
     """Asset materializes without error using mocked dependencies."""
     with (
         patch(
-            "assets.ingestion.google_ads.ads_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.google_ads.ads_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.google_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
-        patch("assets.ingestion.google_ads.gcs_load.load", return_value=FAKE_GCS_URI),
         patch(
             "assets.ingestion.google_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
         ),
@@ -215,6 +289,10 @@ def test_materialize_succeeds(env_vars, google_ads_resource):
             "assets.ingestion.resources.GoogleAdsResource.get_client",
             return_value=MagicMock(),
         ),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_customer_ids",
+            return_value=CUSTOMER_IDS,
+        ),
     ):
         result = materialize(
             [google_ads_raw],
@@ -230,6 +308,134 @@ def test_materialize_succeeds(env_vars, google_ads_resource):
     assert result.success
 
 
-def test_query_contains_date_placeholder():
-    """QUERY contains a {date} format placeholder."""
-    assert "{date}" in QUERY
+def test_query_contains_date_range_placeholders():
+    """QUERY filters segments.date between {start} and {end} placeholders."""
+    assert "BETWEEN '{start}' AND '{end}'" in QUERY
+
+
+def test_asset_backfills_up_to_max_backfill_days_per_run():
+    """Backfills batch up to MAX_BACKFILL_DAYS partitions per run."""
+    assert google_ads_raw.backfill_policy == BackfillPolicy.multi_run(
+        max_partitions_per_run=MAX_BACKFILL_DAYS
+    )
+
+
+def _range_stream() -> BatchStream:
+    """A stream over RANGE_TABLE with no rejects."""
+    return BatchStream(
+        RANGE_TABLE.to_batches(),
+        RANGE_TABLE.schema,
+        lambda raw: (raw, raw.slice(0, 0)),
+    )
+
+
+def test_materialize_range_loads_each_date(env_vars, google_ads_resource):
+    """A range run queries once and loads one partition per date."""
+    mock_extract = MagicMock(return_value=_range_stream())
+    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_bq_load = MagicMock(return_value=FAKE_ROWS_LOADED)
+
+    with (
+        patch("assets.ingestion.google_ads.ads_extract.extract_stream", mock_extract),
+        patch("assets.ingestion.google_ads.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.google_ads.bq_load.load", mock_bq_load),
+        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
+        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_client",
+            return_value=MagicMock(),
+        ),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_customer_ids",
+            return_value=CUSTOMER_IDS,
+        ),
+    ):
+        result = materialize(
+            [google_ads_raw],
+            tags=RANGE_TAGS,
+            resources={
+                "gcs": gcs_resource,
+                "bigquery": bigquery_resource,
+                "google_ads": google_ads_resource,
+                "ingestion_env": ingestion_config,
+            },
+        )
+
+    assert result.success
+    mock_extract.assert_called_once()
+    query_arg = mock_extract.call_args.args[2]
+    assert f"BETWEEN '{RANGE_START}' AND '{RANGE_END}'" in query_arg
+    gcs_rows = [c.args[0].num_rows for c in mock_gcs_load.call_args_list]
+    assert gcs_rows == [1, 2]
+    loaded = [c.args[1].partition_date for c in mock_bq_load.call_args_list]
+    assert loaded == [date(2024, 1, 14), date(2024, 1, 16)]
+    fields = {c.args[1].partition_field for c in mock_bq_load.call_args_list}
+    assert fields == {PARTITION_FIELD}
+
+
+def _materialize_daily(google_ads_resource, instance, now):
+    """Materializes one daily partition at wall time now.
+
+    Returns the get_customer_ids mock.
+    """
+    mock_customers = MagicMock(return_value=CUSTOMER_IDS)
+    with (
+        patch(
+            "assets.ingestion.google_ads.ads_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.google_ads.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
+        ),
+        patch(
+            "assets.ingestion.google_ads.bq_load.load", return_value=FAKE_ROWS_LOADED
+        ),
+        patch("assets.ingestion.google_ads.time.time", return_value=now),
+        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
+        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_client",
+            return_value=MagicMock(),
+        ),
+        patch(
+            "assets.ingestion.resources.GoogleAdsResource.get_customer_ids",
+            mock_customers,
+        ),
+    ):
+        materialize(
+            [google_ads_raw],
+            partition_key=PARTITION_KEY,
+            instance=instance,
+            resources={
+                "gcs": gcs_resource,
+                "bigquery": bigquery_resource,
+                "google_ads": google_ads_resource,
+                "ingestion_env": ingestion_config,
+            },
+        )
+    return mock_customers
+
+
+def test_materialize_reuses_recorded_customers(env_vars, google_ads_resource):
+    """A run within CUSTOMER_CACHE_SECONDS reuses the recorded accounts."""
+    instance = DagsterInstance.ephemeral()
+    _materialize_daily(google_ads_resource, instance, LISTED_AT)
+
+    mock_customers = _materialize_daily(
+        google_ads_resource, instance, LISTED_AT + CUSTOMER_CACHE_SECONDS - 1
+    )
+
+    mock_customers.assert_not_called()
+
+
+def test_materialize_relists_stale_customers(env_vars, google_ads_resource):
+    """Accounts recorded CUSTOMER_CACHE_SECONDS ago are queried again."""
+    instance = DagsterInstance.ephemeral()
+    _materialize_daily(google_ads_resource, instance, LISTED_AT)
+
+    mock_customers = _materialize_daily(
+        google_ads_resource, instance, LISTED_AT + CUSTOMER_CACHE_SECONDS
+    )
+
+    mock_customers.assert_called_once()
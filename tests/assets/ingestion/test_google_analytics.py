@@ -14,6 +14,7 @@ from assets.ingestion.resources import (
     bigquery_resource,
     gcs_resource,
 )
+from extract.stream import BatchStream
 
 ingestion_config = IngestionConfig(project="fake-project", bucket="my-bucket")
 
@@ -26,7 +27,12 @@ FAKE_CREDENTIALS_PATH = "/tmp/ga-creds.json"
 FAKE_PROPERTY_ID = "123456"
 FAKE_PROJECT = "fake-project"
 FAKE_BUCKET = "my-bucket"
-EXPECTED_METADATA_KEYS = {"rows_loaded", "gcs_uri", "partition_date"}
+EXPECTED_METADATA_KEYS = {
+    "rows_loaded",
+    "rows_rejected",
+    "gcs_uri",
+    "partition_date",
+}
 
 SAMPLE_TABLE = pa.table(
     {
@@ -35,6 +41,12 @@ SAMPLE_TABLE = pa.table(
         "screenPageViews": ["500"],
     }
 )
+EXTRACT_STREAM = BatchStream(
+    SAMPLE_TABLE.to_batches(),
+    SAMPLE_TABLE.schema,
+    lambda raw: (raw, raw.slice(0, 0)),
+)
+STREAM_RESULT = (FAKE_GCS_URI, SAMPLE_TABLE.num_rows)
 
 
 @pytest.fixture
@@ -72,14 +84,14 @@ def test_asset_name():
 
 def test_materialize_gcs_source_is_table_name(env_vars, google_analytics_resource):
     """GCS load is called with source equal to TABLE constant."""
-    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_gcs_load = MagicMock(return_value=STREAM_RESULT)
 
     with (
         patch(
-            "assets.ingestion.google_analytics.ga_extract.extract",
-            return_value=SAMPLE_TABLE,
+            "assets.ingestion.google_analytics.ga_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
         ),
-        patch("assets.ingestion.google_analytics.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.google_analytics.gcs_load.load_stream", mock_gcs_load),
         patch(
             "assets.ingestion.google_analytics.bq_load.load",
             return_value=FAKE_ROWS_LOADED,
@@ -110,11 +122,12 @@ def test_materialize_output_metadata_keys(env_vars, google_analytics_resource):
     """Output metadata contains all expected keys."""
     with (
         patch(
-            "assets.ingestion.google_analytics.ga_extract.extract",
-            return_value=SAMPLE_TABLE,
+            "assets.ingestion.google_analytics.ga_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
         ),
         patch(
-            "assets.ingestion.google_analytics.gcs_load.load", return_value=FAKE_GCS_URI
+            "assets.ingestion.google_analytics.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
         patch(
             "assets.ingestion.google_analytics.bq_load.load",
@@ -145,12 +158,15 @@ def test_materialize_output_metadata_keys(env_vars, google_analytics_resource):
 
 def test_materialize_passes_date_range_to_extract(env_vars, google_analytics_resource):
     """extract() is called with start_date and end_date equal to partition date."""
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+    mock_extract = MagicMock(return_value=EXTRACT_STREAM)
 
     with (
-        patch("assets.ingestion.google_analytics.ga_extract.extract", mock_extract),
         patch(
-            "assets.ingestion.google_analytics.gcs_load.load", return_value=FAKE_GCS_URI
+            "assets.ingestion.google_analytics.ga_extract.extract_stream", mock_extract
+        ),
+        patch(
+            "assets.ingestion.google_analytics.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
         patch(
             "assets.ingestion.google_analytics.bq_load.load",
@@ -181,12 +197,15 @@ def test_materialize_passes_date_range_to_extract(env_vars, google_analytics_res
 
 def test_materialize_passes_property_id_to_extract(env_vars, google_analytics_resource):
     """extract() is called with the correct property_id from the resource."""
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+    mock_extract = MagicMock(return_value=EXTRACT_STREAM)
 
     with (
-        patch("assets.ingestion.google_analytics.ga_extract.extract", mock_extract),
         patch(
-            "assets.ingestion.google_analytics.gcs_load.load", return_value=FAKE_GCS_URI
+            "assets.ingestion.google_analytics.ga_extract.extract_stream", mock_extract
+        ),
+        patch(
+            "assets.ingestion.google_analytics.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
         patch(
             "assets.ingestion.google_analytics.bq_load.load",
@@ -217,11 +236,12 @@ def test_materialize_succeeds(env_vars, google_analytics_resource):
     """Asset materializes without error using mocked dependencies."""
     with (
         patch(
-            "assets.ingestion.google_analytics.ga_extract.extract",
-            return_value=SAMPLE_TABLE,
+            "assets.ingestion.google_analytics.ga_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
         ),
         patch(
-            "assets.ingestion.google_analytics.gcs_load.load", return_value=FAKE_GCS_URI
+            "assets.ingestion.google_analytics.gcs_load.load_stream",
+            return_value=STREAM_RESULT,
         ),
         patch(
             "assets.ingestion.google_analytics.bq_load.load",
@@ -1,15 +1,24 @@
 """Tests for Google Sheets ingestion assets."""
 
+from datetime import date
 from unittest.mock import MagicMock, patch
 
-import pyarrow as pa
 import pytest
-from dagster import DailyPartitionsDefinition, materialize
+from dagster import (
+    AssetMaterialization,
+    DagsterInstance,
+    DailyPartitionsDefinition,
+    materialize,
+)
 
 from assets.ingestion.google_sheets import (
+    HASH_KEY,
+    PARTITION_FIELD,
+    PRIMARY_KEYS,
     SHEET_NAMES,
-    build_google_sheets_asset,
+    asset_key,
     google_sheets_assets,
+    google_sheets_raw,
 )
 from assets.ingestion.resources import (
     GoogleSheetsResource,
@@ -17,12 +26,18 @@ from assets.ingestion.resources import (
     bigquery_resource,
     gcs_resource,
 )
+from extract import cdc
+from extract.cdc import OPERATION_COLUMN
+from extract.google_sheets.extract import Raw, content_hash, to_table
 
 ingestion_config = IngestionConfig(project="fake-project", bucket="my-bucket")
 
 EXPECTED_ASSET_COUNT = 3
 EXPECTED_METADATA_KEYS = {"rows_loaded", "gcs_uri", "partition_date", "sheet_name"}
 PARTITION_KEY = "2024-01-15"
+OTHER_PARTITION_KEY = "2024-01-14"
+PARTITION_DATE = date(2024, 1, 15)
+LATER_DATE = date(2024, 1, 16)
 FAKE_GCS_URI = "gs://my-bucket/google_sheets_students/date=2024-01-15/google_sheets_students-run-id.parquet"
 FAKE_ROWS_LOADED = 42
 FAKE_CREDENTIALS_PATH = "/tmp/creds.json"
@@ -30,12 +45,10 @@ FAKE_SPREADSHEET_ID = "fake-spreadsheet-id"
 FAKE_PROJECT = "fake-project"
 FAKE_BUCKET = "my-bucket"
 
-SAMPLE_TABLE = pa.table(
-    {
-        "name": ["Alice", "Bob"],
-        "age": ["25", "30"],
-    }
-)
+SAMPLE_ROWS = [["1", "Alice"], ["2", "Bob"]]
+SAMPLE_RAWS = {
+    n: Raw(headers=[PRIMARY_KEYS[n], "name"], rows=SAMPLE_ROWS) for n in SHEET_NAMES
+}
 
 
 @pytest.fixture
@@ -54,6 +67,64 @@ def google_sheets_resource():
     )
 
 
+def _materialize(
+    google_sheets_resource,
+    selection=None,
+    raws=SAMPLE_RAWS,
+    instance=None,
+    states=None,
+):
+    """Materializes the sheets assets with mocked fetch and loads.
+
+    Change capture state is kept in the states dict, keyed by source.
+    Returns the materialize result and the fetch_sheets, GCS load and
+    BigQuery load module mocks.
+    """
+    states = {} if states is None else states
+    mock_extract = MagicMock(return_value=raws)
+    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_bq_load = MagicMock()
+    mock_bq_load.load.return_value = FAKE_ROWS_LOADED
+    mock_bq_load.append.return_value = FAKE_ROWS_LOADED
+    with (
+        patch(
+            "assets.ingestion.google_sheets.sheets_extract.fetch_sheets",
+            mock_extract,
+        ),
+        patch("assets.ingestion.google_sheets.gcs_load.load", mock_gcs_load),
+        patch(
+            "assets.ingestion.google_sheets.gcs_load.read_state",
+            side_effect=lambda bucket, source, client: states.get(source),
+        ),
+        patch(
+            "assets.ingestion.google_sheets.gcs_load.load_state",
+            side_effect=lambda table, bucket, source, client: states.update(
+                {source: table}
+            ),
+        ),
+        patch("assets.ingestion.google_sheets.bq_load", mock_bq_load),
+        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
+        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
+        patch(
+            "assets.ingestion.resources.GoogleSheetsResource.get_client",
+            return_value=MagicMock(),
+        ),
+    ):
+        result = materialize(
+            [google_sheets_raw],
+            partition_key=PARTITION_KEY,
+            selection=selection,
+            instance=instance,
+            resources={
+                "gcs": gcs_resource,
+                "bigquery": bigquery_resource,
+                "google_sheets": google_sheets_resource,
+                "ingestion_env": ingestion_config,
+            },
+        )
+    return result, mock_extract, mock_gcs_load, mock_bq_load
+
+
 def test_all_assets_have_daily_partitions():
     """All assets use DailyPartitionsDefinition."""
     for a in google_sheets_assets:
@@ -62,59 +133,42 @@ def test_all_assets_have_daily_partitions():
 
 def test_all_assets_have_ingestion_group():
     """All assets belong to the ingestion group."""
-    for a in google_sheets_assets:
-        assert a.group_names_by_key[a.key] == "ingestion"
+    for key, group in google_sheets_raw.group_names_by_key.items():
+        assert group == "ingestion", key
 
 
-def test_build_google_sheets_asset_returns_asset():
-    """Factory returns a valid Dagster asset."""
-    asset_def = build_google_sheets_asset("students")
-    assert asset_def.key.path[-1] == "google_sheets_students_raw"
+def test_asset_key_names_sheet_asset():
+    """asset_key() builds the google_sheets_{sheet_name}_raw key."""
+    assert asset_key("students").path[-1] == "google_sheets_students_raw"
 
 
 def test_google_sheets_assets_count():
-    """One asset is built per sheet name."""
-    assert len(google_sheets_assets) == EXPECTED_ASSET_COUNT
+    """One asset key is defined per sheet name."""
+    assert len(google_sheets_raw.keys) == EXPECTED_ASSET_COUNT
 
 
 def test_google_sheets_assets_names():
     """Asset names follow the google_sheets_{sheet_name}_raw pattern."""
-    names = {a.key.path[-1] for a in google_sheets_assets}
+    names = {key.path[-1] for key in google_sheets_raw.keys}
     expected = {f"google_sheets_{n}_raw" for n in SHEET_NAMES}
     assert names == expected
 
 
+def test_materialize_fetches_every_sheet_in_one_call(env_vars, google_sheets_resource):
+    """One fetch_sheets call serves every sheet."""
+    result, mock_extract, _, _ = _materialize(google_sheets_resource)
+
+    mock_extract.assert_called_once()
+    assert mock_extract.call_args[0][2] == SHEET_NAMES
+    materialized = {e.asset_key for e in result.get_asset_materialization_events()}
+    assert materialized == set(google_sheets_raw.keys)
+
+
 def test_materialize_gcs_source_includes_sheet_name(env_vars, google_sheets_resource):
     """GCS load is called with source name containing the sheet name."""
-    asset_def = build_google_sheets_asset("inventory")
-    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
-
-    with (
-        patch(
-            "assets.ingestion.google_sheets.sheets_extract.extract",
-            return_value=SAMPLE_TABLE,
-        ),
-        patch("assets.ingestion.google_sheets.gcs_load.load", mock_gcs_load),
-        patch(
-            "assets.ingestion.google_sheets.bq_load.load", return_value=FAKE_ROWS_LOADED
-        ),
-        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
-        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
-        patch(
-            "assets.ingestion.resources.GoogleSheetsResource.get_client",
-            return_value=MagicMock(),
-        ),
-    ):
-        materialize(
-            [asset_def],
-            partition_key=PARTITION_KEY,
-            resources={
-                "gcs": gcs_resource,
-                "bigquery": bigquery_resource,
-                "google_sheets": google_sheets_resource,
-                "ingestion_env": ingestion_config,
-            },
-        )
+    _, _, mock_gcs_load, _ = _materialize(
+        google_sheets_resource, selection=[asset_key("inventory")]
+    )
 
     gcs_config_arg = mock_gcs_load.call_args[0][1]
     assert "inventory" in gcs_config_arg.source
@@ -122,107 +176,187 @@ def test_materialize_gcs_source_includes_sheet_name(env_vars, google_sheets_reso
 
 def test_materialize_output_metadata_keys(env_vars, google_sheets_resource):
     """Output metadata contains all expected keys."""
-    asset_def = build_google_sheets_asset("students")
+    result, _, _, _ = _materialize(google_sheets_resource)
 
-    with (
-        patch(
-            "assets.ingestion.google_sheets.sheets_extract.extract",
-            return_value=SAMPLE_TABLE,
-        ),
-        patch(
-            "assets.ingestion.google_sheets.gcs_load.load", return_value=FAKE_GCS_URI
-        ),
-        patch(
-            "assets.ingestion.google_sheets.bq_load.load", return_value=FAKE_ROWS_LOADED
-        ),
-        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
-        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
-        patch(
-            "assets.ingestion.resources.GoogleSheetsResource.get_client",
-            return_value=MagicMock(),
-        ),
-    ):
-        result = materialize(
-            [asset_def],
-            partition_key=PARTITION_KEY,
-            resources={
-                "gcs": gcs_resource,
-                "bigquery": bigquery_resource,
-                "google_sheets": google_sheets_resource,
-                "ingestion_env": ingestion_config,
-            },
-        )
+    for mat_event in result.get_asset_materialization_events():
+        metadata_keys = set(mat_event.materialization.metadata.keys())
+        assert EXPECTED_METADATA_KEYS.issubset(metadata_keys)
 
-    mat_event = result.get_asset_materialization_events()[0]
-    metadata_keys = set(mat_event.materialization.metadata.keys())
-    assert EXPECTED_METADATA_KEYS.issubset(metadata_keys)
 
+def test_materialize_passes_selected_sheets_to_extract(
+    env_vars, google_sheets_resource
+):
+    """fetch_sheets() is called with only the selected sheet names."""
+    _, mock_extract, _, _ = _materialize(
+        google_sheets_resource, selection=[asset_key("programs")]
+    )
 
-def test_materialize_passes_sheet_name_to_extract(env_vars, google_sheets_resource):
-    """extract() is called with the correct sheet_name."""
-    asset_def = build_google_sheets_asset("programs")
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+    assert mock_extract.call_args[0][2] == ["programs"]
 
-    with (
-        patch("assets.ingestion.google_sheets.sheets_extract.extract", mock_extract),
-        patch(
-            "assets.ingestion.google_sheets.gcs_load.load", return_value=FAKE_GCS_URI
-        ),
-        patch(
-            "assets.ingestion.google_sheets.bq_load.load", return_value=FAKE_ROWS_LOADED
-        ),
-        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
-        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
-        patch(
-            "assets.ingestion.resources.GoogleSheetsResource.get_client",
-            return_value=MagicMock(),
-        ),
-    ):
-        materialize(
-            [asset_def],
-            partition_key=PARTITION_KEY,
-            resources={
-                "gcs": gcs_resource,
-                "bigquery": bigquery_resource,
-                "google_sheets": google_sheets_resource,
-                "ingestion_env": ingestion_config,
-            },
-        )
 
-    assert mock_extract.call_args[0][2] == "programs"
+def test_materialize_empty_sheet_skips_load(env_vars, google_sheets_resource):
+    """A sheet with no rows is not loaded but the others are."""
+    empty = Raw(headers=SAMPLE_RAWS["students"].headers, rows=[])
+    raws = {**SAMPLE_RAWS, "students": empty}
+
+    result, _, mock_gcs_load, _ = _materialize(google_sheets_resource, raws=raws)
+
+    sources = [c[0][1].source for c in mock_gcs_load.call_args_list]
+    assert "google_sheets_students" not in sources
+    assert len(sources) == EXPECTED_ASSET_COUNT - 1
+    assert result.success
 
 
 def test_materialize_students_asset(env_vars, google_sheets_resource):
     """Students asset materializes without error using mocked dependencies."""
-    asset_def = build_google_sheets_asset("students")
+    result, _, _, _ = _materialize(
+        google_sheets_resource, selection=[asset_key("students")]
+    )
 
-    with (
-        patch(
-            "assets.ingestion.google_sheets.sheets_extract.extract",
-            return_value=SAMPLE_TABLE,
-        ),
-        patch(
-            "assets.ingestion.google_sheets.gcs_load.load", return_value=FAKE_GCS_URI
-        ),
-        patch(
-            "assets.ingestion.google_sheets.bq_load.load", return_value=FAKE_ROWS_LOADED
-        ),
-        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
-        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
-        patch(
-            "assets.ingestion.resources.GoogleSheetsResource.get_client",
-            return_value=MagicMock(),
-        ),
-    ):
-        result = materialize(
-            [asset_def],
-            partition_key=PARTITION_KEY,
-            resources={
-                "gcs": gcs_resource,
-                "bigquery": bigquery_resource,
-                "google_sheets": google_sheets_resource,
-                "ingestion_env": ingestion_config,
-            },
+    assert result.success
+
+
+def test_materialize_unchanged_sheet_skips_load(env_vars, google_sheets_resource):
+    """A sheet whose content hash matches its last run is not reloaded."""
+    instance = DagsterInstance.ephemeral()
+    _materialize(google_sheets_resource, instance=instance)
+
+    result, _, mock_gcs_load, _ = _materialize(
+        google_sheets_resource, instance=instance
+    )
+
+    mock_gcs_load.assert_not_called()
+    for mat_event in result.get_asset_materialization_events():
+        metadata = mat_event.materialization.metadata
+        assert metadata["unchanged"].value is True
+        assert HASH_KEY in metadata
+
+
+def test_materialize_hash_of_other_partition_does_not_skip(
+    env_vars, google_sheets_resource
+):
+    """A matching hash recorded for another partition does not skip the load."""
+    instance = DagsterInstance.ephemeral()
+    instance.report_runless_asset_event(
+        AssetMaterialization(
+            asset_key=asset_key("students"),
+            partition=OTHER_PARTITION_KEY,
+            metadata={HASH_KEY: content_hash(SAMPLE_RAWS["students"])},
         )
+    )
 
-    assert result.success
+    _, _, mock_gcs_load, _ = _materialize(
+        google_sheets_resource, selection=[asset_key("students")], instance=instance
+    )
+
+    mock_gcs_load.assert_called_once()
+
+
+def test_materialize_changed_sheet_reloads(env_vars, google_sheets_resource):
+    """Only sheets whose content changed since the last run are reloaded."""
+    instance = DagsterInstance.ephemeral()
+    _materialize(google_sheets_resource, instance=instance)
+    changed = Raw(headers=SAMPLE_RAWS["programs"].headers, rows=[["1", "Alicia"]])
+    raws = {**SAMPLE_RAWS, "programs": changed}
+
+    _, _, mock_gcs_load, _ = _materialize(
+        google_sheets_resource, raws=raws, instance=instance
+    )
+
+    sources = [c[0][1].source for c in mock_gcs_load.call_args_list]
+    assert sources == ["google_sheets_programs"]
+
+
+def test_materialize_loads_only_changed_rows(env_vars, google_sheets_resource):
+    """With CDC, a changed sheet loads just its inserts, updates and deletes."""
+    instance = DagsterInstance.ephemeral()
+    states = {}
+    _materialize(google_sheets_resource, instance=instance, states=states)
+    headers = SAMPLE_RAWS["students"].headers
+    changed = Raw(headers=headers, rows=[["1", "Alicia"], ["3", "Carol"]])
+
+    _, _, mock_gcs_load, _ = _materialize(
+        google_sheets_resource,
+        raws={**SAMPLE_RAWS, "students": changed},
+        instance=instance,
+        states=states,
+    )
+
+    table = mock_gcs_load.call_args[0][0]
+    assert table.column(OPERATION_COLUMN).to_pylist() == ["update", "insert", "delete"]
+    assert table.column("student_id").to_pylist() == ["1", "3", "2"]
+    assert states["google_sheets_students"].num_rows == len(changed.rows)
+
+
+def test_materialize_first_run_inserts_every_row(env_vars, google_sheets_resource):
+    """Without saved state, every row is loaded as an insert."""
+    _, _, mock_gcs_load, _ = _materialize(
+        google_sheets_resource, selection=[asset_key("inventory")]
+    )
+
+    table = mock_gcs_load.call_args[0][0]
+    assert table.column(OPERATION_COLUMN).to_pylist() == ["insert"] * len(SAMPLE_ROWS)
+
+
+def test_materialize_stamps_capture_date_and_loaded_at(
+    env_vars, google_sheets_resource
+):
+    """Loaded rows carry the partition date as captured_date and loaded_at."""
+    _, _, mock_gcs_load, _ = _materialize(
+        google_sheets_resource, selection=[asset_key("students")]
+    )
+
+    table = mock_gcs_load.call_args[0][0]
+    assert table.column(PARTITION_FIELD).to_pylist() == [PARTITION_DATE] * len(
+        SAMPLE_ROWS
+    )
+    assert "loaded_at" in table.column_names
+
+
+def test_materialize_appends_changes_to_capture_date_partition(
+    env_vars, google_sheets_resource
+):
+    """Change rows are appended to the partition rather than replacing it."""
+    _, _, _, mock_bq_load = _materialize(
+        google_sheets_resource, selection=[asset_key("students")]
+    )
+
+    mock_bq_load.load.assert_not_called()
+    mock_bq_load.repartition.assert_called_once()
+    bq_config = mock_bq_load.append.call_args[0][1]
+    assert bq_config.partition_field == PARTITION_FIELD
+    assert bq_config.partition_date == PARTITION_DATE
+
+
+def test_materialize_partition_older_than_state_fails(env_vars, google_sheets_resource):
+    """A partition before the saved state's capture date is not diffed."""
+    key = PRIMARY_KEYS["students"]
+    _, state = cdc.diff(to_table(SAMPLE_RAWS["students"]), None, key, LATER_DATE)
+    states = {"google_sheets_students": state}
+
+    with pytest.raises(ValueError, match=str(LATER_DATE)):
+        _materialize(
+            google_sheets_resource, selection=[asset_key("students")], states=states
+        )
+
+    assert states["google_sheets_students"] is state
+
+
+def test_materialize_emptied_sheet_deletes_every_key(env_vars, google_sheets_resource):
+    """With CDC, a sheet emptied since the last run loads a delete per key."""
+    instance = DagsterInstance.ephemeral()
+    states = {}
+    _materialize(google_sheets_resource, instance=instance, states=states)
+    empty = Raw(headers=SAMPLE_RAWS["students"].headers, rows=[])
+
+    _, _, mock_gcs_load, mock_bq_load = _materialize(
+        google_sheets_resource,
+        raws={**SAMPLE_RAWS, "students": empty},
+        instance=instance,
+        states=states,
+    )
+
+    table = mock_gcs_load.call_args[0][0]
+    assert table.column(OPERATION_COLUMN).to_pylist() == ["delete"] * len(SAMPLE_ROWS)
+    mock_bq_load.append.assert_called_once()
+    assert states["google_sheets_students"].num_rows == 0
@@ -1,8 +1,13 @@
 """Tests for ingestion layer job definitions."""
 
-from assets.ingestion.jobs import ingestion_job
+from assets.ingestion.jobs import ingestion_job, stripe_incremental_job
 
 
 def test_ingestion_job_has_correct_name():
     """Job name is ingestion_job."""
     assert ingestion_job.name == "ingestion_job"
+
+
+def test_stripe_incremental_job_has_correct_name():
+    """Job name is stripe_incremental_job."""
+    assert stripe_incremental_job.name == "stripe_incremental_job"
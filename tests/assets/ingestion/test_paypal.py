@@ -5,15 +5,22 @@ from unittest.mock import MagicMock, patch
 
 import pyarrow as pa
 import pytest
-from dagster import DailyPartitionsDefinition, materialize
+from dagster import BackfillPolicy, DailyPartitionsDefinition, materialize
 
-from assets.ingestion.paypal import TABLE, paypal_transactions_raw
+from assets.ingestion.paypal import (
+    PARTITION_FIELD,
+    TABLE,
+    WORKERS,
+    paypal_transactions_raw,
+)
 from assets.ingestion.resources import (
     IngestionConfig,
     PayPalResource,
     bigquery_resource,
     gcs_resource,
 )
+from extract.paypal.extract import MAX_WINDOW_DAYS
+from extract.stream import BatchStream
 
 ingestion_config = IngestionConfig(project="fake-project", bucket="my-bucket")
 
@@ -24,7 +31,12 @@ FAKE_CLIENT_ID = "fake-client-id"
 FAKE_CLIENT_SECRET = "fake-client-secret"
 FAKE_PROJECT = "fake-project"
 FAKE_BUCKET = "my-bucket"
-EXPECTED_METADATA_KEYS = {"rows_loaded", "gcs_uri", "partition_date"}
+EXPECTED_METADATA_KEYS = {
+    "rows_loaded",
+    "rows_rejected",
+    "gcs_uri",
+    "partition_date",
+}
 
 SAMPLE_TABLE = pa.table(
     {
@@ -40,6 +52,26 @@ SAMPLE_TABLE = pa.table(
         "net_amount_usd": [145.35],
     }
 )
+EXTRACT_STREAM = BatchStream(
+    SAMPLE_TABLE.to_batches(),
+    SAMPLE_TABLE.schema,
+    lambda raw: (raw, raw.slice(0, 0)),
+)
+STREAM_RESULT = (FAKE_GCS_URI, SAMPLE_TABLE.num_rows)
+
+RANGE_START = "2024-01-14"
+RANGE_END = "2024-01-16"
+RANGE_TAGS = {
+    "dagster/asset_partition_range_start": RANGE_START,
+    "dagster/asset_partition_range_end": RANGE_END,
+}
+RANGE_TABLE = pa.table(
+    {
+        "transaction_id": ["TXN1", "TXN2", "TXN3"],
+        "transaction_date": [date(2024, 1, 16), date(2024, 1, 14), date(2024, 1, 16)],
+    }
+)
+BATCH_RESULT = (RANGE_TABLE, RANGE_TABLE.slice(0, 0))
 
 
 @pytest.fixture
@@ -78,13 +110,14 @@ def test_asset_name():
 
 def test_materialize_gcs_source_is_table_name(env_vars, paypal_resource):
     """GCS load is called with source equal to TABLE constant."""
-    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_gcs_load = MagicMock(return_value=STREAM_RESULT)
 
     with (
         patch(
-            "assets.ingestion.paypal.paypal_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.paypal.paypal_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
         ),
-        patch("assets.ingestion.paypal.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.paypal.gcs_load.load_stream", mock_gcs_load),
         patch("assets.ingestion.paypal.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -112,9 +145,12 @@ def test_materialize_output_metadata_keys(env_vars, paypal_resource):
     """Output metadata contains all expected keys."""
     with (
         patch(
-            "assets.ingestion.paypal.paypal_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.paypal.paypal_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.paypal.gcs_load.load_stream", return_value=STREAM_RESULT
         ),
-        patch("assets.ingestion.paypal.gcs_load.load", return_value=FAKE_GCS_URI),
         patch("assets.ingestion.paypal.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -141,11 +177,13 @@ def test_materialize_output_metadata_keys(env_vars, paypal_resource):
 
 def test_materialize_passes_date_range_to_extract(env_vars, paypal_resource):
     """extract() is called with start and end date equal to partition date."""
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+    mock_extract = MagicMock(return_value=EXTRACT_STREAM)
 
     with (
-        patch("assets.ingestion.paypal.paypal_extract.extract", mock_extract),
-        patch("assets.ingestion.paypal.gcs_load.load", return_value=FAKE_GCS_URI),
+        patch("assets.ingestion.paypal.paypal_extract.extract_stream", mock_extract),
+        patch(
+            "assets.ingestion.paypal.gcs_load.load_stream", return_value=STREAM_RESULT
+        ),
         patch("assets.ingestion.paypal.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -168,15 +206,19 @@ def test_materialize_passes_date_range_to_extract(env_vars, paypal_resource):
     args = mock_extract.call_args[0]
     assert args[1] == date.fromisoformat(PARTITION_KEY)
     assert args[2] == date.fromisoformat(PARTITION_KEY)
+    assert mock_extract.call_args.kwargs["workers"] == WORKERS
 
 
 def test_materialize_succeeds(env_vars, paypal_resource):
     """Asset materializes without error using mocked dependencies."""
     with (
         patch(
-            "assets.ingestion.paypal.paypal_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.paypal.paypal_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.paypal.gcs_load.load_stream", return_value=STREAM_RESULT
         ),
-        patch("assets.ingestion.paypal.gcs_load.load", return_value=FAKE_GCS_URI),
         patch("assets.ingestion.paypal.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -197,3 +239,52 @@ def test_materialize_succeeds(env_vars, paypal_resource):
         )
 
     assert result.success
+
+
+def test_asset_backfills_up_to_31_partitions_per_run():
+    """Backfills batch up to one report window of partitions per run."""
+    assert paypal_transactions_raw.backfill_policy == BackfillPolicy.multi_run(
+        max_partitions_per_run=MAX_WINDOW_DAYS
+    )
+
+
+def test_materialize_range_loads_each_date(env_vars, paypal_resource):
+    """A range run fetches once and loads one partition per transaction date."""
+    mock_extract = MagicMock(return_value=BATCH_RESULT)
+    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_bq_load = MagicMock(return_value=FAKE_ROWS_LOADED)
+
+    with (
+        patch("assets.ingestion.paypal.paypal_extract.extract_batch", mock_extract),
+        patch("assets.ingestion.paypal.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.paypal.bq_load.load", mock_bq_load),
+        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
+        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
+        patch(
+            "assets.ingestion.resources.PayPalResource.get_client",
+            return_value=MagicMock(),
+        ),
+    ):
+        result = materialize(
+            [paypal_transactions_raw],
+            tags=RANGE_TAGS,
+            resources={
+                "gcs": gcs_resource,
+                "bigquery": bigquery_resource,
+                "paypal": paypal_resource,
+                "ingestion_env": ingestion_config,
+            },
+        )
+
+    assert result.success
+    mock_extract.assert_called_once()
+    assert mock_extract.call_args.args[1:3] == (
+        date.fromisoformat(RANGE_START),
+        date.fromisoformat(RANGE_END),
+    )
+    gcs_rows = [c.args[0].num_rows for c in mock_gcs_load.call_args_list]
+    assert gcs_rows == [1, 2]
+    loaded = [c.args[1].partition_date for c in mock_bq_load.call_args_list]
+    assert loaded == [date(2024, 1, 14), date(2024, 1, 16)]
+    fields = {c.args[1].partition_field for c in mock_bq_load.call_args_list}
+    assert fields == {PARTITION_FIELD}
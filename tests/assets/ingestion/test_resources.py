@@ -1,6 +1,6 @@
 """Tests for ingestion layer resources."""
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from dagster_gcp import BigQueryResource, GCSResource
 
@@ -27,6 +27,7 @@ FAKE_PROPERTY_ID = "123456"
 FAKE_CUSTOMER_ID = "1234567890"
 FAKE_ACCESS_TOKEN = "fake-access-token"
 FAKE_AD_ACCOUNT_ID = "act_123456789"
+FAKE_REGIONAL_AD_ACCOUNT_ID = "act_987654321"
 FAKE_CLIENT_ID = "fake-client-id"
 FAKE_CLIENT_SECRET = "fake-client-secret"
 FAKE_SECRET_KEY = "sk_test_fake"
@@ -37,24 +38,37 @@ def test_bigquery_resource_is_correct_type():
     assert isinstance(bigquery_resource, BigQueryResource)
 
 
-def test_facebook_ads_resource_exposes_ad_account_id():
-    """FacebookAdsResource exposes ad_account_id field."""
+def test_facebook_ads_resource_exposes_ad_account_ids():
+    """FacebookAdsResource exposes ad_account_ids field."""
     resource = FacebookAdsResource(
         access_token=FAKE_ACCESS_TOKEN,
-        ad_account_id=FAKE_AD_ACCOUNT_ID,
+        ad_account_ids=FAKE_AD_ACCOUNT_ID,
     )
-    assert resource.ad_account_id == FAKE_AD_ACCOUNT_ID
+    assert resource.ad_account_ids == FAKE_AD_ACCOUNT_ID
 
 
-def test_facebook_ads_resource_get_client_calls_build_client():
-    """get_client() delegates to fb_client.build_client."""
+def test_facebook_ads_resource_get_client_calls_build_clients():
+    """get_client() delegates to fb_client.build_clients."""
     resource = FacebookAdsResource(
         access_token=FAKE_ACCESS_TOKEN,
-        ad_account_id=FAKE_AD_ACCOUNT_ID,
+        ad_account_ids=FAKE_AD_ACCOUNT_ID,
     )
-    with patch("assets.ingestion.resources.fb_client.build_client") as mock_build:
+    with patch("assets.ingestion.resources.fb_client.build_clients") as mock_build:
         resource.get_client()
-        mock_build.assert_called_once_with(FAKE_ACCESS_TOKEN, FAKE_AD_ACCOUNT_ID)
+        mock_build.assert_called_once_with(FAKE_ACCESS_TOKEN, [FAKE_AD_ACCOUNT_ID])
+
+
+def test_facebook_ads_resource_splits_ad_account_ids():
+    """Comma-separated ad account IDs build one client each."""
+    resource = FacebookAdsResource(
+        access_token=FAKE_ACCESS_TOKEN,
+        ad_account_ids=f"{FAKE_AD_ACCOUNT_ID}, {FAKE_REGIONAL_AD_ACCOUNT_ID}",
+    )
+    with patch("assets.ingestion.resources.fb_client.build_clients") as mock_build:
+        resource.get_client()
+        mock_build.assert_called_once_with(
+            FAKE_ACCESS_TOKEN, [FAKE_AD_ACCOUNT_ID, FAKE_REGIONAL_AD_ACCOUNT_ID]
+        )
 
 
 def test_facebook_ads_resource_is_correct_type():
@@ -87,6 +101,23 @@ def test_google_ads_resource_get_client_calls_build_client():
         mock_build.assert_called_once_with(FAKE_CREDENTIALS_PATH)
 
 
+def test_google_ads_resource_get_customer_ids_lists_customers():
+    """get_customer_ids() lists the accounts under customer_id."""
+    resource = GoogleAdsResource(
+        credentials_path=FAKE_CREDENTIALS_PATH,
+        customer_id=FAKE_CUSTOMER_ID,
+    )
+    client = MagicMock()
+    with patch(
+        "assets.ingestion.resources.ads_client.list_customers",
+        return_value=[FAKE_CUSTOMER_ID],
+    ) as mock_list:
+        result = resource.get_customer_ids(client)
+
+    mock_list.assert_called_once_with(client, FAKE_CUSTOMER_ID)
+    assert result == [FAKE_CUSTOMER_ID]
+
+
 def test_google_ads_resource_is_correct_type():
     """google_ads_resource is a GoogleAdsResource instance."""
     assert isinstance(google_ads_resource, GoogleAdsResource)
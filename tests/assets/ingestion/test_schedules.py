@@ -2,7 +2,12 @@
 
 from dagster import DailyPartitionsDefinition, ScheduleDefinition
 
-from assets.ingestion.schedules import START_DATE, daily_partitions, daily_schedule
+from assets.ingestion.schedules import (
+    START_DATE,
+    daily_partitions,
+    daily_schedule,
+    incremental_schedule,
+)
 
 
 def test_daily_partitions_is_correct_type():
@@ -33,3 +38,13 @@ def test_daily_schedule_is_schedule_definition():
 def test_daily_schedule_timezone_is_new_york():
     """Schedule uses America/New_York timezone."""
     assert daily_schedule.execution_timezone == "America/New_York"
+
+
+def test_incremental_schedule_runs_hourly():
+    """Incremental schedule runs at half past every hour."""
+    assert incremental_schedule.cron_schedule == "30 * * * *"
+
+
+def test_incremental_schedule_targets_stripe_incremental_job():
+    """Incremental schedule runs the Stripe incremental job."""
+    assert incremental_schedule.job_name == "stripe_incremental_job"
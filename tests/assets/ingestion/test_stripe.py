@@ -5,7 +5,7 @@ from unittest.mock import MagicMock, patch
 
 import pyarrow as pa
 import pytest
-from dagster import DailyPartitionsDefinition, materialize
+from dagster import DagsterInstance, DailyPartitionsDefinition, materialize
 
 from assets.ingestion.resources import (
     IngestionConfig,
@@ -13,7 +13,15 @@ from assets.ingestion.resources import (
     bigquery_resource,
     gcs_resource,
 )
-from assets.ingestion.stripe import TABLE, stripe_charges_raw
+from assets.ingestion.stripe import (
+    BULK_FEES,
+    KEY,
+    TABLE,
+    WINDOWS,
+    stripe_charges_changes,
+    stripe_charges_raw,
+)
+from extract.stream import BatchStream
 
 ingestion_config = IngestionConfig(project="fake-project", bucket="my-bucket")
 
@@ -25,7 +33,12 @@ FAKE_ROWS_LOADED = 8
 FAKE_SECRET_KEY = "sk_test_fake"
 FAKE_PROJECT = "fake-project"
 FAKE_BUCKET = "my-bucket"
-EXPECTED_METADATA_KEYS = {"rows_loaded", "gcs_uri", "partition_date"}
+EXPECTED_METADATA_KEYS = {
+    "rows_loaded",
+    "rows_rejected",
+    "gcs_uri",
+    "partition_date",
+}
 
 SAMPLE_TABLE = pa.table(
     {
@@ -43,6 +56,23 @@ SAMPLE_TABLE = pa.table(
         "payment_intent_id": ["pi_abc123"],
     }
 )
+EXTRACT_STREAM = BatchStream(
+    SAMPLE_TABLE.to_batches(),
+    SAMPLE_TABLE.schema,
+    lambda raw: (raw, raw.slice(0, 0)),
+)
+STREAM_RESULT = (FAKE_GCS_URI, SAMPLE_TABLE.num_rows)
+
+WATERMARK = 1705363200
+NEXT_WATERMARK = 1705366800
+FAKE_ROWS_MERGED = 1
+CHANGED_TABLE = pa.table(
+    {
+        "charge_id": ["ch_abc123", "ch_def456", "ch_ghi789"],
+        "charge_date": [date(2024, 1, 15), date(2024, 1, 14), date(2024, 1, 15)],
+    }
+)
+CHANGED_RESULT = (CHANGED_TABLE, CHANGED_TABLE.slice(0, 0), NEXT_WATERMARK)
 
 
 @pytest.fixture
@@ -75,13 +105,14 @@ def test_asset_name():
 
 def test_materialize_gcs_source_is_table_name(env_vars, stripe_resource):
     """GCS load is called with source equal to TABLE constant."""
-    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+    mock_gcs_load = MagicMock(return_value=STREAM_RESULT)
 
     with (
         patch(
-            "assets.ingestion.stripe.stripe_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.stripe.stripe_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
         ),
-        patch("assets.ingestion.stripe.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.stripe.gcs_load.load_stream", mock_gcs_load),
         patch("assets.ingestion.stripe.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -109,9 +140,12 @@ def test_materialize_output_metadata_keys(env_vars, stripe_resource):
     """Output metadata contains all expected keys."""
     with (
         patch(
-            "assets.ingestion.stripe.stripe_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.stripe.stripe_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.stripe.gcs_load.load_stream", return_value=STREAM_RESULT
         ),
-        patch("assets.ingestion.stripe.gcs_load.load", return_value=FAKE_GCS_URI),
         patch("assets.ingestion.stripe.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -138,11 +172,13 @@ def test_materialize_output_metadata_keys(env_vars, stripe_resource):
 
 def test_materialize_passes_date_range_to_extract(env_vars, stripe_resource):
     """extract() is called with start and end date equal to partition date."""
-    mock_extract = MagicMock(return_value=SAMPLE_TABLE)
+    mock_extract = MagicMock(return_value=EXTRACT_STREAM)
 
     with (
-        patch("assets.ingestion.stripe.stripe_extract.extract", mock_extract),
-        patch("assets.ingestion.stripe.gcs_load.load", return_value=FAKE_GCS_URI),
+        patch("assets.ingestion.stripe.stripe_extract.extract_stream", mock_extract),
+        patch(
+            "assets.ingestion.stripe.gcs_load.load_stream", return_value=STREAM_RESULT
+        ),
         patch("assets.ingestion.stripe.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -165,15 +201,94 @@ def test_materialize_passes_date_range_to_extract(env_vars, stripe_resource):
     args = mock_extract.call_args[0]
     assert args[1] == date.fromisoformat(PARTITION_KEY)
     assert args[2] == date.fromisoformat(PARTITION_KEY)
+    assert mock_extract.call_args.kwargs["windows"] == WINDOWS
+    assert mock_extract.call_args.kwargs["bulk_fees"] == BULK_FEES
+
+
+def test_materialize_uploads_rejects_to_side_source(env_vars, stripe_resource):
+    """Rejected rows are uploaded under a separate _rejects source."""
+    rejects = SAMPLE_TABLE.append_column("reason", pa.array(["invalid fee_usd"]))
+    mock_gcs_load = MagicMock(return_value=FAKE_GCS_URI)
+
+    with (
+        patch(
+            "assets.ingestion.stripe.stripe_extract.extract_stream",
+            return_value=MagicMock(rejects=rejects),
+        ),
+        patch(
+            "assets.ingestion.stripe.gcs_load.load_stream", return_value=STREAM_RESULT
+        ),
+        patch("assets.ingestion.stripe.gcs_load.load", mock_gcs_load),
+        patch("assets.ingestion.stripe.bq_load.load", return_value=FAKE_ROWS_LOADED),
+        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
+        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
+        patch(
+            "assets.ingestion.resources.StripeResource.get_client",
+            return_value=MagicMock(),
+        ),
+    ):
+        result = materialize(
+            [stripe_charges_raw],
+            partition_key=PARTITION_KEY,
+            resources={
+                "gcs": gcs_resource,
+                "bigquery": bigquery_resource,
+                "stripe": stripe_resource,
+                "ingestion_env": ingestion_config,
+            },
+        )
+
+    assert mock_gcs_load.call_args[0][1].source == f"{TABLE}_rejects"
+    mat_event = result.get_asset_materialization_events()[0]
+    assert mat_event.materialization.metadata["rows_rejected"].value == 1
+
+
+def test_materialize_skips_bigquery_when_stream_is_empty(env_vars, stripe_resource):
+    """No BigQuery load runs when the stream writes zero rows."""
+    mock_bq_load = MagicMock(return_value=FAKE_ROWS_LOADED)
+
+    with (
+        patch(
+            "assets.ingestion.stripe.stripe_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.stripe.gcs_load.load_stream",
+            return_value=(FAKE_GCS_URI, 0),
+        ),
+        patch("assets.ingestion.stripe.bq_load.load", mock_bq_load),
+        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
+        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
+        patch(
+            "assets.ingestion.resources.StripeResource.get_client",
+            return_value=MagicMock(),
+        ),
+    ):
+        result = materialize(
+            [stripe_charges_raw],
+            partition_key=PARTITION_KEY,
+            resources={
+                "gcs": gcs_resource,
+                "bigquery": bigquery_resource,
+                "stripe": stripe_resource,
+                "ingestion_env": ingestion_config,
+            },
+        )
+
+    assert result.success
+    mock_bq_load.assert_not_called()
 
 
 def test_materialize_succeeds(env_vars, stripe_resource):
     """Asset materializes without error using mocked dependencies."""
     with (
         patch(
-            "assets.ingestion.stripe.stripe_extract.extract", return_value=SAMPLE_TABLE
+            "assets.ingestion.stripe.stripe_extract.extract_stream",
+            return_value=EXTRACT_STREAM,
+        ),
+        patch(
+            "assets.ingestion.stripe.gcs_load.load_stream", return_value=STREAM_RESULT
         ),
-        patch("assets.ingestion.stripe.gcs_load.load", return_value=FAKE_GCS_URI),
         patch("assets.ingestion.stripe.bq_load.load", return_value=FAKE_ROWS_LOADED),
         patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
         patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
@@ -194,3 +309,105 @@ def test_materialize_succeeds(env_vars, stripe_resource):
         )
 
     assert result.success
+
+
+def _materialize_changes(stripe_resource, instance=None):
+    """Materializes stripe_charges_changes with mocked clients."""
+    return materialize(
+        [stripe_charges_changes],
+        instance=instance,
+        resources={
+            "gcs": gcs_resource,
+            "bigquery": bigquery_resource,
+            "stripe": stripe_resource,
+            "ingestion_env": ingestion_config,
+        },
+    )
+
+
+@pytest.fixture
+def changes_mocks():
+    """Patches the extractor, loaders and clients for the changes asset."""
+    with (
+        patch(
+            "assets.ingestion.stripe.stripe_extract.extract_changed",
+            return_value=CHANGED_RESULT,
+        ) as mock_extract,
+        patch(
+            "assets.ingestion.stripe.gcs_load.load", return_value=FAKE_GCS_URI
+        ) as mock_gcs,
+        patch(
+            "assets.ingestion.stripe.bq_load.merge", return_value=FAKE_ROWS_MERGED
+        ) as mock_merge,
+        patch("dagster_gcp.GCSResource.get_client", return_value=MagicMock()),
+        patch("dagster_gcp.BigQueryResource.get_client", return_value=MagicMock()),
+        patch(
+            "assets.ingestion.resources.StripeResource.get_client",
+            return_value=MagicMock(),
+        ),
+    ):
+        yield mock_extract, mock_gcs, mock_merge
+
+
+def test_changes_asset_is_unpartitioned():
+    """The incremental asset runs without partitions."""
+    assert stripe_charges_changes.partitions_def is None
+
+
+def test_changes_asset_has_incremental_group():
+    """The incremental asset belongs to the ingestion_incremental group."""
+    group = stripe_charges_changes.group_names_by_key[stripe_charges_changes.key]
+    assert group == "ingestion_incremental"
+
+
+def test_materialize_changes_merges_each_partition(
+    env_vars, stripe_resource, changes_mocks
+):
+    """One MERGE on charge_id runs per changed charge_date."""
+    _, mock_gcs, mock_merge = changes_mocks
+
+    result = _materialize_changes(stripe_resource)
+
+    assert result.success
+    merged = [c.args[1].partition_date for c in mock_merge.call_args_list]
+    assert merged == [date(2024, 1, 14), date(2024, 1, 15)]
+    assert {c.args[3] for c in mock_merge.call_args_list} == {KEY}
+    assert [c.args[0].num_rows for c in mock_gcs.call_args_list] == [1, 2]
+
+
+def test_materialize_changes_records_watermark(
+    env_vars, stripe_resource, changes_mocks
+):
+    """The new watermark and merge counts are recorded as metadata."""
+    result = _materialize_changes(stripe_resource)
+
+    metadata = result.asset_materializations_for_node("stripe_charges_changes")[
+        0
+    ].metadata
+    assert metadata["watermark"].value == NEXT_WATERMARK
+    assert metadata["rows_merged"].value == 2 * FAKE_ROWS_MERGED
+    assert metadata["partitions_rewritten"].value == ["2024-01-14", "2024-01-15"]
+
+
+def test_materialize_changes_resumes_from_last_watermark(
+    env_vars, stripe_resource, changes_mocks
+):
+    """A second run reads the watermark the first run recorded."""
+    mock_extract, _, _ = changes_mocks
+    instance = DagsterInstance.ephemeral()
+
+    _materialize_changes(stripe_resource, instance)
+    _materialize_changes(stripe_resource, instance)
+
+    assert mock_extract.call_args_list[1].args[1] == NEXT_WATERMARK
+
+
+def test_materialize_changes_first_run_starts_within_retention(
+    env_vars, stripe_resource, changes_mocks
+):
+    """Without a recorded watermark, events are read from 30 days back."""
+    mock_extract, _, _ = changes_mocks
+
+    _materialize_changes(stripe_resource)
+
+    assert mock_extract.call_args.args[1] > WATERMARK
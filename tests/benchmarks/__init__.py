@@ -0,0 +1 @@
+"""Offline extract and load benchmarks."""
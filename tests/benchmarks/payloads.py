@@ -0,0 +1,442 @@
+"""Synthetic API payload generators for extractor benchmarks.
+
+Each builder returns a fake client that replays API-shaped payloads for
+the requested number of rows through the real fetch() code path. A pool
+of POOL_SIZE distinct rows is generated once per process and reused
+across pages, so building a 1M-row payload is cheap and its memory does
+not dwarf the stages being measured. Pooled rows are never mutated.
+"""
+
+import functools
+import math
+import random
+from collections.abc import Iterator
+from datetime import UTC, date, datetime, timedelta
+
+from google.ads.googleads.client import GoogleAdsClient
+from google.analytics.data_v1beta.types import (
+    DimensionHeader,
+    DimensionValue,
+    MetricHeader,
+    MetricType,
+    MetricValue,
+    Row,
+    RunReportRequest,
+    RunReportResponse,
+)
+
+from extract.google_analytics.extract import ReportConfig
+from extract.paypal.extract import PAGE_SIZE as PAYPAL_PAGE_SIZE
+
+POOL_SIZE = 1_000
+SEED = 20240115
+START_DATE = date(2024, 1, 15)
+CUSTOMER_ID = "1234567890"
+AD_ACCOUNT_ID = "123456789"
+PROPERTY_ID = "123456"
+SPREADSHEET_ID = "benchmark-spreadsheet"
+SHEET_NAME = "Sheet1"
+SHEET_HEADERS = ["name", "email", "phone", "program", "enrolled_on", "notes"]
+ACTION_TYPES = [
+    "link_click",
+    "lead",
+    "offsite_conversion.fb_pixel_purchase",
+    "post_engagement",
+    "page_engagement",
+]
+REPORT_CONFIG = ReportConfig(
+    dimension_names=["date", "country", "sessionSource"],
+    metric_names=["sessions", "totalUsers", "screenPageViews"],
+)
+COUNTRIES = ["United States", "Japan", "Brazil", "India", "Germany"]
+SOURCES = ["google", "(direct)", "facebook", "newsletter", "bing"]
+
+
+class _Charge(dict):
+    """A Stripe charge that, like StripeObject, is both a dict and has .id."""
+
+    @property
+    def id(self) -> str:
+        """Returns the charge ID."""
+        return self["id"]
+
+
+class _StripePage:
+    """A single Stripe list response."""
+
+    def __init__(self, data: list[_Charge], has_more: bool) -> None:
+        """Stores the page data and the has_more flag."""
+        self.data = data
+        self.has_more = has_more
+
+
+class _StripeCharges:
+    """Replays charges.list() pages keyed by the starting_after cursor."""
+
+    def __init__(self, rows: int, pool: list[_Charge]) -> None:
+        """Prepares the page count for the requested rows."""
+        self._rows = rows
+        self._pool = pool
+
+    def list(self, params: dict) -> _StripePage:
+        """Returns the page after the starting_after cursor."""
+        cursor = params.get("starting_after")
+        start = int(cursor.removeprefix("ch_")) + 1 if cursor else 0
+        end = min(start + params["limit"], self._rows)
+        data = [_with_id(self._pool[i % len(self._pool)], i) for i in range(start, end)]
+        return _StripePage(data, has_more=end < self._rows)
+
+
+class _StripeClient:
+    """Fake StripeClient exposing charges.list()."""
+
+    def __init__(self, rows: int) -> None:
+        """Builds the charge pool."""
+        self.charges = _StripeCharges(rows, _stripe_pool())
+
+
+class _PayPalClient:
+    """Fake PayPalClient replaying transaction report pages."""
+
+    def __init__(self, rows: int) -> None:
+        """Builds the transaction pool and page count."""
+        self._rows = rows
+        self._pool = _paypal_pool()
+        self._total_pages = max(1, math.ceil(rows / PAYPAL_PAGE_SIZE))
+
+    def get(self, path: str, params: dict) -> dict:
+        """Returns one page of the transactions report."""
+        start = (params["page"] - 1) * params["page_size"]
+        end = min(start + params["page_size"], self._rows)
+        details = [self._pool[i % len(self._pool)] for i in range(start, end)]
+        return {"transaction_details": details, "total_pages": self._total_pages}
+
+
+class _FacebookAccount:
+    """Fake AdAccount whose insights cursor yields row dicts."""
+
+    def __init__(self, rows: int) -> None:
+        """Builds the insights pool."""
+        self._rows = rows
+        self._pool = _facebook_pool()
+
+    def get_insights(self, fields: list, params: dict) -> Iterator[dict]:
+        """Returns a lazy cursor over the insight rows."""
+        return (self._pool[i % len(self._pool)] for i in range(self._rows))
+
+
+class _GoogleAdsService:
+    """Fake GoogleAdsService whose search() pages protobuf rows."""
+
+    def __init__(self, rows: int) -> None:
+        """Builds the GoogleAdsRow pool."""
+        self._rows = rows
+        self._pool = _google_ads_pool()
+
+    def search(self, customer_id: str, query: str) -> Iterator:
+        """Returns a lazy iterator over the result rows."""
+        return (self._pool[i % len(self._pool)] for i in range(self._rows))
+
+    def search_stream(self, customer_id: str, query: str) -> Iterator:
+        """Yields SearchStream responses of up to POOL_SIZE rows each."""
+        full, rest = divmod(self._rows, len(self._pool))
+        if full:
+            response = _google_ads_stream_response(len(self._pool))
+            yield from (response for _ in range(full))
+        if rest:
+            yield _google_ads_stream_response(rest)
+
+
+class _GoogleAdsClient:
+    """Fake GoogleAdsClient exposing get_service()."""
+
+    def __init__(self, rows: int) -> None:
+        """Builds the search service."""
+        self._service = _GoogleAdsService(rows)
+
+    def get_service(self, name: str) -> _GoogleAdsService:
+        """Returns the GoogleAdsService."""
+        return self._service
+
+    def get_type(self, name: str) -> object:
+        """Returns an empty GoogleAdsRow of the pooled rows' version."""
+        return type(_google_ads_pool()[0])()
+
+
+class _AnalyticsClient:
+    """Fake BetaAnalyticsDataClient paging through a report of rows rows."""
+
+    def __init__(self, rows: int) -> None:
+        """Prepares an empty cache of report pages."""
+        self._rows = rows
+        self._pages: dict[tuple[int, int], RunReportResponse] = {}
+
+    def run_report(self, request: RunReportRequest) -> RunReportResponse:
+        """Returns the page at the request's offset, built once and reused."""
+        key = (request.offset, request.limit)
+        if key not in self._pages:
+            pool = _analytics_pool()
+            end = min(request.offset + request.limit, self._rows)
+            response = RunReportResponse(
+                dimension_headers=[
+                    DimensionHeader(name=name) for name in REPORT_CONFIG.dimension_names
+                ],
+                metric_headers=[
+                    MetricHeader(name=name, type_=MetricType.TYPE_INTEGER)
+                    for name in REPORT_CONFIG.metric_names
+                ],
+                row_count=self._rows,
+            )
+            response.rows = [pool[i % len(pool)] for i in range(request.offset, end)]
+            self._pages[key] = response
+        return self._pages[key]
+
+
+class _SheetsRequest:
+    """Fake HTTP request for spreadsheets.values.get."""
+
+    def __init__(self, values: list[list[str]]) -> None:
+        """Stores the values response."""
+        self._values = values
+
+    def execute(self) -> dict:
+        """Returns the values response."""
+        return {"values": self._values}
+
+
+class _SheetsValues:
+    """Fake spreadsheets.values resource."""
+
+    def __init__(self, values: list[list[str]]) -> None:
+        """Stores the sheet values."""
+        self._values = values
+
+    def get(self, spreadsheetId: str, range: str) -> _SheetsRequest:
+        """Returns a request for the whole sheet."""
+        return _SheetsRequest(self._values)
+
+
+class _SheetsClient:
+    """Fake Sheets API client exposing spreadsheets().values()."""
+
+    def __init__(self, rows: int) -> None:
+        """Builds the header and data rows."""
+        pool = _sheets_pool()
+        values = [SHEET_HEADERS, *(pool[i % len(pool)] for i in range(rows))]
+        self._values = _SheetsValues(values)
+
+    def spreadsheets(self) -> "_SheetsClient":
+        """Returns the spreadsheets resource."""
+        return self
+
+    def values(self) -> _SheetsValues:
+        """Returns the values resource."""
+        return self._values
+
+
+def stripe_client(rows: int) -> _StripeClient:
+    """Builds a fake Stripe client that pages through rows charges."""
+    return _StripeClient(rows)
+
+
+def paypal_client(rows: int) -> _PayPalClient:
+    """Builds a fake PayPal client that pages through rows transactions."""
+    return _PayPalClient(rows)
+
+
+def facebook_ads_client(rows: int) -> _FacebookAccount:
+    """Builds a fake Facebook ad account that yields rows insights."""
+    return _FacebookAccount(rows)
+
+
+def google_ads_client(rows: int) -> _GoogleAdsClient:
+    """Builds a fake Google Ads client that yields rows GoogleAdsRows."""
+    return _GoogleAdsClient(rows)
+
+
+def google_analytics_client(rows: int) -> _AnalyticsClient:
+    """Builds a fake GA4 client whose report has rows rows."""
+    return _AnalyticsClient(rows)
+
+
+def google_sheets_client(rows: int) -> _SheetsClient:
+    """Builds a fake Sheets client whose sheet has rows data rows."""
+    return _SheetsClient(rows)
+
+
+@functools.cache
+def _stripe_pool() -> list[_Charge]:
+    """Generates distinct Stripe charge payloads."""
+    rng = random.Random(SEED)
+    start = datetime(START_DATE.year, START_DATE.month, START_DATE.day, tzinfo=UTC)
+    pool = []
+    for i in range(POOL_SIZE):
+        amount = rng.randint(500, 50_000)
+        fee = round(amount * 0.029) + 30
+        pool.append(
+            _Charge(
+                id=f"ch_{i}",
+                created=int(start.timestamp()) + rng.randint(0, 86_399),
+                amount=amount,
+                amount_captured=amount,
+                currency="usd",
+                status="succeeded",
+                description=f"Tuition payment {i}",
+                receipt_email=None,
+                billing_details={
+                    "email": f"student{i}@example.com",
+                    "name": f"Student {i}",
+                },
+                balance_transaction={"fee": fee, "net": amount - fee},
+                payment_intent=f"pi_{i}",
+            )
+        )
+    return pool
+
+
+def _with_id(charge: _Charge, index: int) -> _Charge:
+    """Copies a pooled charge under a cursor-friendly ID."""
+    return _Charge(charge, id=f"ch_{index}")
+
+
+@functools.cache
+def _paypal_pool() -> list[dict]:
+    """Generates distinct PayPal transaction detail payloads."""
+    rng = random.Random(SEED)
+    pool = []
+    for i in range(POOL_SIZE):
+        cents = rng.randint(500, 50_000)
+        fee = round(cents * 0.0349) + 49
+        pool.append(
+            {
+                "transaction_info": {
+                    "transaction_id": f"TX{i:010d}",
+                    "transaction_initiation_date": (
+                        f"{START_DATE.isoformat()}T{rng.randint(0, 23):02d}:"
+                        f"{rng.randint(0, 59):02d}:00+0000"
+                    ),
+                    "transaction_amount": {
+                        "currency_code": "USD",
+                        "value": f"{cents / 100:.2f}",
+                    },
+                    "fee_amount": {
+                        "currency_code": "USD",
+                        "value": f"-{fee / 100:.2f}",
+                    },
+                    "transaction_net_amount": {
+                        "currency_code": "USD",
+                        "value": f"{(cents - fee) / 100:.2f}",
+                    },
+                    "transaction_status": "S",
+                    "transaction_subject": f"Course deposit {i}",
+                },
+                "payer_info": {
+                    "email_address": f"payer{i}@example.com",
+                    "payer_name": {"given_name": "Payer", "surname": str(i)},
+                },
+            }
+        )
+    return pool
+
+
+@functools.cache
+def _facebook_pool() -> list[dict]:
+    """Generates distinct Facebook Ads insights rows."""
+    rng = random.Random(SEED)
+    pool = []
+    for i in range(POOL_SIZE):
+        impressions = rng.randint(1_000, 100_000)
+        reach = rng.randint(500, impressions)
+        actions = [
+            {"action_type": action_type, "value": str(rng.randint(0, 500))}
+            for action_type in rng.sample(ACTION_TYPES, rng.randint(0, 5))
+        ]
+        pool.append(
+            {
+                "date_start": START_DATE.isoformat(),
+                "account_id": AD_ACCOUNT_ID,
+                "campaign_id": str(10_000_000 + i),
+                "campaign_name": f"Campaign {i}",
+                "impressions": str(impressions),
+                "clicks": str(rng.randint(0, impressions // 10)),
+                "spend": f"{rng.uniform(1, 1_000):.2f}",
+                "reach": str(reach),
+                "frequency": f"{impressions / reach:.6f}",
+                "actions": actions,
+            }
+        )
+    return pool
+
+
+@functools.cache
+def _google_ads_pool() -> list:
+    """Generates distinct GoogleAdsRow protobuf messages.
+
+    Metrics are kept non-zero because MessageToDict omits zero-valued
+    proto3 scalars.
+    """
+    client = GoogleAdsClient(
+        credentials=None, developer_token="benchmark", use_proto_plus=True
+    )
+    row_type = type(client.get_type("GoogleAdsRow"))
+    rng = random.Random(SEED)
+    pool = []
+    for _ in range(POOL_SIZE):
+        row = row_type()
+        row.segments.date = START_DATE.isoformat()
+        row.metrics.impressions = rng.randint(1_000, 100_000)
+        row.metrics.clicks = rng.randint(1, 1_000)
+        row.metrics.cost_micros = rng.randint(1, 50_000) * 10_000
+        row.metrics.conversions = rng.randint(1, 200) / 4
+        pool.append(row)
+    return pool
+
+
+@functools.cache
+def _google_ads_stream_response(rows: int) -> object:
+    """Wraps the first rows pooled GoogleAdsRows in a SearchStream response."""
+    client = GoogleAdsClient(
+        credentials=None, developer_token="benchmark", use_proto_plus=True
+    )
+    response_type = type(client.get_type("SearchGoogleAdsStreamResponse"))
+    return response_type(results=_google_ads_pool()[:rows])
+
+
+@functools.cache
+def _analytics_pool() -> list[Row]:
+    """Generates distinct GA4 report rows matching REPORT_CONFIG."""
+    rng = random.Random(SEED)
+    pool = []
+    for i in range(POOL_SIZE):
+        day = START_DATE - timedelta(days=i % 28)
+        dimensions = [
+            day.strftime("%Y%m%d"),
+            rng.choice(COUNTRIES),
+            rng.choice(SOURCES),
+        ]
+        metrics = [str(rng.randint(1, 10_000)) for _ in REPORT_CONFIG.metric_names]
+        pool.append(
+            Row(
+                dimension_values=[DimensionValue(value=v) for v in dimensions],
+                metric_values=[MetricValue(value=v) for v in metrics],
+            )
+        )
+    return pool
+
+
+@functools.cache
+def _sheets_pool() -> list[list[str]]:
+    """Generates distinct sheet data rows matching SHEET_HEADERS."""
+    rng = random.Random(SEED)
+    pool = [
+        [
+            f"Student {i}",
+            f"student{i}@example.com",
+            f"555-{rng.randint(0, 9_999):04d}",
+            rng.choice(["Cosmetology", "Esthetics", "Barbering"]),
+            (START_DATE - timedelta(days=rng.randint(0, 365))).isoformat(),
+            "",
+        ]
+        for i in range(POOL_SIZE)
+    ]
+    return pool
@@ -0,0 +1,373 @@
+"""Offline throughput and memory benchmarks for the extract and load stages.
+
+Each source's real extractor runs against a synthetic payload from
+tests.benchmarks.payloads, and every stage is timed and profiled on its
+own: fetch decoding, row-wise parse, to_table, the vectorized
+parse_batch path, and load.gcs._serialize. Results are written to JSON
+so runs can be compared over time.
+
+Usage:
+    uv run python -m tests.benchmarks.run --rows 1000 100000 1000000
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+from pydantic import BaseModel, ConfigDict
+
+from extract.facebook_ads import extract as facebook_ads_extract
+from extract.google_ads import extract as google_ads_extract
+from extract.google_analytics import extract as google_analytics_extract
+from extract.google_sheets import extract as google_sheets_extract
+from extract.paypal import extract as paypal_extract
+from extract.stripe import extract as stripe_extract
+from extract.table import to_table
+from load.gcs.load import _serialize
+from tests.benchmarks import payloads
+
+ROW_COUNTS = [1_000, 100_000, 1_000_000]
+REPEAT = 3
+OUTPUT_DIR = Path("scratch/benchmarks")
+GOOGLE_ADS_QUERY = (
+    "SELECT segments.date, metrics.clicks, metrics.impressions, "
+    "metrics.cost_micros, metrics.conversions FROM customer"
+)
+
+
+class Result(BaseModel):
+    """Timing and memory measurements for one stage of one source."""
+
+    model_config = ConfigDict(frozen=True)
+
+    source: str
+    rows: int
+    stage: str
+    seconds: float
+    rows_per_second: float
+    python_peak_bytes: int
+    arrow_bytes: int
+    output_rows: int | None
+
+
+class Recorder:
+    """Runs pipeline stages and records a Result for each one.
+
+    Every stage runs repeat times untraced with the garbage collector
+    paused, as timeit does, keeping the fastest wall-clock time. It then
+    runs once more under tracemalloc for its Python peak memory.
+    Arrow buffers live outside the Python heap, so the Arrow memory the
+    stage's output retains is reported separately.
+    """
+
+    def __init__(self, source: str, rows: int, repeat: int) -> None:
+        """Prepares an empty result list for one source and row count."""
+        self.source = source
+        self.rows = rows
+        self.repeat = repeat
+        self.results: list[Result] = []
+
+    def __call__(self, stage: str, func: Callable, *args: Any) -> Any:
+        """Measures func(*args) as the named stage and returns its output."""
+        gc.collect()
+        gc.disable()
+        try:
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                func(*args)
+                timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+        seconds = min(timings)
+
+        arrow_before = pa.total_allocated_bytes()
+        tracemalloc.start()
+        output = func(*args)
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        arrow_bytes = pa.total_allocated_bytes() - arrow_before
+
+        self.results.append(
+            Result(
+                source=self.source,
+                rows=self.rows,
+                stage=stage,
+                seconds=seconds,
+                rows_per_second=self.rows / seconds if seconds else 0.0,
+                python_peak_bytes=python_peak,
+                arrow_bytes=max(arrow_bytes, 0),
+                output_rows=_count_rows(output),
+            )
+        )
+        return output
+
+
+def run_stripe(rows: int, measure: Recorder) -> None:
+    """Benchmarks the Stripe charges extractor."""
+    client = payloads.stripe_client(rows)
+    start = payloads.START_DATE
+    raw_rows = measure("fetch", stripe_extract.fetch, client, start, start)
+    records = measure("parse", _parse_each, stripe_extract.parse, raw_rows)
+    table = measure("to_table", to_table, records, stripe_extract.SCHEMA)
+    measure(
+        "parse_batch",
+        _parse_raw_rows,
+        stripe_extract.parse_batch,
+        raw_rows,
+        stripe_extract.RAW_SCHEMA,
+    )
+    measure("serialize", _serialize, table)
+
+
+def run_paypal(rows: int, measure: Recorder) -> None:
+    """Benchmarks the PayPal transactions extractor."""
+    client = payloads.paypal_client(rows)
+    start = payloads.START_DATE
+    raw_rows = measure("fetch", paypal_extract.fetch, client, start, start)
+    records = measure("parse", _parse_each, paypal_extract.parse, raw_rows)
+    table = measure("to_table", to_table, records, paypal_extract.SCHEMA)
+    measure(
+        "parse_batch",
+        _parse_raw_rows,
+        paypal_extract.parse_batch,
+        raw_rows,
+        paypal_extract.RAW_SCHEMA,
+    )
+    measure("serialize", _serialize, table)
+
+
+def run_facebook_ads(rows: int, measure: Recorder) -> None:
+    """Benchmarks the Facebook Ads insights extractor."""
+    client = payloads.facebook_ads_client(rows)
+    start = payloads.START_DATE
+    raw_rows = measure("fetch", facebook_ads_extract.fetch, client, start, start)
+    records = measure("parse", _parse_each, facebook_ads_extract.parse, raw_rows)
+    table = measure("to_table", to_table, records, facebook_ads_extract.SCHEMA)
+    measure(
+        "parse_batch",
+        lambda raw: facebook_ads_extract.parse_batch(
+            facebook_ads_extract._to_raw_table(raw)
+        )[0],
+        raw_rows,
+    )
+    measure("serialize", _serialize, table)
+
+
+def run_google_ads(rows: int, measure: Recorder) -> None:
+    """Benchmarks the Google Ads performance extractor."""
+    client = payloads.google_ads_client(rows)
+    raw_rows = measure(
+        "fetch",
+        google_ads_extract.fetch,
+        client,
+        payloads.CUSTOMER_ID,
+        GOOGLE_ADS_QUERY,
+    )
+    records = measure("parse", _parse_each, google_ads_extract.parse, raw_rows)
+    table = measure("to_table", to_table, records, google_ads_extract.SCHEMA)
+    measure(
+        "parse_batch",
+        _parse_raw_rows,
+        google_ads_extract.parse_batch,
+        raw_rows,
+        google_ads_extract.RAW_SCHEMA,
+    )
+    measure("serialize", _serialize, table)
+    measure(
+        "search_stream",
+        _read_stream,
+        google_ads_extract.extract_stream,
+        client,
+        payloads.CUSTOMER_ID,
+        GOOGLE_ADS_QUERY,
+        True,
+    )
+
+
+def run_google_analytics(rows: int, measure: Recorder) -> None:
+    """Benchmarks the GA4 report extractor."""
+    client = payloads.google_analytics_client(rows)
+    config = payloads.REPORT_CONFIG
+    start = payloads.START_DATE
+    raw_rows = measure(
+        "fetch",
+        google_analytics_extract.fetch,
+        client,
+        payloads.PROPERTY_ID,
+        start,
+        start,
+        config,
+    )
+    records = measure(
+        "parse",
+        lambda raw: [google_analytics_extract.parse(r, config) for r in raw],
+        raw_rows,
+    )
+    table = measure("to_table", google_analytics_extract.to_table, records, config)
+    response = client.run_report(
+        google_analytics_extract._build_request(
+            payloads.PROPERTY_ID, start, start, config
+        )
+    )
+    measure(
+        "parse_batch",
+        lambda page: google_analytics_extract.parse_batch(
+            pa.Table.from_batches([google_analytics_extract.decode(page)]),
+            config,
+            google_analytics_extract.metric_types(page),
+        )[0],
+        response,
+    )
+    measure("serialize", _serialize, table)
+    measure(
+        "decode",
+        _read_stream,
+        google_analytics_extract.extract_stream,
+        client,
+        payloads.PROPERTY_ID,
+        start,
+        start,
+        config,
+    )
+
+
+def run_google_sheets(rows: int, measure: Recorder) -> None:
+    """Benchmarks the Google Sheets extractor.
+
+    Sheets has no typed parse_batch path, so only the row-wise parse and
+    the string table conversion are measured after fetch.
+    """
+    client = payloads.google_sheets_client(rows)
+    raw = measure(
+        "fetch",
+        google_sheets_extract.fetch,
+        client,
+        payloads.SPREADSHEET_ID,
+        payloads.SHEET_NAME,
+    )
+    measure("parse", google_sheets_extract.parse, raw)
+    table = measure("to_table", google_sheets_extract.to_table, raw)
+    measure("serialize", _serialize, table)
+
+
+SOURCES: dict[str, Callable[[int, Recorder], None]] = {
+    "stripe": run_stripe,
+    "paypal": run_paypal,
+    "facebook_ads": run_facebook_ads,
+    "google_ads": run_google_ads,
+    "google_analytics": run_google_analytics,
+    "google_sheets": run_google_sheets,
+}
+
+
+def run_benchmarks(
+    row_counts: Sequence[int],
+    sources: Sequence[str],
+    repeat: int = REPEAT,
+) -> list[Result]:
+    """Runs every requested source at every row count."""
+    results = []
+    for rows in row_counts:
+        for source in sources:
+            measure = Recorder(source, rows, repeat)
+            SOURCES[source](rows, measure)
+            results.extend(measure.results)
+    return results
+
+
+def write_results(results: Sequence[Result], path: Path) -> None:
+    """Writes results and run metadata to a JSON file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created_at": datetime.now(tz=UTC).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "pyarrow": pa.__version__,
+        "platform": platform.platform(),
+        "results": [r.model_dump() for r in results],
+    }
+    path.write_text(json.dumps(report, indent=2))
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Parses arguments, runs the benchmarks and writes the JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=ROW_COUNTS)
+    parser.add_argument(
+        "--sources", nargs="+", choices=list(SOURCES), default=list(SOURCES)
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.rows, args.sources, args.repeat)
+    timestamp = datetime.now(tz=UTC).strftime("%Y%m%dT%H%M%SZ")
+    output = args.output or OUTPUT_DIR / f"{timestamp}.json"
+    write_results(results, output)
+
+    for r in results:
+        print(
+            f"{r.source:<17} {r.rows:>9} {r.stage:<12} {r.seconds:>9.4f}s "
+            f"{r.rows_per_second:>12,.0f} rows/s "
+            f"{r.python_peak_bytes / 2**20:>9.1f} MiB py "
+            f"{r.arrow_bytes / 2**20:>9.1f} MiB arrow"
+        )
+    print(f"Wrote {output}", file=sys.stderr)
+
+
+def _parse_each(parse: Callable, raw_rows: list) -> list:
+    """Parses raw rows one at a time."""
+    return [parse(r) for r in raw_rows]
+
+
+def _parse_raw_rows(
+    parse_batch: Callable,
+    raw_rows: list,
+    raw_schema: pa.Schema,
+) -> pa.Table:
+    """Builds the raw table and casts it with the vectorized parser."""
+    table, _ = parse_batch(to_table(raw_rows, raw_schema))
+    return table
+
+
+def _read_stream(extract_stream: Callable, *args: Any) -> pa.Table:
+    """Builds an extractor's BatchStream and reads it into one table."""
+    stream = extract_stream(*args)
+    return pa.Table.from_batches(list(stream))
+
+
+def _count_rows(output: Any) -> int | None:
+    """Returns the row count of a stage output, when it has one."""
+    if isinstance(output, pa.Table):
+        return output.num_rows
+    if isinstance(output, list):
+        return len(output)
+    return None
+
+
+def _git_commit() -> str | None:
+    """Returns the current git commit, if the run is inside a checkout."""
+    completed = subprocess.run(
+        ["git", "rev-parse", "HEAD"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        return None
+    return completed.stdout.strip()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Smoke tests for the offline benchmark suite."""
+
+import json
+
+import pytest
+
+from tests.benchmarks.run import SOURCES, main, run_benchmarks
+
+SMOKE_ROWS = 120
+EXPECTED_STAGES = ["fetch", "parse", "to_table", "parse_batch", "serialize"]
+SHEETS_STAGES = ["fetch", "parse", "to_table", "serialize"]
+STAGES = {
+    "google_ads": [*EXPECTED_STAGES, "search_stream"],
+    "google_analytics": [*EXPECTED_STAGES, "decode"],
+    "google_sheets": SHEETS_STAGES,
+}
+
+
+@pytest.mark.parametrize("source", list(SOURCES))
+def test_run_benchmarks_measures_every_stage(source):
+    """Each source reports every stage in order at the requested row count."""
+    results = run_benchmarks([SMOKE_ROWS], [source], repeat=1)
+
+    expected = STAGES.get(source, EXPECTED_STAGES)
+    assert [r.stage for r in results] == expected
+    assert {r.output_rows for r in results if r.output_rows is not None} == {SMOKE_ROWS}
+
+
+def test_main_writes_json_report(tmp_path):
+    """main() writes run metadata and one result per stage to JSON."""
+    output = tmp_path / "report.json"
+
+    main(
+        [
+            *("--rows", str(SMOKE_ROWS), "--sources", "stripe", "--repeat", "1"),
+            *("--output", str(output)),
+        ]
+    )
+
+    report = json.loads(output.read_text())
+    assert report["pyarrow"]
+    assert len(report["results"]) == len(EXPECTED_STAGES)
+    assert report["results"][0]["rows"] == SMOKE_ROWS
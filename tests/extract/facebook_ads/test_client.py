@@ -0,0 +1,49 @@
+"""Tests for the Facebook Ads API client."""
+
+from facebook_business.api import FacebookAdsApi
+
+from extract.facebook_ads.client import build_client, build_clients
+from extract.facebook_ads.throttle import ThrottledApi
+
+ACCESS_TOKEN = "fake-token"
+AD_ACCOUNT_ID = "act_111111111"
+REGIONAL_AD_ACCOUNT_ID = "act_222222222"
+
+
+def test_build_clients_returns_one_account_per_id():
+    """Each ad account ID gets its own AdAccount."""
+    clients = build_clients(ACCESS_TOKEN, [AD_ACCOUNT_ID, REGIONAL_AD_ACCOUNT_ID])
+
+    assert [c.get_id() for c in clients] == [AD_ACCOUNT_ID, REGIONAL_AD_ACCOUNT_ID]
+
+
+def test_build_clients_share_one_api_instance():
+    """Accounts built together share an API instance, so they can batch."""
+    first, second = build_clients(ACCESS_TOKEN, [AD_ACCOUNT_ID, REGIONAL_AD_ACCOUNT_ID])
+
+    assert first.get_api() is second.get_api()
+
+
+def test_build_client_does_not_set_default_api():
+    """No process-global API is initialized."""
+    FacebookAdsApi.set_default_api(None)
+
+    client = build_client(ACCESS_TOKEN, AD_ACCOUNT_ID)
+
+    assert FacebookAdsApi.get_default_api() is None
+    assert client.get_api() is not None
+
+
+def test_separate_builds_use_separate_api_instances():
+    """Clients built for different tokens never share a session."""
+    first = build_client(ACCESS_TOKEN, AD_ACCOUNT_ID)
+    second = build_client("other-token", AD_ACCOUNT_ID)
+
+    assert first.get_api() is not second.get_api()
+
+
+def test_build_client_paces_calls_with_throttled_api():
+    """Clients send their calls through a throttled API."""
+    client = build_client(ACCESS_TOKEN, AD_ACCOUNT_ID)
+
+    assert isinstance(client.get_api(), ThrottledApi)
@@ -5,16 +5,27 @@ from unittest.mock import MagicMock, patch
 
 import pyarrow as pa
 import pytest
+from facebook_business.exceptions import FacebookRequestError
 from pydantic import ValidationError
 
 from extract.facebook_ads.extract import (
+    ACTION_COLUMNS,
+    ASYNC_PAGE_LIMIT,
+    BATCH_REQUEST_LIMIT,
+    POLL_MAX_INTERVAL_SECONDS,
+    SCHEMA,
     Action,
     Raw,
     Record,
     _to_raw,
+    _to_raw_table,
     extract,
+    extract_stream,
     fetch,
+    fetch_batches,
     parse,
+    parse_batch,
+    schema,
 )
 from extract.table import to_table
 
@@ -22,9 +33,55 @@ START_DATE = date(2024, 1, 15)
 END_DATE = date(2024, 1, 15)
 START_DATE_STR = "2024-01-15"
 CAMPAIGN_ID = "123456789"
+AD_ACCOUNT_ID = "111111111"
 CAMPAIGN_NAME = "ABI Spring Enrollment"
 EXPECTED_ROW_COUNT = 2
-EXPECTED_COLUMN_COUNT = 11
+EXPECTED_COLUMN_COUNT = 12
+REPORT_RUN_ID = "6000000000001"
+RUNNING_POLLS = 6
+REGIONAL_ACCOUNT_ID = "222222222"
+MANY_ACCOUNTS = 120
+AFTER_CURSOR = "cursor-after"
+CUSTOM_ACTION_COLUMNS = {
+    "video_views": "video_view",
+    "leads": "lead",
+    "add_to_carts": "offsite_conversion.fb_pixel_add_to_cart",
+}
+EXPECTED_VIDEO_VIEWS = 12
+EXPECTED_ADDS_TO_CART = 4
+
+
+SUB_RESPONSE_HEADERS = [
+    {"name": "X-Ad-Account-Usage", "value": '{"acc_id_util_pct": 40}'}
+]
+
+
+class _FakeBatch:
+    """Graph API batch that answers each queued sub-request from a body."""
+
+    def __init__(self, sent: list) -> None:
+        """Registers the batch in the list of sent batches."""
+        self.requests: list[tuple] = []
+        sent.append(self)
+
+    def add(self, success, failure, body: dict | Exception) -> None:
+        """Queues a sub-request with its callbacks and canned answer."""
+        self.requests.append((success, failure, body))
+
+    def execute(self) -> None:
+        """Answers every sub-request through its callback."""
+        for success, failure, body in self.requests:
+            response = MagicMock()
+            response.is_success.return_value = not isinstance(body, Exception)
+            if isinstance(body, Exception):
+                response.error.return_value = body
+                failure(response)
+            else:
+                response.json.return_value = body
+                response.headers.return_value = SUB_RESPONSE_HEADERS
+                success(response)
+
+
 EXPECTED_IMPRESSIONS = 1000
 EXPECTED_CLICKS = 50
 EXPECTED_SPEND = 25.50
@@ -48,6 +105,7 @@ SAMPLE_ACTIONS_DICTS = [
 
 RAW_ROW_1 = Raw(
     date_start=START_DATE_STR,
+    account_id=AD_ACCOUNT_ID,
     campaign_id=CAMPAIGN_ID,
     campaign_name=CAMPAIGN_NAME,
     impressions="1000",
@@ -60,6 +118,7 @@ RAW_ROW_1 = Raw(
 
 RAW_ROW_2 = Raw(
     date_start="2024-01-16",
+    account_id=AD_ACCOUNT_ID,
     campaign_id="987654321",
     campaign_name="ABI Summer Enrollment",
     impressions="2000",
@@ -72,6 +131,7 @@ RAW_ROW_2 = Raw(
 
 API_ROW_1 = {
     "date_start": START_DATE_STR,
+    "account_id": AD_ACCOUNT_ID,
     "campaign_id": CAMPAIGN_ID,
     "campaign_name": CAMPAIGN_NAME,
     "impressions": "1000",
@@ -84,6 +144,7 @@ API_ROW_1 = {
 
 API_ROW_2 = {
     "date_start": "2024-01-16",
+    "account_id": AD_ACCOUNT_ID,
     "campaign_id": "987654321",
     "campaign_name": "ABI Summer Enrollment",
     "impressions": "2000",
@@ -118,7 +179,7 @@ def mock_client():
 def test_extract_composes_fetch_parse_to_table(raw_rows):
     """Result matches manually composing fetch, parse, and to_table."""
     parsed = [parse(r) for r in raw_rows]
-    expected = to_table(parsed)
+    expected = to_table(parsed, SCHEMA)
 
     with patch("extract.facebook_ads.extract.fetch", return_value=raw_rows):
         result = extract(MagicMock(), START_DATE, END_DATE)
@@ -149,6 +210,292 @@ def test_fetch_calls_get_insights_with_correct_params(mock_client):
     assert call_params["time_range"]["until"] == START_DATE_STR
 
 
+def _report_job(polls: list[tuple[str, int]], rows: list[dict]) -> MagicMock:
+    """Async report job that reports the next (status, percent) per poll."""
+    job = MagicMock()
+    job.get_id.return_value = REPORT_RUN_ID
+    state = {}
+    remaining = iter(polls)
+
+    def api_get(fields: list) -> MagicMock:
+        status, percent = next(remaining)
+        state["async_status"] = status
+        state["async_percent_completion"] = percent
+        return job
+
+    job.api_get.side_effect = api_get
+    job.__getitem__.side_effect = state.__getitem__
+    job.get_result.return_value = rows
+    return job
+
+
+@pytest.fixture
+def async_client():
+    """Client whose async report job completes on the third poll."""
+    job = _report_job(
+        [("Job Not Started", 0), ("Job Running", 50), ("Job Completed", 100)],
+        [API_ROW_1, API_ROW_2],
+    )
+    client = MagicMock()
+    client.get_insights.return_value = job
+    return client
+
+
+@pytest.fixture
+def sleeps():
+    """Records poll sleeps instead of waiting."""
+    with patch("extract.facebook_ads.extract.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+def test_fetch_async_submits_report_job(async_client, sleeps):
+    """Async mode submits the insights request as a report job."""
+    fetch(async_client, START_DATE, END_DATE, async_report=True)
+
+    assert async_client.get_insights.call_args.kwargs["is_async"] is True
+
+
+def test_fetch_async_pages_results_with_large_limit(async_client, sleeps):
+    """Completed report results are paged ASYNC_PAGE_LIMIT rows at a time."""
+    result = fetch(async_client, START_DATE, END_DATE, async_report=True)
+
+    job = async_client.get_insights.return_value
+    job.get_result.assert_called_once_with(params={"limit": ASYNC_PAGE_LIMIT})
+    assert len(result) == EXPECTED_ROW_COUNT
+
+
+def test_fetch_async_matches_sync_fetch(async_client, mock_client, sleeps):
+    """Async and synchronous fetches return the same rows."""
+    async_rows = fetch(async_client, START_DATE, END_DATE, async_report=True)
+
+    assert async_rows == fetch(mock_client, START_DATE, END_DATE)
+
+
+def test_fetch_batches_async_streams_report_rows(async_client, sleeps):
+    """Async report rows are streamed as raw record batches."""
+    batches = list(fetch_batches(async_client, START_DATE, END_DATE, True))
+
+    assert sum(b.num_rows for b in batches) == EXPECTED_ROW_COUNT
+
+
+def test_fetch_async_polls_until_complete(async_client, sleeps):
+    """The job is polled until completed, sleeping between polls."""
+    fetch(async_client, START_DATE, END_DATE, async_report=True)
+
+    job = async_client.get_insights.return_value
+    assert job.api_get.call_count == len(sleeps.call_args_list) + 1
+
+
+def test_fetch_async_backs_off_between_polls(sleeps):
+    """Poll intervals double and are capped."""
+    running = [("Job Running", 10)] * RUNNING_POLLS
+    client = MagicMock()
+    client.get_insights.return_value = _report_job(
+        [*running, ("Job Completed", 100)], []
+    )
+
+    fetch(client, START_DATE, END_DATE, async_report=True)
+
+    intervals = [c.args[0] for c in sleeps.call_args_list]
+    assert intervals == sorted(intervals)
+    assert intervals[1] == 2 * intervals[0]
+    assert max(intervals) <= POLL_MAX_INTERVAL_SECONDS
+
+
+def test_fetch_async_waits_for_full_completion(sleeps):
+    """A completed status below 100 percent is polled again."""
+    client = MagicMock()
+    client.get_insights.return_value = _report_job(
+        [("Job Completed", 99), ("Job Completed", 100)], []
+    )
+
+    fetch(client, START_DATE, END_DATE, async_report=True)
+
+    assert sleeps.call_count == 1
+
+
+def test_fetch_async_failed_job_raises(sleeps):
+    """A failed report job raises RuntimeError naming the job."""
+    client = MagicMock()
+    client.get_insights.return_value = _report_job([("Job Failed", 20)], [])
+
+    with pytest.raises(RuntimeError, match=REPORT_RUN_ID):
+        fetch(client, START_DATE, END_DATE, async_report=True)
+
+
+def test_fetch_async_times_out(sleeps):
+    """A job still running past the poll timeout raises TimeoutError."""
+    client = MagicMock()
+    client.get_insights.return_value = _report_job([("Job Running", 10)] * 2, [])
+
+    with (
+        patch("extract.facebook_ads.extract.POLL_TIMEOUT_SECONDS", 0.0),
+        pytest.raises(TimeoutError, match=REPORT_RUN_ID),
+    ):
+        fetch(client, START_DATE, END_DATE, async_report=True)
+
+
+def _batch_accounts(
+    rows_by_account: dict[str, list[dict]],
+    first_page: dict | None = None,
+) -> tuple[list[MagicMock], list[_FakeBatch]]:
+    """Accounts sharing one fake API whose batches are recorded."""
+    sent: list[_FakeBatch] = []
+    api = MagicMock()
+    api.new_batch.side_effect = lambda: _FakeBatch(sent)
+
+    def account(account_id: str, rows: list[dict]) -> MagicMock:
+        def get_insights(fields, params, is_async=False, **kwargs):
+            batch = kwargs.get("batch")
+            if batch is None:
+                return iter(rows)
+            body = first_page or {"data": rows}
+            if is_async:
+                body = {"report_run_id": f"run-{account_id}"}
+            batch.add(kwargs["success"], kwargs["failure"], body)
+            return None
+
+        client = MagicMock()
+        client.get_api_assured.return_value = api
+        client.get_insights.side_effect = get_insights
+        return client
+
+    accounts = [account(i, rows) for i, rows in rows_by_account.items()]
+    return accounts, sent
+
+
+def _account_row(account_id: str) -> dict:
+    """API row for the given ad account."""
+    return {**API_ROW_1, "account_id": account_id}
+
+
+def test_fetch_multiple_accounts_merges_rows():
+    """Rows from every account are returned with their ad account ID."""
+    accounts, _ = _batch_accounts(
+        {
+            AD_ACCOUNT_ID: [_account_row(AD_ACCOUNT_ID)],
+            REGIONAL_ACCOUNT_ID: [_account_row(REGIONAL_ACCOUNT_ID)],
+        }
+    )
+
+    result = fetch(accounts, START_DATE, END_DATE)
+
+    assert [r.account_id for r in result] == [AD_ACCOUNT_ID, REGIONAL_ACCOUNT_ID]
+
+
+def test_fetch_multiple_accounts_sends_one_batch():
+    """Insights for several accounts go out in a single batch call."""
+    accounts, sent = _batch_accounts(
+        {AD_ACCOUNT_ID: [API_ROW_1], REGIONAL_ACCOUNT_ID: [API_ROW_2]}
+    )
+
+    fetch(accounts, START_DATE, END_DATE)
+
+    assert [len(b.requests) for b in sent] == [2]
+
+
+def test_fetch_batches_at_most_50_requests_per_call():
+    """Accounts are split into batches of BATCH_REQUEST_LIMIT."""
+    accounts, sent = _batch_accounts({str(i): [] for i in range(MANY_ACCOUNTS)})
+
+    fetch(accounts, START_DATE, END_DATE)
+
+    sizes = [len(b.requests) for b in sent]
+    assert sizes == [BATCH_REQUEST_LIMIT, BATCH_REQUEST_LIMIT, 20]
+
+
+def test_fetch_multiple_accounts_follows_next_page():
+    """An account with more rows pages on from its after cursor."""
+    first_page = {
+        "data": [API_ROW_1],
+        "paging": {"cursors": {"after": AFTER_CURSOR}, "next": "https://next"},
+    }
+    accounts, _ = _batch_accounts(
+        {AD_ACCOUNT_ID: [API_ROW_2], REGIONAL_ACCOUNT_ID: [API_ROW_2]}, first_page
+    )
+
+    result = fetch(accounts, START_DATE, END_DATE)
+
+    params = accounts[0].get_insights.call_args.kwargs["params"]
+    assert params["after"] == AFTER_CURSOR
+    assert len(result) == 2 * EXPECTED_ROW_COUNT
+
+
+def test_fetch_multiple_accounts_records_sub_response_usage():
+    """Each successful sub-response's usage headers reach the throttler."""
+    accounts, _ = _batch_accounts(
+        {AD_ACCOUNT_ID: [API_ROW_1], REGIONAL_ACCOUNT_ID: [API_ROW_2]}
+    )
+
+    fetch(accounts, START_DATE, END_DATE)
+
+    record = accounts[0].get_api_assured().throttler.record
+    headers = [c.args[0] for c in record.call_args_list]
+    assert headers == [SUB_RESPONSE_HEADERS] * len(accounts)
+
+
+def test_fetch_multiple_accounts_raises_failed_request():
+    """A failed sub-request raises its Graph API error."""
+    accounts, _ = _batch_accounts(
+        {AD_ACCOUNT_ID: [], REGIONAL_ACCOUNT_ID: []},
+        first_page=RuntimeError("account disabled"),
+    )
+
+    with pytest.raises(RuntimeError, match="account disabled"):
+        fetch(accounts, START_DATE, END_DATE)
+
+
+def test_fetch_multiple_accounts_resends_throttled_request():
+    """A rate-limited sub-request is resent after the throttler pauses."""
+    accounts, sent = _batch_accounts(
+        {AD_ACCOUNT_ID: [API_ROW_1], REGIONAL_ACCOUNT_ID: [API_ROW_2]}
+    )
+    get_insights = accounts[1].get_insights.side_effect
+    throttled = FacebookRequestError(
+        "limit", {}, 400, {}, '{"error": {"code": 80000, "message": "limit"}}'
+    )
+
+    def throttle_once(fields, params, **kwargs):
+        if len(sent) == 1:
+            kwargs["batch"].add(kwargs["success"], kwargs["failure"], throttled)
+            return None
+        return get_insights(fields, params, **kwargs)
+
+    accounts[1].get_insights.side_effect = throttle_once
+
+    result = fetch(accounts, START_DATE, END_DATE)
+
+    assert [len(b.requests) for b in sent] == [2, 1]
+    accounts[0].get_api_assured().throttler.pause.assert_called_once()
+    assert len(result) == EXPECTED_ROW_COUNT
+
+
+def test_fetch_async_multiple_accounts_batches_submit_and_polls(sleeps):
+    """Report jobs are submitted and polled in batches, then paged each."""
+    accounts, sent = _batch_accounts({AD_ACCOUNT_ID: [], REGIONAL_ACCOUNT_ID: []})
+    jobs = {}
+
+    def report_run(report_run_id: str, api: MagicMock) -> MagicMock:
+        job = MagicMock()
+        job.get_id.return_value = report_run_id
+        job.get_api_assured.return_value = api
+        job.api_get.side_effect = lambda fields, batch, success, failure: batch.add(
+            success,
+            failure,
+            {"async_status": "Job Completed", "async_percent_completion": 100},
+        )
+        job.get_result.return_value = [_account_row(report_run_id)]
+        jobs[report_run_id] = job
+        return job
+
+    with patch("extract.facebook_ads.extract.AdReportRun", side_effect=report_run):
+        result = fetch(accounts, START_DATE, END_DATE, async_report=True)
+
+    assert [len(b.requests) for b in sent] == [2, 2]
+    assert set(jobs) == {f"run-{AD_ACCOUNT_ID}", f"run-{REGIONAL_ACCOUNT_ID}"}
+    assert [r.account_id for r in result] == list(jobs)
+
+
 def test_fetch_returns_list_of_raw(mock_client):
     """Returns a list of Raw instances."""
     result = fetch(mock_client, START_DATE, END_DATE)
@@ -231,6 +578,7 @@ def test_record_date_validator_accepts_date_object():
     existing_date = date(2024, 1, 15)
     record = Record(
         date=existing_date,
+        ad_account_id=AD_ACCOUNT_ID,
         campaign_id=CAMPAIGN_ID,
         campaign_name=CAMPAIGN_NAME,
         impressions=EXPECTED_IMPRESSIONS,
@@ -250,6 +598,7 @@ def test_record_invalid_date_raises():
     with pytest.raises(ValidationError):
         Record(
             date="not-a-date",  # ty: ignore[invalid-argument-type]
+            ad_account_id=AD_ACCOUNT_ID,
             campaign_id=CAMPAIGN_ID,
             campaign_name=CAMPAIGN_NAME,
             impressions=EXPECTED_IMPRESSIONS,
@@ -295,15 +644,16 @@ def test_to_raw_returns_raw_instance():
 
 def test_to_table_column_count(records):
     """Table has correct number of columns."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.num_columns == EXPECTED_COLUMN_COUNT
 
 
 def test_to_table_column_names(records):
     """Table contains expected column names."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert set(result.column_names) == {
         "date",
+        "ad_account_id",
         "campaign_id",
         "campaign_name",
         "impressions",
@@ -318,31 +668,158 @@ def test_to_table_column_names(records):
 
 
 def test_to_table_date_values_correct(records):
-    """Date column contains correct ISO format values."""
-    result = to_table(records)
-    assert result.column("date").to_pylist() == ["2024-01-15", "2024-01-16"]
+    """Date column contains typed date values."""
+    result = to_table(records, SCHEMA)
+    assert result.column("date").to_pylist() == [date(2024, 1, 15), date(2024, 1, 16)]
 
 
 def test_to_table_empty_records_returns_empty_table():
     """Empty records list returns empty table."""
-    result = to_table([])
+    result = to_table([], SCHEMA)
     assert isinstance(result, pa.Table)
     assert result.num_rows == 0
 
 
 def test_to_table_returns_pyarrow_table(records):
     """Returns a pa.Table instance."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert isinstance(result, pa.Table)
 
 
 def test_to_table_row_count(records):
     """Table has one row per record."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.num_rows == EXPECTED_ROW_COUNT
 
 
 def test_to_table_spend_values_correct(records):
     """Spend column contains correct float values."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.column("spend_usd").to_pylist() == [EXPECTED_SPEND, 50.00]
+
+
+def test_schema_matches_record_fields():
+    """SCHEMA declares one column per Record field, in order."""
+    assert SCHEMA.names == list(Record.model_fields)
+
+
+def test_parse_batch_matches_row_parse(raw_rows):
+    """Vectorized parsing produces the same table as row-by-row parsing."""
+    expected = to_table([parse(r) for r in raw_rows], SCHEMA)
+
+    table, rejects = parse_batch(_to_raw_table(raw_rows))
+
+    assert table.equals(expected)
+    assert rejects.num_rows == 0
+
+
+def test_parse_batch_routes_bad_action_value_to_rejects():
+    """An unparseable action value rejects the row."""
+    bad_row = RAW_ROW_1.model_copy(
+        update={"actions": [Action(action_type="lead", value="many")]}
+    )
+
+    table, rejects = parse_batch(_to_raw_table([bad_row, RAW_ROW_2]))
+
+    assert table.num_rows == 1
+    assert rejects.column("reason").to_pylist() == ["invalid leads"]
+
+
+def test_parse_batch_truncates_fractional_action_values():
+    """Fractional action values are truncated like int(float(v))."""
+    row = RAW_ROW_2.model_copy(
+        update={"actions": [Action(action_type="link_click", value="2.7")]}
+    )
+
+    table, _ = parse_batch(_to_raw_table([row]))
+
+    assert table.column("link_clicks").to_pylist() == [2]
+
+
+def test_schema_appends_one_count_per_action_column():
+    """schema() adds an int64 column per action column, in order."""
+    result = schema(CUSTOM_ACTION_COLUMNS)
+
+    assert result.names[-len(CUSTOM_ACTION_COLUMNS) :] == list(CUSTOM_ACTION_COLUMNS)
+    assert result.field("video_views").type == pa.int64()
+
+
+def test_default_schema_uses_default_action_columns():
+    """SCHEMA ends with the default action columns."""
+    assert SCHEMA.names[-len(ACTION_COLUMNS) :] == list(ACTION_COLUMNS)
+
+
+def test_parse_batch_pivots_configured_action_types():
+    """Each configured action type becomes its own count column."""
+    row = RAW_ROW_1.model_copy(
+        update={
+            "actions": [
+                *SAMPLE_ACTIONS,
+                Action(action_type="video_view", value="12"),
+                Action(
+                    action_type="offsite_conversion.fb_pixel_add_to_cart", value="4"
+                ),
+            ]
+        }
+    )
+
+    table, rejects = parse_batch(_to_raw_table([row, RAW_ROW_2]), CUSTOM_ACTION_COLUMNS)
+
+    assert table.schema == schema(CUSTOM_ACTION_COLUMNS)
+    assert table.column("video_views").to_pylist() == [EXPECTED_VIDEO_VIEWS, 0]
+    assert table.column("leads").to_pylist() == [EXPECTED_LEADS, 0]
+    assert table.column("add_to_carts").to_pylist() == [EXPECTED_ADDS_TO_CART, 0]
+    assert "link_clicks" not in table.column_names
+    assert rejects.num_rows == 0
+
+
+def test_parse_batch_fills_every_column_of_a_shared_action_type():
+    """Two columns counting the same action type get the same counts."""
+    row = RAW_ROW_1.model_copy(
+        update={"actions": [Action(action_type="video_view", value="12")]}
+    )
+    columns = {"video_views": "video_view", "views": "video_view"}
+
+    table, _ = parse_batch(_to_raw_table([row, RAW_ROW_2]), columns)
+
+    assert table.column("video_views").to_pylist() == [EXPECTED_VIDEO_VIEWS, 0]
+    assert table.column("views").to_pylist() == [EXPECTED_VIDEO_VIEWS, 0]
+
+
+def test_parse_batch_last_duplicate_action_wins():
+    """A repeated action type keeps its last value, like parse()."""
+    row = RAW_ROW_2.model_copy(
+        update={
+            "actions": [
+                Action(action_type="lead", value="1"),
+                Action(action_type="lead", value="3"),
+            ]
+        }
+    )
+
+    table, _ = parse_batch(_to_raw_table([row]))
+
+    assert table.column("leads").to_pylist() == [EXPECTED_LEADS]
+
+
+def test_parse_batch_ignores_unconfigured_bad_action_value():
+    """An unparseable value of an untracked action type is not a reject."""
+    row = RAW_ROW_2.model_copy(
+        update={"actions": [Action(action_type="video_view", value="many")]}
+    )
+
+    table, rejects = parse_batch(_to_raw_table([row]))
+
+    assert table.num_rows == 1
+    assert rejects.num_rows == 0
+
+
+def test_extract_stream_uses_configured_action_columns(mock_client):
+    """extract_stream parses batches with the given action columns."""
+    stream = extract_stream(
+        mock_client, START_DATE, END_DATE, action_columns=CUSTOM_ACTION_COLUMNS
+    )
+
+    batches = list(stream)
+
+    assert batches[0].schema == schema(CUSTOM_ACTION_COLUMNS)
@@ -0,0 +1,197 @@
+"""Tests for Facebook Marketing API throttling."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from facebook_business.api import FacebookAdsApi, FacebookSession
+from facebook_business.exceptions import FacebookRequestError
+
+from extract.facebook_ads.throttle import (
+    ACCOUNT_USAGE_HEADER,
+    BUSINESS_USAGE_HEADER,
+    MAX_PACE_SECONDS,
+    THROTTLE_PAUSE_SECONDS,
+    THROTTLE_RETRIES,
+    ThrottledApi,
+    Throttler,
+    is_throttled,
+    parse_usage,
+)
+
+BUSINESS_ID = "1234567890"
+HIGH_USAGE_PCT = 95
+LOW_USAGE_PCT = 20
+REGAIN_MINUTES = 3
+RESET_SECONDS = 120
+THROTTLED_CODE = 80000
+OTHER_ERROR_CODE = 100
+TWO_CALLS = 2
+
+
+def _business_usage(call_count: int, cputime: int = 0, regain: int = 0) -> str:
+    """Builds an x-business-use-case-usage header value."""
+    entry = {
+        "type": "ads_insights",
+        "call_count": call_count,
+        "total_cputime": cputime,
+        "total_time": 0,
+        "estimated_time_to_regain_access": regain,
+    }
+    return json.dumps({BUSINESS_ID: [entry]})
+
+
+def _account_usage(percent: float, reset: int = 0) -> str:
+    """Builds an x-ad-account-usage header value."""
+    return json.dumps({"acc_id_util_pct": percent, "reset_time_duration": reset})
+
+
+def _error(code: int, headers: dict | None = None) -> FacebookRequestError:
+    """Builds a Graph API error with the given code."""
+    body = json.dumps({"error": {"code": code, "message": "error"}})
+    return FacebookRequestError("error", {}, 400, headers or {}, body)
+
+
+@pytest.fixture
+def clock():
+    """Frozen monotonic clock that advances only when sleep is called."""
+    now = [1000.0]
+    sleep = MagicMock(side_effect=lambda seconds: now.__setitem__(0, now[0] + seconds))
+    with (
+        patch("extract.facebook_ads.throttle.time.monotonic", lambda: now[0]),
+        patch("extract.facebook_ads.throttle.time.sleep", sleep),
+    ):
+        yield sleep
+
+
+def test_parse_usage_takes_highest_business_percentage():
+    """The highest of call count, CPU time and total time wins."""
+    headers = {BUSINESS_USAGE_HEADER: _business_usage(LOW_USAGE_PCT, HIGH_USAGE_PCT)}
+
+    assert parse_usage(headers).percent == HIGH_USAGE_PCT
+
+
+def test_parse_usage_converts_regain_minutes_to_seconds():
+    """estimated_time_to_regain_access is given in minutes."""
+    headers = {BUSINESS_USAGE_HEADER: _business_usage(100, regain=REGAIN_MINUTES)}
+
+    assert parse_usage(headers).reset_seconds == REGAIN_MINUTES * 60
+
+
+def test_parse_usage_reads_ad_account_header():
+    """The ad account utilization and reset duration are read."""
+    headers = {ACCOUNT_USAGE_HEADER: _account_usage(HIGH_USAGE_PCT, RESET_SECONDS)}
+
+    usage = parse_usage(headers)
+
+    assert usage.percent == HIGH_USAGE_PCT
+    assert usage.reset_seconds == RESET_SECONDS
+
+
+def test_parse_usage_accepts_batch_header_pairs():
+    """Batch sub-response headers arrive as name/value pairs."""
+    headers = [{"name": "X-Ad-Account-Usage", "value": _account_usage(LOW_USAGE_PCT)}]
+
+    assert parse_usage(headers).percent == LOW_USAGE_PCT
+
+
+def test_parse_usage_without_headers_is_zero():
+    """Missing usage headers mean no usage."""
+    usage = parse_usage(None)
+
+    assert usage.percent == 0
+    assert usage.reset_seconds == 0
+
+
+def test_is_throttled_matches_rate_limit_codes():
+    """Rate-limit codes are throttling, other errors are not."""
+    assert is_throttled(_error(THROTTLED_CODE))
+    assert not is_throttled(_error(OTHER_ERROR_CODE))
+
+
+def test_throttler_does_not_wait_at_low_usage(clock):
+    """Calls go out back to back while usage is low."""
+    throttler = Throttler()
+    throttler.record({ACCOUNT_USAGE_HEADER: _account_usage(LOW_USAGE_PCT)})
+
+    throttler.wait()
+    throttler.wait()
+
+    clock.assert_not_called()
+
+
+def test_throttler_spaces_calls_at_high_usage(clock):
+    """Near the limit, consecutive calls are spaced out."""
+    throttler = Throttler()
+    throttler.record({ACCOUNT_USAGE_HEADER: _account_usage(HIGH_USAGE_PCT)})
+
+    throttler.wait()
+    throttler.wait()
+
+    gap = clock.call_args.args[0]
+    assert 0 < gap < MAX_PACE_SECONDS
+
+
+def test_throttler_pauses_until_reset_at_full_usage(clock):
+    """At full usage no call goes out until the announced reset."""
+    throttler = Throttler()
+    throttler.record({ACCOUNT_USAGE_HEADER: _account_usage(100, RESET_SECONDS)})
+
+    throttler.wait()
+
+    clock.assert_called_once_with(RESET_SECONDS)
+
+
+def test_throttler_pause_falls_back_without_reset_time(clock):
+    """A throttled response without a reset time waits the default pause."""
+    throttler = Throttler()
+    throttler.pause({})
+
+    throttler.wait()
+
+    clock.assert_called_once_with(THROTTLE_PAUSE_SECONDS)
+
+
+def test_throttled_api_retries_after_rate_limit(clock):
+    """A throttled call pauses until reset and is retried."""
+    headers = {ACCOUNT_USAGE_HEADER: _account_usage(100, RESET_SECONDS)}
+    response = MagicMock()
+    response.headers.return_value = {}
+    api = ThrottledApi(FacebookSession(access_token="token"))
+
+    with patch.object(
+        FacebookAdsApi, "call", side_effect=[_error(THROTTLED_CODE, headers), response]
+    ) as mock_call:
+        result = api.call("GET", ("act_1", "insights"))
+
+    assert result is response
+    assert mock_call.call_count == TWO_CALLS
+    clock.assert_called_once_with(RESET_SECONDS)
+
+
+def test_throttled_api_raises_other_errors(clock):
+    """Errors other than rate limits are raised at once."""
+    api = ThrottledApi(FacebookSession(access_token="token"))
+
+    with (
+        patch.object(FacebookAdsApi, "call", side_effect=_error(OTHER_ERROR_CODE)),
+        pytest.raises(FacebookRequestError),
+    ):
+        api.call("GET", ("act_1", "insights"))
+
+    clock.assert_not_called()
+
+
+def test_throttled_api_gives_up_after_retries(clock):
+    """A call still throttled after THROTTLE_RETRIES retries raises."""
+    api = ThrottledApi(FacebookSession(access_token="token"))
+
+    with (
+        patch.object(
+            FacebookAdsApi, "call", side_effect=_error(THROTTLED_CODE)
+        ) as mock_call,
+        pytest.raises(FacebookRequestError),
+    ):
+        api.call("GET", ("act_1", "insights"))
+
+    assert mock_call.call_count == THROTTLE_RETRIES + 1
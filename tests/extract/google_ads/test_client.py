@@ -0,0 +1,47 @@
+"""Tests for the Google Ads API client."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from google.ads.googleads.v25.services.types.google_ads_service import (
+    GoogleAdsRow,
+    SearchGoogleAdsStreamResponse,
+)
+
+from extract.google_ads.client import (
+    CUSTOMER_CLIENTS_QUERY,
+    list_customers,
+)
+
+MANAGER_ID = "9999999999"
+CHILD_IDS = ["1111111111", "2222222222"]
+
+
+def _customer_response(ids: list[str]) -> SearchGoogleAdsStreamResponse:
+    """Builds a SearchStream response of customer_client rows."""
+    rows = []
+    for customer_id in ids:
+        row = GoogleAdsRow()
+        row.customer_client.id = int(customer_id)
+        rows.append(row)
+    return SearchGoogleAdsStreamResponse(results=rows)
+
+
+@pytest.fixture
+def client():
+    """Google Ads client whose customer_client query returns CHILD_IDS."""
+    fake = MagicMock()
+    fake.get_service.return_value.search_stream.return_value = [
+        _customer_response(CHILD_IDS)
+    ]
+    return fake
+
+
+def test_list_customers_queries_customer_clients(client):
+    """One customer_client query under the customer lists its accounts."""
+    result = list_customers(client, MANAGER_ID)
+
+    assert result == CHILD_IDS
+    client.get_service.return_value.search_stream.assert_called_once_with(
+        customer_id=MANAGER_ID, query=CUSTOMER_CLIENTS_QUERY
+    )
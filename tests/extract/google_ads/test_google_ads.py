@@ -1,21 +1,32 @@
 """Tests for Google Ads extraction."""
 
+import time
 from datetime import date
 from unittest.mock import MagicMock, patch
 
 import pyarrow as pa
 import pytest
+from google.ads.googleads.v25.services.types.google_ads_service import (
+    GoogleAdsRow,
+    SearchGoogleAdsStreamResponse,
+)
 from pydantic import ValidationError
 
 from extract.google_ads.extract import (
+    RAW_SCHEMA,
+    SCHEMA,
     Raw,
     Record,
     _flatten_row,
+    _stream_batches,
     _to_raw,
     extract,
+    extract_stream,
     fetch,
     parse,
+    parse_batch,
 )
+from extract.google_ads.query import compile_query
 from extract.table import to_table
 
 CUSTOMER_ID = "1234567890"
@@ -26,6 +37,16 @@ EXPECTED_CLICKS = 10
 EXPECTED_IMPRESSIONS = 100
 EXPECTED_COST_MICROS = 1500000
 EXPECTED_CONVERSIONS = 2.0
+STREAM_QUERY = """
+    SELECT
+        segments.date,
+        metrics.clicks,
+        metrics.impressions,
+        metrics.cost_micros,
+        metrics.conversions
+    FROM customer
+    WHERE segments.date = '2024-01-15'
+"""
 
 RAW_ROW_1 = Raw(
     date="2024-01-15",
@@ -121,7 +142,7 @@ def test_extract_composes_fetch_parse_to_table(mock_client):
     ):
         raw_rows = fetch(mock_client, CUSTOMER_ID, QUERY)
         parsed = [parse(r) for r in raw_rows]
-        expected = to_table(parsed)
+        expected = to_table(parsed, SCHEMA)
 
     with patch(
         "extract.google_ads.extract.MessageToDict",
@@ -342,9 +363,18 @@ def test_to_raw_maps_fields_correctly():
     assert result.customer_id == CUSTOMER_ID
 
 
+def test_to_raw_stringifies_float_conversions():
+    """Conversions rendered as a float by MessageToDict become a string."""
+    row_dict = {**FLAT_DICT_1, "metrics.conversions": EXPECTED_CONVERSIONS}
+
+    result = _to_raw(row_dict, CUSTOMER_ID)
+
+    assert result.conversions == "2.0"
+
+
 def test_to_raw_missing_key_raises():
-    """Missing expected key raises KeyError."""
-    incomplete_dict = {"segments.date": "2024-01-15"}
+    """A missing date segment raises KeyError."""
+    incomplete_dict = {"metrics.clicks": "10"}
 
     with pytest.raises(KeyError):
         _to_raw(incomplete_dict, CUSTOMER_ID)
@@ -359,35 +389,35 @@ def test_to_raw_returns_raw_instance():
 
 def test_to_table_clicks_values_correct(records):
     """Clicks column contains correct integer values."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
 
     assert result.column("clicks").to_pylist() == [EXPECTED_CLICKS, 20]
 
 
 def test_to_table_column_count(records):
     """Table has correct number of columns."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
 
     assert result.num_columns == EXPECTED_COLUMN_COUNT
 
 
 def test_to_table_cost_micros_values_correct(records):
     """Cost micros column contains correct integer values."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
 
     assert result.column("cost_micros").to_pylist() == [EXPECTED_COST_MICROS, 3000000]
 
 
 def test_to_table_date_values_correct(records):
-    """Date column contains correct ISO format values."""
-    result = to_table(records)
+    """Date column contains typed date values."""
+    result = to_table(records, SCHEMA)
 
-    assert result.column("date").to_pylist() == ["2024-01-15", "2024-01-16"]
+    assert result.column("date").to_pylist() == [date(2024, 1, 15), date(2024, 1, 16)]
 
 
 def test_to_table_empty_records_returns_empty_table():
     """Empty records list returns empty table."""
-    result = to_table([])
+    result = to_table([], SCHEMA)
 
     assert isinstance(result, pa.Table)
     assert result.num_rows == 0
@@ -395,13 +425,211 @@ def test_to_table_empty_records_returns_empty_table():
 
 def test_to_table_returns_pyarrow_table(records):
     """Returns a pa.Table instance."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
 
     assert isinstance(result, pa.Table)
 
 
 def test_to_table_row_count(records):
     """Table has one row per record."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
 
     assert result.num_rows == EXPECTED_ROW_COUNT
+
+
+def test_schema_matches_record_fields():
+    """SCHEMA declares one column per Record field, in order."""
+    assert SCHEMA.names == list(Record.model_fields)
+
+
+def test_parse_batch_matches_row_parse(raw_rows):
+    """Vectorized parsing produces the same table as row-by-row parsing."""
+    expected = to_table([parse(r) for r in raw_rows], SCHEMA)
+
+    table, rejects = parse_batch(to_table(raw_rows, RAW_SCHEMA))
+
+    assert table.equals(expected)
+    assert rejects.num_rows == 0
+
+
+def test_parse_batch_routes_bad_rows_to_rejects():
+    """A malformed micros value is rejected instead of failing the batch."""
+    bad_row = RAW_ROW_2.model_copy(update={"cost_micros": "1.5e6"})
+
+    table, rejects = parse_batch(to_table([RAW_ROW_1, bad_row], RAW_SCHEMA))
+
+    assert table.num_rows == 1
+    assert rejects.column("reason").to_pylist() == ["invalid cost_micros"]
+
+
+def _ads_row(day: str, clicks: int, conversions: float) -> GoogleAdsRow:
+    """Builds a GoogleAdsRow message with the stream query's fields."""
+    row = GoogleAdsRow()
+    row.segments.date = day
+    row.metrics.clicks = clicks
+    row.metrics.impressions = clicks * 10
+    row.metrics.cost_micros = clicks * 150000
+    row.metrics.conversions = conversions
+    return row
+
+
+@pytest.fixture
+def stream_client():
+    """Google Ads client whose SearchStream returns two response batches."""
+    client = MagicMock()
+    client.get_type.return_value = GoogleAdsRow()
+    client.get_service.return_value.search_stream.return_value = [
+        SearchGoogleAdsStreamResponse(
+            results=[_ads_row("2024-01-15", EXPECTED_CLICKS, EXPECTED_CONVERSIONS)]
+        ),
+        SearchGoogleAdsStreamResponse(results=[_ads_row("2024-01-16", 0, 0.0)]),
+    ]
+    return client
+
+
+def _raw_stream(client, customer_id, query=STREAM_QUERY, workers=1):
+    """Compiles query and streams its raw batches, as extract_stream does."""
+    return _stream_batches(client, customer_id, compile_query(client, query), workers)
+
+
+def test_stream_batches_yields_one_batch_per_response(stream_client):
+    """Each SearchStream response becomes one typed raw batch."""
+    batches = list(_raw_stream(stream_client, CUSTOMER_ID))
+
+    assert len(batches) == EXPECTED_ROW_COUNT
+    assert all(b.schema.names == RAW_SCHEMA.names for b in batches)
+
+
+def test_stream_batches_reads_protobuf_fields(stream_client):
+    """Selected fields are read with their protobuf types."""
+    batch = next(_raw_stream(stream_client, CUSTOMER_ID))
+
+    assert batch.to_pylist() == [
+        {
+            "date": "2024-01-15",
+            "clicks": EXPECTED_CLICKS,
+            "impressions": EXPECTED_IMPRESSIONS,
+            "cost_micros": EXPECTED_COST_MICROS,
+            "conversions": EXPECTED_CONVERSIONS,
+            "customer_id": CUSTOMER_ID,
+        }
+    ]
+
+
+def test_stream_batches_reads_zero_metrics(stream_client):
+    """Metrics left at zero, which protobuf omits on the wire, read as zero."""
+    batches = list(_raw_stream(stream_client, CUSTOMER_ID))
+
+    assert batches[1].column("clicks").to_pylist() == [0]
+    assert batches[1].column("conversions").to_pylist() == [0.0]
+
+
+def test_stream_batches_sends_query(stream_client):
+    """SearchStream is called with the customer ID and query."""
+    list(_raw_stream(stream_client, CUSTOMER_ID))
+
+    service = stream_client.get_service.return_value
+    service.search_stream.assert_called_once_with(
+        customer_id=CUSTOMER_ID, query=STREAM_QUERY
+    )
+
+
+def test_stream_batches_rejects_unknown_field(stream_client):
+    """A field GoogleAdsRow does not have raises before any request."""
+    query = STREAM_QUERY.replace("metrics.conversions", "metrics.not_a_metric")
+
+    with pytest.raises(ValueError, match=r"metrics\.not_a_metric"):
+        extract_stream(stream_client, CUSTOMER_ID, query, search_stream=True)
+
+    stream_client.get_service.return_value.search_stream.assert_not_called()
+
+
+def test_extract_stream_search_stream_matches_search(stream_client):
+    """The SearchStream path produces the same table as the paged path."""
+    rows = [
+        _ads_row("2024-01-15", EXPECTED_CLICKS, EXPECTED_CONVERSIONS),
+        _ads_row("2024-01-16", 0, 0.0),
+    ]
+    search_client = MagicMock()
+    search_client.get_service.return_value.search.return_value = rows
+
+    streamed = extract_stream(stream_client, CUSTOMER_ID, STREAM_QUERY, True)
+    paged = extract_stream(search_client, CUSTOMER_ID, STREAM_QUERY)
+
+    assert pa.Table.from_batches(list(streamed)).equals(
+        pa.Table.from_batches(list(paged))
+    )
+
+
+def test_to_raw_defaults_omitted_metrics_to_zero():
+    """MessageToDict drops zero metrics, which read as zero."""
+    result = _to_raw({"segments.date": "2024-01-15"}, CUSTOMER_ID)
+
+    assert result.clicks == "0"
+    assert result.conversions == "0"
+
+
+CHILD_IDS = ["1111111111", "2222222222", "3333333333"]
+FAN_OUT_WORKERS = 3
+
+
+def _fan_out_client(delays: dict[str, float]) -> MagicMock:
+    """Client whose SearchStream answers each customer after a delay."""
+
+    def search_stream(customer_id: str, query: str) -> list:
+        time.sleep(delays[customer_id])
+        clicks = CHILD_IDS.index(customer_id) + 1
+        row = _ads_row("2024-01-15", clicks, EXPECTED_CONVERSIONS)
+        return [SearchGoogleAdsStreamResponse(results=[row])]
+
+    client = MagicMock()
+    client.get_type.return_value = GoogleAdsRow()
+    client.get_service.return_value.search_stream.side_effect = search_stream
+    return client
+
+
+def test_stream_batches_fans_out_across_customers():
+    """Customers run concurrently and every customer's batches are yielded."""
+    client = _fan_out_client(dict(zip(CHILD_IDS, [0.05, 0.0, 0.02], strict=True)))
+
+    batches = list(_raw_stream(client, CHILD_IDS, workers=FAN_OUT_WORKERS))
+
+    table = pa.Table.from_batches(batches).sort_by("customer_id")
+    assert table.column("customer_id").to_pylist() == CHILD_IDS
+    assert table.column("clicks").to_pylist() == [1, 2, 3]
+
+
+def test_stream_batches_raises_customer_errors():
+    """A failed customer stream fails the whole fetch."""
+    client = _fan_out_client(dict.fromkeys(CHILD_IDS, 0.0))
+    client.get_service.return_value.search_stream.side_effect = ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        list(_raw_stream(client, CHILD_IDS, workers=FAN_OUT_WORKERS))
+
+
+def test_stream_batches_shares_one_service():
+    """All customers are queried through one GoogleAdsService."""
+    client = _fan_out_client(dict.fromkeys(CHILD_IDS, 0.0))
+
+    list(_raw_stream(client, CHILD_IDS, workers=FAN_OUT_WORKERS))
+
+    client.get_service.assert_called_once_with("GoogleAdsService")
+    service = client.get_service.return_value
+    assert service.search_stream.call_count == len(CHILD_IDS)
+
+
+def test_fetch_multiple_customers_pages_each_customer(mock_client):
+    """The paged path runs one search per customer."""
+    with patch(
+        "extract.google_ads.extract.MessageToDict",
+        return_value=NESTED_DICT_1,
+    ):
+        result = fetch(mock_client, CHILD_IDS[:2], QUERY)
+
+    assert [r.customer_id for r in result] == [
+        CHILD_IDS[0],
+        CHILD_IDS[0],
+        CHILD_IDS[1],
+        CHILD_IDS[1],
+    ]
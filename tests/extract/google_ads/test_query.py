@@ -0,0 +1,187 @@
+"""Tests for compiled GAQL queries."""
+
+from datetime import date
+from unittest.mock import MagicMock
+
+import pyarrow as pa
+import pytest
+from google.ads.googleads.v25.enums.types.campaign_status import (
+    CampaignStatusEnum,
+)
+from google.ads.googleads.v25.services.types.google_ads_service import (
+    GoogleAdsRow,
+)
+
+from extract.google_ads.query import (
+    CUSTOMER_ID_COLUMN,
+    Query,
+    column_name,
+    compile_query,
+    select,
+)
+
+CUSTOMER_ID = "1234567890"
+CAMPAIGN_ID = 555
+CAMPAIGN_NAME = "ABI Spring Enrollment"
+CLICKS = 10
+CTR = 0.25
+LABELS = ["customers/1/labels/2", "customers/1/labels/3"]
+CAMPAIGN_QUERY = """
+    SELECT
+        campaign.id,
+        campaign.name,
+        campaign.status,
+        campaign.labels,
+        segments.date,
+        metrics.clicks,
+        metrics.ctr
+    FROM campaign
+    WHERE segments.date = '2024-01-15'
+"""
+ROW_DESCRIPTOR = GoogleAdsRow()._pb.DESCRIPTOR
+
+
+def _campaign_row(day: str = "2024-01-15") -> object:
+    """Builds a protobuf GoogleAdsRow for CAMPAIGN_QUERY."""
+    row = GoogleAdsRow()
+    row.campaign.id = CAMPAIGN_ID
+    row.campaign.name = CAMPAIGN_NAME
+    row.campaign.status = CampaignStatusEnum.CampaignStatus.ENABLED
+    row.campaign.labels.extend(LABELS)
+    row.segments.date = day
+    row.metrics.clicks = CLICKS
+    row.metrics.ctr = CTR
+    return row._pb
+
+
+@pytest.fixture
+def query():
+    """CAMPAIGN_QUERY compiled against GoogleAdsRow."""
+    return Query(CAMPAIGN_QUERY, ROW_DESCRIPTOR)
+
+
+def test_select_reads_fields_in_order():
+    """select() returns the SELECT list's field paths in query order."""
+    assert select("SELECT a.b,  c.d\nFROM e WHERE f.g > 0") == ["a.b", "c.d"]
+
+
+def test_select_without_select_clause_raises():
+    """A query with no SELECT clause raises ValueError."""
+    with pytest.raises(ValueError, match="No SELECT"):
+        select("FROM campaign")
+
+
+def test_column_name_keeps_segment_and_metric_names():
+    """Segments and metrics are named by their own field name."""
+    assert column_name("segments.date") == "date"
+    assert column_name("metrics.cost_micros") == "cost_micros"
+
+
+def test_column_name_qualifies_resource_fields():
+    """Resource attributes are prefixed with their resource."""
+    assert column_name("ad_group.id") == "ad_group_id"
+
+
+def test_query_types_columns_from_protobuf_fields(query):
+    """Arrow types follow the protobuf field types, enums as names."""
+    assert query.raw_schema == pa.schema(
+        [
+            ("campaign_id", pa.int64()),
+            ("campaign_name", pa.string()),
+            ("campaign_status", pa.string()),
+            ("campaign_labels", pa.list_(pa.string())),
+            ("date", pa.string()),
+            ("clicks", pa.int64()),
+            ("ctr", pa.float64()),
+            (CUSTOMER_ID_COLUMN, pa.string()),
+        ]
+    )
+    assert query.schema.field("date").type == pa.date32()
+
+
+def test_query_decodes_protobuf_rows(query):
+    """decode() reads every selected field off the protobuf rows."""
+    batch = query.decode([_campaign_row()], CUSTOMER_ID)
+
+    assert batch.to_pylist() == [
+        {
+            "campaign_id": CAMPAIGN_ID,
+            "campaign_name": CAMPAIGN_NAME,
+            "campaign_status": "ENABLED",
+            "campaign_labels": LABELS,
+            "date": "2024-01-15",
+            "clicks": CLICKS,
+            "ctr": CTR,
+            CUSTOMER_ID_COLUMN: CUSTOMER_ID,
+        }
+    ]
+
+
+def test_query_decodes_empty_response(query):
+    """An empty response decodes into an empty batch of raw_schema."""
+    batch = query.decode([], CUSTOMER_ID)
+
+    assert batch.num_rows == 0
+    assert batch.schema == query.raw_schema
+
+
+def test_query_parse_batch_converts_dates(query):
+    """parse_batch() turns date segments into dates."""
+    raw = pa.Table.from_batches([query.decode([_campaign_row()], CUSTOMER_ID)])
+
+    table, rejects = query.parse_batch(raw)
+
+    assert table.schema == query.schema
+    assert table.column("date").to_pylist() == [date(2024, 1, 15)]
+    assert rejects.num_rows == 0
+
+
+def test_query_parse_batch_rejects_invalid_date(query):
+    """A row whose date does not parse goes to the rejects table."""
+    rows = [_campaign_row(), _campaign_row("2024-02-30")]
+    raw = pa.Table.from_batches([query.decode(rows, CUSTOMER_ID)])
+
+    table, rejects = query.parse_batch(raw)
+
+    assert table.num_rows == 1
+    assert rejects.column("reason").to_pylist() == ["invalid date"]
+
+
+def test_query_selecting_customer_id_keeps_its_value():
+    """customer.id is not overwritten by the queried customer ID."""
+    query = Query("SELECT customer.id, metrics.clicks FROM customer", ROW_DESCRIPTOR)
+    row = GoogleAdsRow()
+    row.customer.id = int(CUSTOMER_ID)
+
+    batch = query.decode([row._pb], "other")
+
+    assert batch.column(CUSTOMER_ID_COLUMN).to_pylist() == [int(CUSTOMER_ID)]
+
+
+def test_query_unknown_field_raises():
+    """A field GoogleAdsRow does not have raises ValueError."""
+    with pytest.raises(ValueError, match="Unknown GAQL field"):
+        Query("SELECT campaign.nope FROM campaign", ROW_DESCRIPTOR)
+
+
+def test_query_message_field_raises():
+    """Selecting a whole message instead of a scalar raises ValueError."""
+    with pytest.raises(ValueError, match="not a scalar"):
+        Query("SELECT campaign.network_settings FROM campaign", ROW_DESCRIPTOR)
+
+
+def test_query_colliding_columns_raise():
+    """Fields that map to one column name raise ValueError."""
+    with pytest.raises(ValueError, match="share column names"):
+        Query("SELECT metrics.clicks, metrics.clicks FROM campaign", ROW_DESCRIPTOR)
+
+
+def test_compile_query_uses_client_row_type():
+    """compile_query() resolves fields against the client's GoogleAdsRow."""
+    client = MagicMock()
+    client.get_type.return_value = GoogleAdsRow()
+
+    query = compile_query(client, CAMPAIGN_QUERY)
+
+    client.get_type.assert_called_once_with("GoogleAdsRow")
+    assert query.text == CAMPAIGN_QUERY
@@ -1,21 +1,44 @@
 """Tests for Google Analytics extraction."""
 
+import time
 from datetime import date
 from unittest.mock import MagicMock
 
 import pyarrow as pa
 import pytest
+from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
+    BatchRunReportsResponse,
+    DimensionHeader,
+    DimensionValue,
+    MetricHeader,
+    MetricType,
+    MetricValue,
+    Row,
+    RunReportRequest,
+    RunReportResponse,
+)
 from pydantic import ValidationError
 
 from extract.google_analytics.extract import (
+    BATCH_REPORT_LIMIT,
+    MAX_PAGE_SIZE,
     Raw,
     Record,
     ReportConfig,
     _build_request,
+    _build_schema,
     _parse_response,
+    decode,
     extract,
+    extract_batch,
+    extract_reports,
+    extract_stream,
     fetch,
+    fetch_batches,
+    metric_types,
     parse,
+    parse_batch,
     to_table,
 )
 
@@ -26,6 +49,16 @@ START_DATE_STR = "2024-01-01"
 END_DATE_STR = "2024-01-31"
 EXPECTED_ROW_COUNT = 2
 EXPECTED_COLUMN_COUNT = 4
+PAGED_ROWS = 7
+PAGE_SIZE = 3
+PAGE_OFFSETS = [0, 3, 6]
+PAGE_WORKERS = 3
+METRIC_TYPES = {"pageviews": MetricType.TYPE_CURRENCY}
+CURRENCY_VALUE = 1.5
+DATE_RANGES = [
+    (date(2024, 1, 1), date(2024, 1, 31)),
+    (date(2024, 2, 1), date(2024, 2, 29)),
+]
 
 
 @pytest.fixture
@@ -63,6 +96,7 @@ def mock_client():
     ]
 
     client.run_report.return_value.rows = [mock_row_1, mock_row_2]
+    client.run_report.return_value.row_count = EXPECTED_ROW_COUNT
     return client
 
 
@@ -81,6 +115,24 @@ def records(raw_rows, config):
     return [parse(r, config) for r in raw_rows]
 
 
+def test_build_schema_appends_date_when_not_a_dimension():
+    """A date column is added when date is not a requested dimension."""
+    cfg = ReportConfig(dimension_names=["country"], metric_names=["sessions"])
+
+    result = _build_schema(cfg)
+
+    assert result.names == ["country", "sessions", "date"]
+
+
+def test_build_schema_types_date_as_date32(config):
+    """The date dimension is typed date32, everything else string."""
+    result = _build_schema(config)
+
+    assert result.field("date").type == pa.date32()
+    assert result.field("country").type == pa.string()
+    assert result.field("sessions").type == pa.string()
+
+
 def test_build_request_sets_date_range():
     """Date range is set correctly."""
     cfg = ReportConfig(
@@ -278,10 +330,10 @@ def test_to_table_contains_date_column(records, config):
 
 
 def test_to_table_date_values_correct(records, config):
-    """Date column contains correct ISO format values."""
+    """Date column contains typed date values."""
     result = to_table(records, config)
 
-    assert result.column("date").to_pylist() == ["2024-01-01", "2024-01-02"]
+    assert result.column("date").to_pylist() == [date(2024, 1, 1), date(2024, 1, 2)]
 
 
 def test_to_table_empty_records_returns_empty_table(config):
@@ -312,3 +364,335 @@ def test_to_table_row_count(records, config):
     result = to_table(records, config)
 
     assert result.num_rows == EXPECTED_ROW_COUNT
+
+
+def _decode_rows(raw_rows: list[Raw], config: ReportConfig) -> pa.Table:
+    """Decodes Raw rows through a response page, as the extractor does."""
+    response = RunReportResponse(
+        dimension_headers=[DimensionHeader(name=n) for n in config.dimension_names],
+        metric_headers=[MetricHeader(name=n) for n in config.metric_names],
+        rows=[
+            Row(
+                dimension_values=[DimensionValue(value=v) for v in r.dimensions],
+                metric_values=[MetricValue(value=v) for v in r.metrics],
+            )
+            for r in raw_rows
+        ],
+    )
+    return pa.Table.from_batches([decode(response)])
+
+
+def test_parse_batch_matches_row_parse(raw_rows, config):
+    """Vectorized parsing produces the same table as row-by-row parsing."""
+    expected = to_table([parse(r, config) for r in raw_rows], config)
+
+    table, rejects = parse_batch(_decode_rows(raw_rows, config), config)
+
+    assert table.equals(expected)
+    assert rejects.num_rows == 0
+
+
+def test_parse_batch_routes_bad_dates_to_rejects(config):
+    """A malformed YYYYMMDD date is rejected instead of failing the batch."""
+    raw_rows = [
+        Raw(date="20240101", dimensions=["20240101", "Japan"], metrics=["1", "2"]),
+        Raw(date="2024-01-02", dimensions=["2024-01-02", "USA"], metrics=["3", "4"]),
+    ]
+
+    table, rejects = parse_batch(_decode_rows(raw_rows, config), config)
+
+    assert table.num_rows == 1
+    assert rejects.column("country").to_pylist() == ["USA"]
+    assert rejects.column("reason").to_pylist() == ["invalid date"]
+
+
+class _PagedClient:
+    """GA4 client serving PAGED_ROWS numbered rows by offset and limit."""
+
+    def __init__(self, delays: dict[int, float] | None = None) -> None:
+        """Records requests, sleeping per offset to reorder completion."""
+        self.requests: list[RunReportRequest] = []
+        self.batches: list[BatchRunReportsRequest] = []
+        self._delays = delays or {}
+
+    def run_report(self, request: RunReportRequest) -> RunReportResponse:
+        """Returns the rows of one page and the report's total row count."""
+        self.requests.append(request)
+        time.sleep(self._delays.get(request.offset, 0.0))
+        end = min(request.offset + request.limit, PAGED_ROWS)
+        rows = [
+            Row(
+                dimension_values=[
+                    DimensionValue(value="20240101"),
+                    DimensionValue(value=f"country-{i}"),
+                ],
+                metric_values=[MetricValue(value=str(i)), MetricValue(value="1")],
+            )
+            for i in range(request.offset, end)
+        ]
+        return RunReportResponse(
+            dimension_headers=[
+                DimensionHeader(name=d.name) for d in request.dimensions
+            ],
+            metric_headers=[
+                MetricHeader(
+                    name=m.name,
+                    type_=METRIC_TYPES.get(m.name, MetricType.TYPE_INTEGER),
+                )
+                for m in request.metrics
+            ],
+            rows=rows,
+            row_count=PAGED_ROWS,
+        )
+
+    def batch_run_reports(
+        self, request: BatchRunReportsRequest
+    ) -> BatchRunReportsResponse:
+        """Runs every report of a batch, recording the batch."""
+        self.batches.append(request)
+        reports = [self.run_report(r) for r in request.requests]
+        return BatchRunReportsResponse(reports=reports)
+
+
+@pytest.fixture
+def paged_config(config):
+    """Config with a small page size."""
+    return config.model_copy(update={"page_size": PAGE_SIZE})
+
+
+def test_build_request_sets_limit_and_offset(paged_config):
+    """Requests ask for page_size rows from the given offset."""
+    request = _build_request(PROPERTY_ID, START_DATE, END_DATE, paged_config, PAGE_SIZE)
+
+    assert request.limit == PAGE_SIZE
+    assert request.offset == PAGE_SIZE
+
+
+def test_fetch_follows_pages_up_to_row_count(paged_config):
+    """Pages are requested until row_count rows have been read."""
+    client = _PagedClient()
+
+    result = fetch(client, PROPERTY_ID, START_DATE, END_DATE, paged_config)
+
+    assert [r.metrics[0] for r in result] == [str(i) for i in range(PAGED_ROWS)]
+    assert [r.offset for r in client.requests] == PAGE_OFFSETS
+
+
+def test_fetch_parallel_pages_keep_page_order(paged_config):
+    """Concurrent pages are returned in offset order."""
+    config = paged_config.model_copy(update={"workers": PAGE_WORKERS})
+    client = _PagedClient(delays={3: 0.05})
+
+    result = fetch(client, PROPERTY_ID, START_DATE, END_DATE, config)
+
+    assert [r.metrics[0] for r in result] == [str(i) for i in range(PAGED_ROWS)]
+    assert sorted(r.offset for r in client.requests) == PAGE_OFFSETS
+
+
+def test_fetch_batches_yields_one_batch_per_page(paged_config):
+    """Each report page becomes one raw record batch."""
+    batches = list(
+        fetch_batches(_PagedClient(), PROPERTY_ID, START_DATE, END_DATE, paged_config)
+    )
+
+    assert [b.num_rows for b in batches] == [PAGE_SIZE, PAGE_SIZE, 1]
+
+
+def test_fetch_single_page_sends_one_request(config):
+    """A report that fits one page makes a single request."""
+    client = _PagedClient()
+
+    fetch(client, PROPERTY_ID, START_DATE, END_DATE, config)
+
+    assert len(client.requests) == 1
+
+
+def test_report_config_rejects_page_size_above_api_maximum():
+    """page_size cannot exceed MAX_PAGE_SIZE."""
+    with pytest.raises(ValidationError):
+        ReportConfig(
+            dimension_names=["date"],
+            metric_names=["sessions"],
+            page_size=MAX_PAGE_SIZE + 1,
+        )
+
+
+@pytest.fixture
+def city_config(paged_config):
+    """A second report config, split by city instead of country."""
+    return paged_config.model_copy(update={"dimension_names": ["date", "city"]})
+
+
+def test_extract_reports_returns_one_table_per_config(paged_config, city_config):
+    """Each config gets its own table with the rows of every date range."""
+    results = extract_reports(
+        _PagedClient(), PROPERTY_ID, DATE_RANGES, [paged_config, city_config]
+    )
+
+    (country, country_rejects), (city, _) = results
+    assert "country" in country.column_names
+    assert "city" in city.column_names
+    assert country.num_rows == city.num_rows == PAGED_ROWS * len(DATE_RANGES)
+    assert country_rejects.num_rows == 0
+
+
+def test_extract_reports_without_date_ranges_returns_empty_tables(paged_config):
+    """No date ranges yields an empty table and empty rejects per config."""
+    results = extract_reports(_PagedClient(), PROPERTY_ID, [], [paged_config])
+
+    [(table, rejects)] = results
+    assert table.num_rows == rejects.num_rows == 0
+    assert table.schema == _build_schema(paged_config)
+    assert "reason" in rejects.column_names
+
+
+def test_extract_reports_batches_at_most_limit_requests(config):
+    """First pages share batch_run_reports calls of BATCH_REPORT_LIMIT."""
+    client = _PagedClient()
+    configs = [config] * BATCH_REPORT_LIMIT
+
+    extract_reports(client, PROPERTY_ID, DATE_RANGES, configs)
+
+    sizes = [len(b.requests) for b in client.batches]
+    assert sizes == [BATCH_REPORT_LIMIT, BATCH_REPORT_LIMIT]
+    assert {b.property for b in client.batches} == {f"properties/{PROPERTY_ID}"}
+
+
+def test_extract_reports_batches_remaining_pages(paged_config, city_config):
+    """Pages past the first are requested in batches too."""
+    client = _PagedClient()
+
+    extract_reports(client, PROPERTY_ID, DATE_RANGES[:1], [paged_config, city_config])
+
+    first, rest = client.batches
+    assert [r.offset for r in first.requests] == [0, 0]
+    assert [r.offset for r in rest.requests] == PAGE_OFFSETS[1:] * 2
+
+
+def test_extract_reports_parallel_batches_keep_order(config):
+    """Concurrent batches are demultiplexed in config order."""
+    configs = [
+        config.model_copy(update={"metric_names": [f"metric_{i}", "sessions"]})
+        for i in range(BATCH_REPORT_LIMIT + 1)
+    ]
+
+    results = extract_reports(
+        _PagedClient(), PROPERTY_ID, DATE_RANGES[:1], configs, PAGE_WORKERS
+    )
+
+    assert [t.column_names[2] for t, _ in results] == [
+        c.metric_names[0] for c in configs
+    ]
+
+
+def _report(metric_type: MetricType, value: str, dimension: str = "date") -> object:
+    """Builds a one-row response with one dimension and a sessions metric."""
+    return RunReportResponse(
+        dimension_headers=[DimensionHeader(name=dimension)],
+        metric_headers=[MetricHeader(name="sessions", type_=metric_type)],
+        rows=[
+            Row(
+                dimension_values=[DimensionValue(value="20240101")],
+                metric_values=[MetricValue(value=value)],
+            )
+        ],
+    )
+
+
+def test_decode_keeps_metric_values_as_strings(paged_config):
+    """Metric values are decoded as the strings the API sent."""
+    response = _PagedClient().run_report(
+        _build_request(PROPERTY_ID, START_DATE, END_DATE, paged_config)
+    )
+
+    batch = decode(response)
+
+    assert batch.schema.field("sessions").type == pa.string()
+    assert batch.column("sessions").to_pylist() == [str(i) for i in range(PAGE_SIZE)]
+    assert batch.column("date").to_pylist() == ["20240101"] * PAGE_SIZE
+
+
+def test_metric_types_reads_metric_headers(paged_config):
+    """Each metric's type comes from its response header."""
+    response = _PagedClient().run_report(
+        _build_request(PROPERTY_ID, START_DATE, END_DATE, paged_config)
+    )
+
+    assert metric_types(response) == {
+        "sessions": MetricType.TYPE_INTEGER,
+        "pageviews": MetricType.TYPE_CURRENCY,
+    }
+
+
+def test_decode_adds_empty_date_when_not_a_dimension():
+    """Reports without a date dimension get an empty date column."""
+    batch = decode(_report(MetricType.TYPE_INTEGER, "12", dimension="country"))
+
+    assert batch.column("date").to_pylist() == [""]
+
+
+def test_parse_batch_casts_metrics_by_header_type():
+    """Integer metrics become int64 and currency metrics float64."""
+    config = ReportConfig(dimension_names=["date"], metric_names=["sessions"])
+    raw = pa.Table.from_batches([decode(_report(MetricType.TYPE_CURRENCY, "1.5"))])
+
+    table, _ = parse_batch(raw, config, {"sessions": MetricType.TYPE_CURRENCY})
+
+    assert table.schema.field("sessions").type == pa.float64()
+    assert table.column("sessions").to_pylist() == [CURRENCY_VALUE]
+
+
+def test_parse_batch_keeps_unknown_metric_types_as_strings():
+    """A metric without a known type stays a string."""
+    config = ReportConfig(dimension_names=["date"], metric_names=["sessions"])
+    raw = pa.Table.from_batches(
+        [decode(_report(MetricType.METRIC_TYPE_UNSPECIFIED, "12"))]
+    )
+
+    table, _ = parse_batch(raw, config, {})
+
+    assert table.column("sessions").to_pylist() == ["12"]
+
+
+def test_parse_batch_rejects_unparseable_metric_as_sent():
+    """A metric value that does not fit its header type is rejected raw."""
+    config = ReportConfig(dimension_names=["date"], metric_names=["sessions"])
+    raw = pa.Table.from_batches([decode(_report(MetricType.TYPE_INTEGER, "(other)"))])
+
+    table, rejects = parse_batch(raw, config, {"sessions": MetricType.TYPE_INTEGER})
+
+    assert table.num_rows == 0
+    assert rejects.column("sessions").to_pylist() == ["(other)"]
+    assert rejects.column("reason").to_pylist() == ["invalid sessions"]
+
+
+def test_extract_stream_rejects_keep_raw_schema():
+    """Rejected rows keep the all-string raw schema of an empty stream."""
+    client = MagicMock()
+    client.run_report.return_value = _report(MetricType.TYPE_INTEGER, "(other)")
+    config = ReportConfig(dimension_names=["date"], metric_names=["sessions"])
+
+    stream = extract_stream(client, PROPERTY_ID, START_DATE, END_DATE, config)
+    list(stream)
+
+    empty = extract_stream(MagicMock(), PROPERTY_ID, START_DATE, END_DATE, config)
+    assert stream.rejects.schema == empty.rejects.schema
+    assert stream.rejects.column("sessions").to_pylist() == ["(other)"]
+
+
+def test_extract_batch_returns_typed_metrics(paged_config):
+    """extract_batch() types metrics and dates from the decoded pages."""
+    table, rejects = extract_batch(
+        _PagedClient(), PROPERTY_ID, START_DATE, END_DATE, paged_config
+    )
+
+    assert table.schema == pa.schema(
+        [
+            ("date", pa.date32()),
+            ("country", pa.string()),
+            ("sessions", pa.int64()),
+            ("pageviews", pa.float64()),
+        ]
+    )
+    assert table.num_rows == PAGED_ROWS
+    assert rejects.num_rows == 0
@@ -0,0 +1,294 @@
+"""Tests for GA4 property quota scheduling."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
+    BatchRunReportsResponse,
+    RunReportRequest,
+    RunReportResponse,
+)
+from google.api_core.exceptions import ResourceExhausted
+from google.auth.credentials import AnonymousCredentials
+
+from extract.google_analytics.client import build_client
+from extract.google_analytics.quota import (
+    CONCURRENT_REQUESTS,
+    HOUR_SECONDS,
+    PACE_REQUESTS,
+    QUOTA_PAUSE_SECONDS,
+    QUOTA_RETRIES,
+    Quota,
+    QuotaClient,
+    QuotaScheduler,
+    parse_quota,
+)
+
+PROPERTY = "properties/123456"
+COST = 10
+PLENTY_TOKENS = COST * PACE_REQUESTS * 10
+FEW_CALLS = 5
+SECONDS_INTO_HOUR = 600.0
+SECONDS_LEFT = HOUR_SECONDS - SECONDS_INTO_HOUR
+PROJECT_TOKENS = 30
+TWO_CALLS = 2
+JOIN_SECONDS = 0.05
+
+
+def _response(
+    remaining: int, consumed: int = COST, daily: int = PLENTY_TOKENS
+) -> RunReportResponse:
+    """Builds a report response carrying a property quota."""
+    return RunReportResponse(
+        property_quota={
+            "tokens_per_hour": {"consumed": consumed, "remaining": remaining},
+            "tokens_per_day": {"consumed": consumed, "remaining": daily},
+            "concurrent_requests": {"remaining": CONCURRENT_REQUESTS},
+        }
+    )
+
+
+def _quota(remaining: int, concurrent: int = CONCURRENT_REQUESTS) -> Quota:
+    """Builds the quota of a call costing COST tokens."""
+    return Quota(
+        tokens_consumed=COST,
+        tokens_remaining=remaining,
+        concurrent_remaining=concurrent,
+    )
+
+
+@pytest.fixture
+def clock():
+    """Frozen clock that advances only when sleep is called.
+
+    Wall time starts SECONDS_INTO_HOUR past a clock hour.
+    """
+    now = [HOUR_SECONDS * 100 + SECONDS_INTO_HOUR]
+    sleep = MagicMock(side_effect=lambda seconds: now.__setitem__(0, now[0] + seconds))
+    with (
+        patch("extract.google_analytics.quota.time.monotonic", lambda: now[0]),
+        patch("extract.google_analytics.quota.time.time", lambda: now[0]),
+        patch("extract.google_analytics.quota.time.sleep", sleep),
+    ):
+        yield sleep
+
+
+@pytest.fixture
+def client():
+    """QuotaClient with anonymous credentials."""
+    return QuotaClient(credentials=AnonymousCredentials())
+
+
+def test_parse_quota_adds_batch_costs_and_takes_lowest_remaining():
+    """A batch costs the sum of its reports and leaves the lowest budget."""
+    quota = parse_quota([_response(PLENTY_TOKENS), _response(PLENTY_TOKENS - COST)])
+
+    assert quota.tokens_consumed == COST * TWO_CALLS
+    assert quota.tokens_remaining == PLENTY_TOKENS - COST
+
+
+def test_parse_quota_takes_lower_project_tokens():
+    """The Cloud project's hourly tokens count when they run out first."""
+    response = _response(PLENTY_TOKENS)
+    response.property_quota.tokens_per_project_per_hour.remaining = PROJECT_TOKENS
+
+    assert parse_quota([response]).tokens_remaining == PROJECT_TOKENS
+
+
+def test_parse_quota_takes_lowest_daily_tokens():
+    """The lowest daily budget across a batch's reports is kept."""
+    quota = parse_quota(
+        [_response(PLENTY_TOKENS), _response(PLENTY_TOKENS, daily=PROJECT_TOKENS)]
+    )
+
+    assert quota.daily_tokens_remaining == PROJECT_TOKENS
+
+
+def test_parse_quota_without_quota_is_none():
+    """Responses without a property quota report nothing."""
+    assert parse_quota([RunReportResponse()]) is None
+
+
+def test_scheduler_does_not_wait_with_plenty_of_tokens(clock):
+    """Calls go out back to back while many calls' worth of tokens remain."""
+    scheduler = QuotaScheduler()
+    scheduler.acquire()
+    scheduler.release(_quota(PLENTY_TOKENS))
+
+    scheduler.acquire()
+    scheduler.acquire()
+
+    clock.assert_not_called()
+
+
+def test_scheduler_spreads_last_calls_over_the_hour(clock):
+    """With few calls left, they are spaced evenly until the hour ends."""
+    scheduler = QuotaScheduler()
+    scheduler.acquire()
+    scheduler.release(_quota(COST * FEW_CALLS))
+
+    scheduler.acquire()
+    scheduler.acquire()
+
+    clock.assert_called_once_with(SECONDS_LEFT / FEW_CALLS)
+
+
+def test_scheduler_waits_for_next_hour_when_tokens_run_out(clock):
+    """No call goes out until the hour rolls over once tokens run out."""
+    scheduler = QuotaScheduler()
+    scheduler.acquire()
+    scheduler.release(_quota(COST - 1))
+
+    scheduler.acquire()
+
+    clock.assert_called_once_with(SECONDS_LEFT)
+
+
+def test_scheduler_fails_fast_when_daily_tokens_run_out(clock):
+    """No call waits for the daily refill once daily tokens run out."""
+    scheduler = QuotaScheduler()
+    scheduler.acquire()
+    scheduler.release(
+        Quota(
+            tokens_consumed=COST,
+            tokens_remaining=PLENTY_TOKENS,
+            concurrent_remaining=CONCURRENT_REQUESTS,
+            daily_tokens_remaining=COST - 1,
+        )
+    )
+
+    with pytest.raises(ResourceExhausted, match="daily"):
+        scheduler.acquire()
+
+    clock.assert_not_called()
+
+
+def test_scheduler_limits_calls_to_concurrent_headroom():
+    """A call waits for a free slot when no concurrent headroom is left."""
+    scheduler = QuotaScheduler()
+    scheduler.acquire()
+    scheduler.release(_quota(PLENTY_TOKENS, concurrent=0))
+    scheduler.acquire()
+
+    waiting = threading.Thread(target=scheduler.acquire)
+    waiting.start()
+    waiting.join(JOIN_SECONDS)
+    blocked = waiting.is_alive()
+    scheduler.release(None)
+    waiting.join()
+
+    assert blocked
+
+
+def test_scheduler_pause_waits_quota_pause_seconds(clock):
+    """A rejected call with tokens left holds calls for QUOTA_PAUSE_SECONDS."""
+    scheduler = QuotaScheduler()
+    scheduler.pause()
+
+    scheduler.acquire()
+
+    clock.assert_called_once_with(QUOTA_PAUSE_SECONDS)
+
+
+def test_client_requests_property_quota(client, clock):
+    """run_report asks for the property quota and records it."""
+    with patch.object(
+        BetaAnalyticsDataClient, "run_report", return_value=_response(COST - 1)
+    ) as mock_run:
+        client.run_report(RunReportRequest(property=PROPERTY))
+        client.run_report(RunReportRequest(property=PROPERTY))
+
+    assert mock_run.call_args.args[0].return_property_quota
+    clock.assert_called_once_with(SECONDS_LEFT)
+
+
+def test_client_batch_requests_property_quota(client, clock):
+    """batch_run_reports asks every report for the property quota."""
+    batch = BatchRunReportsRequest(
+        property=PROPERTY, requests=[RunReportRequest(), RunReportRequest()]
+    )
+    response = BatchRunReportsResponse(reports=[_response(PLENTY_TOKENS)])
+
+    with patch.object(
+        BetaAnalyticsDataClient, "batch_run_reports", return_value=response
+    ) as mock_batch:
+        client.batch_run_reports(batch)
+
+    sent = mock_batch.call_args.args[0]
+    assert sent.property == PROPERTY
+    assert [r.return_property_quota for r in sent.requests] == [True, True]
+
+
+def test_client_retries_after_quota_error(client, clock):
+    """A call rejected for quota pauses and is retried."""
+    response = _response(PLENTY_TOKENS)
+
+    with patch.object(
+        BetaAnalyticsDataClient,
+        "run_report",
+        side_effect=[ResourceExhausted("quota"), response],
+    ) as mock_run:
+        result = client.run_report(RunReportRequest(property=PROPERTY))
+
+    assert result is response
+    assert mock_run.call_count == TWO_CALLS
+    clock.assert_called_once_with(QUOTA_PAUSE_SECONDS)
+
+
+def test_client_gives_up_after_retries(client, clock):
+    """A call still rejected after QUOTA_RETRIES retries raises."""
+    with (
+        patch.object(
+            BetaAnalyticsDataClient,
+            "run_report",
+            side_effect=ResourceExhausted("quota"),
+        ) as mock_run,
+        pytest.raises(ResourceExhausted),
+    ):
+        client.run_report(RunReportRequest(property=PROPERTY))
+
+    assert mock_run.call_count == QUOTA_RETRIES + 1
+
+
+def test_client_fails_fast_once_daily_tokens_run_out(client, clock):
+    """After a call leaves no daily tokens, the next raises without a call."""
+    with (
+        patch.object(
+            BetaAnalyticsDataClient,
+            "run_report",
+            return_value=_response(PLENTY_TOKENS, daily=0),
+        ) as mock_run,
+        pytest.raises(ResourceExhausted, match="daily"),
+    ):
+        client.run_report(RunReportRequest(property=PROPERTY))
+        client.run_report(RunReportRequest(property=PROPERTY))
+
+    assert mock_run.call_count == 1
+    clock.assert_not_called()
+
+
+def test_client_releases_slot_after_other_errors(client):
+    """Errors other than quota errors raise and free the call's slot."""
+    with (
+        patch.object(
+            BetaAnalyticsDataClient, "run_report", side_effect=ValueError("boom")
+        ),
+        pytest.raises(ValueError, match="boom"),
+    ):
+        client.run_report(RunReportRequest(property=PROPERTY))
+
+    for _ in range(CONCURRENT_REQUESTS):
+        client.scheduler.acquire()
+
+
+def test_build_client_schedules_calls_by_quota():
+    """build_client() returns a QuotaClient."""
+    with patch.object(
+        QuotaClient, "from_service_account_file", return_value=MagicMock()
+    ) as mock_build:
+        build_client("/tmp/creds.json")
+
+    mock_build.assert_called_once_with("/tmp/creds.json")
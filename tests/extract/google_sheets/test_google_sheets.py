@@ -6,7 +6,15 @@ import pyarrow as pa
 import pytest
 from pydantic import ValidationError
 
-from extract.google_sheets.extract import Raw, Record, extract, fetch, parse
+from extract.google_sheets.extract import (
+    Raw,
+    Record,
+    content_hash,
+    extract,
+    fetch,
+    fetch_sheets,
+    parse,
+)
 
 
 def to_table(records: list[Record]) -> pa.Table:
@@ -24,6 +32,9 @@ ROWS = [
 ]
 EXPECTED_ROW_COUNT = 3
 EXPECTED_COLUMN_COUNT = 3
+SHEET_NAMES = ["students", "programs"]
+PROGRAM_HEADERS = ["program", "weeks"]
+PROGRAM_ROWS = [["ABI", "12"]]
 
 
 @pytest.fixture
@@ -83,6 +94,23 @@ def test_extract_row_count_correct(mock_client):
     assert result.num_rows == EXPECTED_ROW_COUNT
 
 
+def test_extract_columns_are_strings(mock_client):
+    """Every sheet column is typed as string."""
+    result = extract(mock_client, SPREADSHEET_ID, SHEET_NAME)
+
+    assert all(t == pa.string() for t in result.schema.types)
+
+
+def test_extract_row_width_mismatch_raises(mock_client):
+    """A row with a different width than the header raises ValueError."""
+    mock_client.spreadsheets().values().get().execute.return_value = {
+        "values": [HEADERS, ["Alice", "25"]]
+    }
+
+    with pytest.raises(ValueError, match="row 1"):
+        extract(mock_client, SPREADSHEET_ID, SHEET_NAME)
+
+
 def test_fetch_calls_api_with_correct_args(mock_client):
     """API called with correct spreadsheet ID and range."""
     fetch(mock_client, SPREADSHEET_ID, SHEET_NAME)
@@ -205,3 +233,55 @@ def test_to_table_row_count_matches_records(records):
     result = to_table(records)
 
     assert result.num_rows == EXPECTED_ROW_COUNT
+
+
+@pytest.fixture
+def batch_client():
+    """Mocked Sheets client answering a batchGet for SHEET_NAMES."""
+    client = MagicMock()
+    client.spreadsheets().values().batchGet().execute.return_value = {
+        "valueRanges": [
+            {"range": "students!A1:C4", "values": [HEADERS, *ROWS]},
+            {"range": "programs!A1:B2", "values": [PROGRAM_HEADERS, *PROGRAM_ROWS]},
+        ]
+    }
+    return client
+
+
+def test_fetch_sheets_sends_one_batch_get(batch_client):
+    """Every tab is requested through a single batchGet call."""
+    fetch_sheets(batch_client, SPREADSHEET_ID, SHEET_NAMES)
+
+    batch_get = batch_client.spreadsheets().values().batchGet
+    batch_get.assert_called_with(spreadsheetId=SPREADSHEET_ID, ranges=SHEET_NAMES)
+    batch_client.spreadsheets().values().get.assert_not_called()
+
+
+def test_fetch_sheets_keys_raws_by_sheet_name(batch_client):
+    """Value ranges are matched to sheet names in request order."""
+    raws = fetch_sheets(batch_client, SPREADSHEET_ID, SHEET_NAMES)
+
+    assert raws["students"] == Raw(headers=HEADERS, rows=ROWS)
+    assert raws["programs"] == Raw(headers=PROGRAM_HEADERS, rows=PROGRAM_ROWS)
+
+
+def test_fetch_sheets_empty_tab_raises(batch_client):
+    """A tab without a header row raises ValueError naming the tab."""
+    batch_client.spreadsheets().values().batchGet().execute.return_value = {
+        "valueRanges": [{"range": "students!A1:C4", "values": [HEADERS]}, {}]
+    }
+
+    with pytest.raises(ValueError, match="programs"):
+        fetch_sheets(batch_client, SPREADSHEET_ID, SHEET_NAMES)
+
+
+def test_content_hash_is_stable_for_equal_content(raw):
+    """Equal headers and values hash the same."""
+    assert content_hash(raw) == content_hash(Raw(headers=HEADERS, rows=ROWS))
+
+
+def test_content_hash_changes_with_any_cell(raw):
+    """Changing a single cell changes the hash."""
+    edited = Raw(headers=HEADERS, rows=[*ROWS[:-1], ["Relena", "36", "Paris"]])
+
+    assert content_hash(edited) != content_hash(raw)
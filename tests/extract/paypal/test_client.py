@@ -0,0 +1,139 @@
+"""Tests for the PayPal REST API client."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from extract.paypal import client as paypal_client
+from extract.paypal.client import (
+    PAYPAL_BASE_URL,
+    POOL_MAXSIZE,
+    RETRY_STATUSES,
+    RETRY_TOTAL,
+    TOKEN_EXPIRY_MARGIN_SECONDS,
+    _build_session,
+    build_client,
+)
+
+CLIENT_ID = "client-id"
+CLIENT_SECRET = "client-secret"
+ACCESS_TOKEN = "token-1"
+REFRESHED_TOKEN = "token-2"
+EXPIRES_IN = 32400
+PATH = "/v1/reporting/transactions"
+PAGE = {"transaction_details": [], "total_pages": 1}
+FIRST_ERROR_STATUS = 400
+TWO_CALLS = 2
+
+
+def _response(status_code: int, body: dict | None = None) -> MagicMock:
+    """Builds a fake requests response."""
+    response = MagicMock(spec=requests.Response)
+    response.status_code = status_code
+    response.json.return_value = body or {}
+    if status_code >= FIRST_ERROR_STATUS:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status_code))
+    return response
+
+
+def _token_response(token: str = ACCESS_TOKEN, expires_in: int = EXPIRES_IN):
+    """Builds a fake OAuth2 token response."""
+    return _response(200, {"access_token": token, "expires_in": expires_in})
+
+
+@pytest.fixture(autouse=True)
+def clear_tokens():
+    """Empties the process-wide token cache around each test."""
+    paypal_client._tokens.clear()
+    yield
+    paypal_client._tokens.clear()
+
+
+@pytest.fixture
+def session():
+    """Fake session returned for every client built in the test."""
+    fake = MagicMock()
+    fake.post.return_value = _token_response()
+    fake.get.return_value = _response(200, PAGE)
+    with patch("extract.paypal.client._build_session", return_value=fake):
+        yield fake
+
+
+def test_build_client_does_not_fetch_token(session):
+    """Building a client makes no network calls."""
+    build_client(CLIENT_ID, CLIENT_SECRET)
+
+    session.post.assert_not_called()
+
+
+def test_get_sends_bearer_token(session):
+    """GET requests carry the fetched access token."""
+    result = build_client(CLIENT_ID, CLIENT_SECRET).get(PATH, {"page": 1})
+
+    assert result == PAGE
+    session.get.assert_called_once()
+    assert session.get.call_args.args[0] == f"{PAYPAL_BASE_URL}{PATH}"
+    headers = session.get.call_args.kwargs["headers"]
+    assert headers["Authorization"] == f"Bearer {ACCESS_TOKEN}"
+
+
+def test_token_is_shared_across_clients(session):
+    """Clients built for the same credentials reuse one cached token."""
+    build_client(CLIENT_ID, CLIENT_SECRET).get(PATH)
+    build_client(CLIENT_ID, CLIENT_SECRET).get(PATH)
+
+    session.post.assert_called_once()
+
+
+def test_expired_token_is_refetched(session):
+    """A token inside the expiry margin is replaced before use."""
+    session.post.side_effect = [
+        _token_response(expires_in=TOKEN_EXPIRY_MARGIN_SECONDS),
+        _token_response(REFRESHED_TOKEN),
+    ]
+    client = build_client(CLIENT_ID, CLIENT_SECRET)
+
+    client.get(PATH)
+    client.get(PATH)
+
+    assert session.post.call_count == TWO_CALLS
+    headers = session.get.call_args.kwargs["headers"]
+    assert headers["Authorization"] == f"Bearer {REFRESHED_TOKEN}"
+
+
+def test_unauthorized_refreshes_token_and_retries(session):
+    """A 401 refreshes the token and retries the request once."""
+    session.post.side_effect = [
+        _token_response(),
+        _token_response(REFRESHED_TOKEN),
+    ]
+    session.get.side_effect = [_response(401), _response(200, PAGE)]
+
+    result = build_client(CLIENT_ID, CLIENT_SECRET).get(PATH)
+
+    assert result == PAGE
+    headers = session.get.call_args.kwargs["headers"]
+    assert headers["Authorization"] == f"Bearer {REFRESHED_TOKEN}"
+
+
+def test_repeated_unauthorized_raises(session):
+    """A second 401 after refreshing the token raises HTTPError."""
+    session.get.return_value = _response(401)
+
+    with pytest.raises(requests.HTTPError):
+        build_client(CLIENT_ID, CLIENT_SECRET).get(PATH)
+
+    assert session.get.call_count == TWO_CALLS
+
+
+def test_build_session_mounts_pooled_retrying_adapter():
+    """HTTPS requests go through a pooled adapter that retries transients."""
+    adapter = _build_session().get_adapter(PAYPAL_BASE_URL)
+
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == POOL_MAXSIZE
+    assert adapter.max_retries.total == RETRY_TOTAL
+    assert set(adapter.max_retries.status_forcelist) == set(RETRY_STATUSES)
+    assert adapter.max_retries.respect_retry_after_header
@@ -1,6 +1,8 @@
 """Tests for PayPal transaction extraction."""
 
-from datetime import date
+import itertools
+import time
+from datetime import date, timedelta
 from unittest.mock import MagicMock, patch
 
 import pyarrow as pa
@@ -8,18 +10,29 @@ import pytest
 from pydantic import ValidationError
 
 from extract.paypal.extract import (
+    MAX_WINDOW_DAYS,
+    RAW_SCHEMA,
+    SCHEMA,
     Raw,
     Record,
+    _date_windows,
     _parse_transaction,
     extract,
     fetch,
     parse,
+    parse_batch,
 )
 from extract.table import to_table
 
 START_DATE = date(2024, 1, 15)
 END_DATE = date(2024, 1, 15)
 START_DATE_STR = "2024-01-15"
+PARALLEL_PAGES = 6
+YEAR_START = date(2024, 1, 1)
+YEAR_END = date(2024, 12, 31)
+YEAR_WINDOWS = 12
+PARALLEL_WORKERS = 3
+PAGE_DELAY_SECONDS = 0.01
 TRANSACTION_ID = "TXN123456"
 EXPECTED_ROW_COUNT = 2
 EXPECTED_COLUMN_COUNT = 10
@@ -118,7 +131,7 @@ def mock_client():
 def test_extract_composes_fetch_parse_to_table(raw_rows):
     """Result matches manually composing fetch, parse, and to_table."""
     parsed = [parse(r) for r in raw_rows]
-    expected = to_table(parsed)
+    expected = to_table(parsed, SCHEMA)
 
     with patch("extract.paypal.extract.fetch", return_value=raw_rows):
         result = extract(MagicMock(), START_DATE, END_DATE)
@@ -174,6 +187,107 @@ def test_fetch_paginates_multiple_pages():
     assert client.get.call_count == EXPECTED_ROW_COUNT
 
 
+def _paged_client(total_pages: int) -> MagicMock:
+    """Client serving total_pages pages of one transaction each.
+
+    Earlier pages answer more slowly, so concurrent requests complete
+    out of page order.
+    """
+
+    def get(path: str, params: dict) -> dict:
+        page = params["page"]
+        time.sleep((total_pages - page) * PAGE_DELAY_SECONDS)
+        info = {
+            **API_TRANSACTION_1["transaction_info"],
+            "transaction_id": f"T{page}",
+            "paypal_reference_id": f"T{page}",
+        }
+        transaction = {**API_TRANSACTION_1, "transaction_info": info}
+        return {"transaction_details": [transaction], "total_pages": total_pages}
+
+    client = MagicMock()
+    client.get.side_effect = get
+    return client
+
+
+def test_fetch_workers_requests_every_page():
+    """Concurrent fetch requests each page exactly once."""
+    client = _paged_client(PARALLEL_PAGES)
+
+    fetch(client, START_DATE, END_DATE, workers=PARALLEL_WORKERS)
+
+    pages = sorted(c.kwargs["params"]["page"] for c in client.get.call_args_list)
+    assert pages == list(range(1, PARALLEL_PAGES + 1))
+
+
+def test_fetch_workers_keeps_page_order():
+    """Concurrent pages are reassembled in page order."""
+    client = _paged_client(PARALLEL_PAGES)
+
+    result = fetch(client, START_DATE, END_DATE, workers=PARALLEL_WORKERS)
+
+    expected = [f"T{page}" for page in range(1, PARALLEL_PAGES + 1)]
+    assert [r.transaction_id for r in result] == expected
+
+
+def test_fetch_workers_matches_serial_fetch():
+    """Concurrent and serial fetches return the same rows."""
+    serial = fetch(_paged_client(PARALLEL_PAGES), START_DATE, END_DATE)
+    concurrent = fetch(
+        _paged_client(PARALLEL_PAGES), START_DATE, END_DATE, workers=PARALLEL_WORKERS
+    )
+
+    assert concurrent == serial
+
+
+def test_fetch_workers_raises_page_errors():
+    """A failed page request propagates out of the concurrent fetch."""
+    client = _paged_client(PARALLEL_PAGES)
+    get = client.get.side_effect
+
+    def failing_get(path: str, params: dict) -> dict:
+        if params["page"] == PARALLEL_PAGES:
+            raise RuntimeError("page failed")
+        return get(path, params)
+
+    client.get.side_effect = failing_get
+
+    with pytest.raises(RuntimeError, match="page failed"):
+        fetch(client, START_DATE, END_DATE, workers=PARALLEL_WORKERS)
+
+
+def test_date_windows_cover_range_without_overlap():
+    """Windows are contiguous, inclusive and span the whole range."""
+    windows = _date_windows(YEAR_START, YEAR_END)
+
+    assert windows[0][0] == YEAR_START
+    assert windows[-1][1] == YEAR_END
+    for (_, end), (start, _) in itertools.pairwise(windows):
+        assert start - end == timedelta(days=1)
+
+
+def test_date_windows_respect_max_window_days():
+    """No window is longer than the API's 31-day limit."""
+    windows = _date_windows(YEAR_START, YEAR_END)
+
+    assert len(windows) == YEAR_WINDOWS
+    assert all((end - start).days < MAX_WINDOW_DAYS for start, end in windows)
+
+
+def test_date_windows_single_day():
+    """A single day is one window."""
+    assert _date_windows(START_DATE, START_DATE) == [(START_DATE, START_DATE)]
+
+
+def test_fetch_requests_one_report_per_window(mock_client):
+    """A year is fetched as one report request sequence per window."""
+    fetch(mock_client, YEAR_START, YEAR_END)
+
+    starts = [c.kwargs["params"]["start_date"] for c in mock_client.get.call_args_list]
+    assert len(starts) == YEAR_WINDOWS
+    assert starts[1].startswith("2024-02-01")
+
+
 def test_fetch_returns_list_of_raw(mock_client):
     """Returns a list of Raw instances."""
     result = fetch(mock_client, START_DATE, END_DATE)
@@ -250,10 +364,15 @@ def test_parse_transaction_maps_transaction_id():
     assert result.transaction_id == TRANSACTION_ID
 
 
-def test_parse_transaction_missing_required_field_raises():
-    """Missing transaction_info raises KeyError."""
-    with pytest.raises(KeyError):
-        _parse_transaction({})
+def test_parse_transaction_missing_required_field_is_rejected():
+    """A transaction without transaction_info is rejected, not raised."""
+    raw = _parse_transaction({})
+
+    table, rejects = parse_batch(to_table([RAW_ROW_1, raw], RAW_SCHEMA))
+
+    assert raw.transaction_id is None
+    assert table.num_rows == 1
+    assert rejects.column("reason").to_pylist() == ["invalid transaction_id"]
 
 
 def test_parse_transaction_optional_fields_default():
@@ -323,13 +442,13 @@ def test_record_invalid_date_raises():
 
 def test_to_table_column_count(records):
     """Table has correct number of columns."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.num_columns == EXPECTED_COLUMN_COUNT
 
 
 def test_to_table_column_names(records):
     """Table contains expected column names."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert set(result.column_names) == {
         "transaction_id",
         "transaction_date",
@@ -345,34 +464,60 @@ def test_to_table_column_names(records):
 
 
 def test_to_table_date_values_correct(records):
-    """Date column contains correct ISO format values."""
-    result = to_table(records)
+    """Date column contains typed date values."""
+    result = to_table(records, SCHEMA)
     assert result.column("transaction_date").to_pylist() == [
-        "2024-01-15",
-        "2024-01-15",
+        date(2024, 1, 15),
+        date(2024, 1, 15),
     ]
 
 
 def test_to_table_empty_records_returns_empty_table():
     """Empty records list returns empty table."""
-    result = to_table([])
+    result = to_table([], SCHEMA)
     assert isinstance(result, pa.Table)
     assert result.num_rows == 0
 
 
 def test_to_table_gross_amount_values_correct(records):
     """Gross amount column contains correct float values."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.column("gross_amount_usd").to_pylist() == [EXPECTED_GROSS, 75.00]
 
 
 def test_to_table_returns_pyarrow_table(records):
     """Returns a pa.Table instance."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert isinstance(result, pa.Table)
 
 
 def test_to_table_row_count(records):
     """Table has one row per record."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.num_rows == EXPECTED_ROW_COUNT
+
+
+def test_schema_matches_record_fields():
+    """SCHEMA declares one column per Record field, in order."""
+    assert SCHEMA.names == list(Record.model_fields)
+
+
+def test_parse_batch_matches_row_parse(raw_rows):
+    """Vectorized parsing produces the same table as row-by-row parsing."""
+    expected = to_table([parse(r) for r in raw_rows], SCHEMA)
+
+    table, rejects = parse_batch(to_table(raw_rows, RAW_SCHEMA))
+
+    assert table.equals(expected)
+    assert rejects.num_rows == 0
+
+
+def test_parse_batch_routes_bad_rows_to_rejects():
+    """A malformed amount is rejected instead of failing the batch."""
+    bad_row = RAW_ROW_2.model_copy(update={"transaction_amount": "N/A"})
+
+    table, rejects = parse_batch(to_table([RAW_ROW_1, bad_row], RAW_SCHEMA))
+
+    assert table.num_rows == 1
+    assert rejects.column("transaction_amount").to_pylist() == ["N/A"]
+    assert rejects.column("reason").to_pylist() == ["invalid gross_amount_usd"]
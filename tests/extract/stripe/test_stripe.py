@@ -6,15 +6,21 @@ from unittest.mock import MagicMock, patch
 import pyarrow as pa
 import pytest
 from pydantic import ValidationError
+from stripe import RateLimitError
 
 from extract.stripe.extract import (
+    RAW_SCHEMA,
+    SCHEMA,
     Raw,
     Record,
     _date_to_timestamp,
+    _split_range,
     _to_raw,
     extract,
     fetch,
+    fetch_changed,
     parse,
+    parse_batch,
 )
 from extract.table import to_table
 
@@ -34,6 +40,10 @@ EXPECTED_EMAIL = "student@example.com"
 EXPECTED_NAME = "Alice Smith"
 EXPECTED_DESCRIPTION = "Cosmetology Program Enrollment"
 UNIX_TIMESTAMP_2024_01_15 = 1705276800
+UNIX_TIMESTAMP_2024_01_15_END = 1705363199
+WINDOWS = 4
+BALANCE_TXN_ID = "txn_abc123"
+WATERMARK = 1705000000
 
 API_CHARGE_1 = {
     "id": CHARGE_ID,
@@ -141,7 +151,7 @@ def test_date_to_timestamp_start_of_day():
 def test_extract_composes_fetch_parse_to_table(raw_rows):
     """Result matches manually composing fetch, parse, and to_table."""
     parsed = [parse(r) for r in raw_rows]
-    expected = to_table(parsed)
+    expected = to_table(parsed, SCHEMA)
 
     with patch("extract.stripe.extract.fetch", return_value=raw_rows):
         result = extract(MagicMock(), START_DATE, END_DATE)
@@ -223,6 +233,241 @@ def test_fetch_paginates_multiple_pages():
     assert client.charges.list.call_count == EXPECTED_ROW_COUNT
 
 
+def _window_client(charges_by_window: dict[int, list[dict]]) -> MagicMock:
+    """Client whose single list page depends on the created window start."""
+    client = MagicMock()
+
+    def list_charges(params):
+        response = MagicMock()
+        response.data = charges_by_window.get(params["created"]["gte"], [])
+        response.has_more = False
+        return response
+
+    client.charges.list.side_effect = list_charges
+    return client
+
+
+def test_fetch_windows_paginates_each_sub_window():
+    """Each created sub-window is listed with its own gte and lte bounds."""
+    client = _window_client({})
+
+    fetch(client, START_DATE, END_DATE, windows=WINDOWS)
+
+    bounds = sorted(
+        (c.kwargs["params"]["created"]["gte"], c.kwargs["params"]["created"]["lte"])
+        for c in client.charges.list.call_args_list
+    )
+    assert bounds == _split_range(
+        UNIX_TIMESTAMP_2024_01_15, UNIX_TIMESTAMP_2024_01_15_END, WINDOWS
+    )
+
+
+def test_fetch_windows_deduplicates_on_charge_id():
+    """A charge returned by two windows is kept once."""
+    slices = _split_range(
+        UNIX_TIMESTAMP_2024_01_15, UNIX_TIMESTAMP_2024_01_15_END, WINDOWS
+    )
+    client = _window_client(
+        {
+            slices[0][0]: [API_CHARGE_1],
+            slices[1][0]: [API_CHARGE_1, API_CHARGE_2],
+        }
+    )
+
+    result = fetch(client, START_DATE, END_DATE, windows=WINDOWS)
+
+    assert sorted(r.charge_id for r in result) == [CHARGE_ID, "ch_def456"]
+
+
+def test_fetch_windows_raises_worker_errors():
+    """An API error in one window fails the whole fetch."""
+    client = MagicMock()
+    client.charges.list.side_effect = ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        fetch(client, START_DATE, END_DATE, windows=WINDOWS)
+
+
+def test_fetch_retries_rate_limited_pages():
+    """A 429 is retried with backoff instead of failing the page."""
+    client = MagicMock()
+    response = MagicMock()
+    response.data = []
+    response.has_more = False
+    client.charges.list.side_effect = [RateLimitError("slow down"), response]
+
+    with patch("extract.stripe.extract.time.sleep") as mock_sleep:
+        result = fetch(client, START_DATE, END_DATE)
+
+    assert result == []
+    mock_sleep.assert_called_once()
+
+
+def _bulk_fees_client(transactions: list) -> MagicMock:
+    """Client listing unexpanded charges and the given balance transactions."""
+    client = MagicMock()
+    charges = MagicMock()
+    charges.data = [
+        {**API_CHARGE_1, "balance_transaction": BALANCE_TXN_ID},
+        {**API_CHARGE_2, "balance_transaction": None},
+    ]
+    charges.has_more = False
+    client.charges.list.return_value = charges
+    balance_transactions = MagicMock()
+    balance_transactions.data = transactions
+    balance_transactions.has_more = False
+    client.balance_transactions.list.return_value = balance_transactions
+    return client
+
+
+def _balance_transaction() -> MagicMock:
+    """Balance transaction for API_CHARGE_1."""
+    return MagicMock(id=BALANCE_TXN_ID, fee=EXPECTED_FEE_CENTS, net=14535)
+
+
+def test_fetch_bulk_fees_joins_balance_transactions():
+    """Fee and net come from the bulk balance transaction listing."""
+    client = _bulk_fees_client([_balance_transaction()])
+
+    result = fetch(client, START_DATE, END_DATE, bulk_fees=True)
+
+    assert [r.fee for r in result] == [EXPECTED_FEE_CENTS, 0]
+    assert [r.net for r in result] == [14535, 0]
+    assert [r.charge_id for r in result] == [CHARGE_ID, "ch_def456"]
+
+
+def test_fetch_bulk_fees_skips_expansion():
+    """Charges are listed without expanding their balance transaction."""
+    client = _bulk_fees_client([_balance_transaction()])
+
+    fetch(client, START_DATE, END_DATE, bulk_fees=True)
+
+    assert "expand" not in client.charges.list.call_args.kwargs["params"]
+
+
+def test_fetch_bulk_fees_retrieves_transactions_outside_window():
+    """A balance transaction missing from the listing is retrieved by ID."""
+    client = _bulk_fees_client([])
+    client.balance_transactions.retrieve.return_value = _balance_transaction()
+
+    result = fetch(client, START_DATE, END_DATE, bulk_fees=True)
+
+    client.balance_transactions.retrieve.assert_called_once_with(BALANCE_TXN_ID)
+    assert result[0].fee == EXPECTED_FEE_CENTS
+
+
+def test_fetch_bulk_fees_matches_expanded_fetch(mock_client):
+    """Both fee modes produce the same parsed table."""
+    client = _bulk_fees_client([_balance_transaction()])
+    client.charges.list.return_value.data[1] = {
+        **API_CHARGE_2,
+        "balance_transaction": "txn_def456",
+    }
+    client.balance_transactions.list.return_value.data.append(
+        MagicMock(id="txn_def456", fee=248, net=7252)
+    )
+
+    expected = extract(mock_client, START_DATE, END_DATE)
+    result = extract(client, START_DATE, END_DATE, bulk_fees=True)
+
+    assert result.equals(expected)
+
+
+def _events_client(events: list[dict]) -> MagicMock:
+    """Client listing the given events and retrieving charges by ID."""
+    client = MagicMock()
+    response = MagicMock()
+    response.data = events
+    response.has_more = False
+    client.events.list.return_value = response
+    charges = {c["id"]: c for c in [API_CHARGE_1, API_CHARGE_2]}
+    client.charges.retrieve.side_effect = lambda charge_id, params: charges[charge_id]
+    return client
+
+
+def _event(created: int, event_object: dict) -> dict:
+    """Builds a charge event around its data object."""
+    return {"created": created, "data": {"object": event_object}}
+
+
+def test_fetch_changed_refetches_each_changed_charge_once():
+    """A charge with several events is retrieved once."""
+    client = _events_client(
+        [
+            _event(WATERMARK + 1, {"object": "charge", "id": CHARGE_ID}),
+            _event(WATERMARK + 2, {"object": "charge", "id": CHARGE_ID}),
+        ]
+    )
+
+    raw_rows, _ = fetch_changed(client, WATERMARK)
+
+    assert [r.charge_id for r in raw_rows] == [CHARGE_ID]
+    client.charges.retrieve.assert_called_once()
+
+
+def test_fetch_changed_follows_refunds_and_disputes_to_charges():
+    """Refund and dispute events mark the charge they reference."""
+    client = _events_client(
+        [
+            _event(WATERMARK + 1, {"object": "refund", "charge": CHARGE_ID}),
+            _event(WATERMARK + 2, {"object": "dispute", "charge": "ch_def456"}),
+        ]
+    )
+
+    raw_rows, _ = fetch_changed(client, WATERMARK)
+
+    assert [r.charge_id for r in raw_rows] == [CHARGE_ID, "ch_def456"]
+
+
+def test_fetch_changed_lists_charge_events_after_watermark():
+    """Only charge.* events created after the watermark are listed."""
+    client = _events_client([])
+
+    fetch_changed(client, WATERMARK)
+
+    params = client.events.list.call_args.kwargs["params"]
+    assert params["type"] == "charge.*"
+    assert params["created"] == {"gt": WATERMARK}
+
+
+def test_fetch_changed_advances_watermark_to_newest_event():
+    """The returned watermark is the newest event's created time."""
+    client = _events_client(
+        [
+            _event(WATERMARK + 5, {"object": "charge", "id": CHARGE_ID}),
+            _event(WATERMARK + 3, {"object": "charge", "id": "ch_def456"}),
+        ]
+    )
+
+    _, watermark = fetch_changed(client, WATERMARK)
+
+    assert watermark == WATERMARK + 5
+
+
+def test_fetch_changed_keeps_watermark_without_events():
+    """With no new events the watermark does not move."""
+    client = _events_client([])
+
+    raw_rows, watermark = fetch_changed(client, WATERMARK)
+
+    assert raw_rows == []
+    assert watermark == WATERMARK
+
+
+def test_split_range_covers_range_without_overlap():
+    """Sub-windows are contiguous, inclusive and span the whole range."""
+    result = _split_range(0, 99, WINDOWS)
+
+    assert result == [(0, 24), (25, 49), (50, 74), (75, 99)]
+
+
+def test_split_range_caps_windows_at_span():
+    """No more windows are created than there are seconds in the range."""
+    result = _split_range(0, 1, WINDOWS)
+
+    assert result == [(0, 0), (1, 1)]
+
+
 def test_fetch_returns_list_of_raw(mock_client):
     """Returns a list of Raw instances."""
     with patch(
@@ -325,6 +570,14 @@ def test_to_raw_handles_null_balance_transaction():
     assert result.net == 0
 
 
+def test_to_raw_reads_unexpanded_balance_transaction_id():
+    """An unexpanded balance_transaction ID is kept with zero fee and net."""
+    charge = {**API_CHARGE_1, "balance_transaction": BALANCE_TXN_ID}
+    result = _to_raw(charge)
+    assert result.balance_transaction_id == BALANCE_TXN_ID
+    assert result.fee == 0
+
+
 def test_to_raw_maps_amount():
     """Amount in cents mapped correctly."""
     result = _to_raw(API_CHARGE_1)
@@ -349,10 +602,25 @@ def test_to_raw_maps_fee_from_balance_transaction():
     assert result.fee == EXPECTED_FEE_CENTS
 
 
-def test_to_raw_missing_required_field_raises():
-    """Missing required fields raise KeyError."""
-    with pytest.raises(KeyError):
-        _to_raw({})
+def test_to_raw_missing_required_field_is_rejected(raw_rows):
+    """A charge missing required fields is rejected, not raised."""
+    charge = {k: v for k, v in API_CHARGE_1.items() if k != "amount"}
+
+    table, rejects = parse_batch(to_table([*raw_rows, _to_raw(charge)], RAW_SCHEMA))
+
+    assert table.num_rows == len(raw_rows)
+    assert rejects.column("charge_id").to_pylist() == [CHARGE_ID]
+    assert rejects.column("reason").to_pylist() == ["invalid gross_amount_usd"]
+
+
+def test_to_raw_empty_charge_is_rejected():
+    """A charge with no fields at all becomes a null row for the rejects."""
+    raw = _to_raw({})
+
+    _, rejects = parse_batch(to_table([raw], RAW_SCHEMA))
+
+    assert raw.charge_id is None
+    assert rejects.column("reason").to_pylist() == ["invalid charge_id"]
 
 
 def test_to_raw_optional_fields_default():
@@ -383,13 +651,13 @@ def test_to_raw_returns_raw_instance():
 
 def test_to_table_column_count(records):
     """Table has correct number of columns."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.num_columns == EXPECTED_COLUMN_COUNT
 
 
 def test_to_table_column_names(records):
     """Table contains expected column names."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert set(result.column_names) == {
         "charge_id",
         "charge_date",
@@ -407,31 +675,65 @@ def test_to_table_column_names(records):
 
 
 def test_to_table_date_values_correct(records):
-    """Date column contains correct ISO format values."""
-    result = to_table(records)
-    assert result.column("charge_date").to_pylist() == ["2024-01-15", "2024-01-15"]
+    """Date column contains typed date values."""
+    result = to_table(records, SCHEMA)
+    assert result.column("charge_date").to_pylist() == [
+        date(2024, 1, 15),
+        date(2024, 1, 15),
+    ]
 
 
 def test_to_table_empty_records_returns_empty_table():
     """Empty records list returns empty table."""
-    result = to_table([])
+    result = to_table([], SCHEMA)
     assert isinstance(result, pa.Table)
     assert result.num_rows == 0
 
 
 def test_to_table_gross_amount_values_correct(records):
     """Gross amount column contains correct dollar values."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.column("gross_amount_usd").to_pylist() == [EXPECTED_GROSS, 75.00]
 
 
 def test_to_table_returns_pyarrow_table(records):
     """Returns a pa.Table instance."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert isinstance(result, pa.Table)
 
 
 def test_to_table_row_count(records):
     """Table has one row per record."""
-    result = to_table(records)
+    result = to_table(records, SCHEMA)
     assert result.num_rows == EXPECTED_ROW_COUNT
+
+
+def test_schema_matches_record_fields():
+    """SCHEMA declares one column per Record field, in order."""
+    assert SCHEMA.names == list(Record.model_fields)
+
+
+def test_parse_batch_matches_row_parse(raw_rows):
+    """Vectorized parsing produces the same table as row-by-row parsing."""
+    expected = to_table([parse(r) for r in raw_rows], SCHEMA)
+
+    table, rejects = parse_batch(to_table(raw_rows, RAW_SCHEMA))
+
+    assert table.equals(expected)
+    assert rejects.num_rows == 0
+
+
+def test_parse_batch_routes_bad_rows_to_rejects(raw_rows):
+    """A null amount is rejected instead of failing the batch."""
+    raw = to_table(raw_rows, RAW_SCHEMA)
+    raw = raw.set_column(
+        raw.schema.get_field_index("amount"),
+        "amount",
+        pa.array([None, 7500], type=pa.int64()),
+    )
+
+    table, rejects = parse_batch(raw)
+
+    assert table.num_rows == 1
+    assert rejects.column("charge_id").to_pylist() == [CHARGE_ID]
+    assert rejects.column("reason").to_pylist() == ["invalid gross_amount_usd"]
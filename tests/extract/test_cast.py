@@ -0,0 +1,113 @@
+"""Tests for vectorized raw column casting."""
+
+from datetime import date
+
+import pyarrow as pa
+import pytest
+
+from extract.cast import (
+    REASON_COLUMN,
+    cents_to_dollars,
+    split_rejects,
+    timestamp_to_date,
+    to_date,
+    to_float64,
+    to_int64,
+)
+
+UNIX_TIMESTAMP_2024_01_15 = 1705276800
+SCHEMA = pa.schema([("clicks", pa.int64()), ("day", pa.date32())])
+
+
+@pytest.fixture
+def raw():
+    """Raw string table with one malformed value in each column."""
+    return pa.table(
+        {
+            "clicks": ["10", "ten", "30"],
+            "day": ["2024-01-15", "2024-01-16", "2024-02-30"],
+        }
+    )
+
+
+def test_cents_to_dollars_rounds_to_two_places():
+    """Integer cents convert to float dollars."""
+    result = cents_to_dollars(pa.array([15000, 465, 1]))
+
+    assert result.to_pylist() == [150.0, 4.65, 0.01]
+
+
+def test_split_rejects_keeps_raw_values_and_reason(raw):
+    """Rejected rows keep their raw values and name the failing column."""
+    columns = {"clicks": to_int64(raw["clicks"]), "day": to_date(raw["day"])}
+
+    _, rejects = split_rejects(raw, columns, SCHEMA)
+
+    assert rejects.column("clicks").to_pylist() == ["ten", "30"]
+    assert rejects.column(REASON_COLUMN).to_pylist() == [
+        "invalid clicks",
+        "invalid day",
+    ]
+
+
+def test_split_rejects_reports_first_failing_column():
+    """A row failing several casts reports the first schema field."""
+    raw = pa.table({"clicks": ["x"], "day": ["y"]})
+    columns = {"clicks": to_int64(raw["clicks"]), "day": to_date(raw["day"])}
+
+    _, rejects = split_rejects(raw, columns, SCHEMA)
+
+    assert rejects.column(REASON_COLUMN).to_pylist() == ["invalid clicks"]
+
+
+def test_split_rejects_typed_table_has_valid_rows(raw):
+    """Only fully valid rows reach the typed table."""
+    columns = {"clicks": to_int64(raw["clicks"]), "day": to_date(raw["day"])}
+
+    table, _ = split_rejects(raw, columns, SCHEMA)
+
+    assert table.schema == SCHEMA
+    assert table.to_pylist() == [{"clicks": 10, "day": date(2024, 1, 15)}]
+
+
+def test_timestamp_to_date_uses_utc():
+    """Timestamps late in the UTC day stay on that day."""
+    result = timestamp_to_date(pa.array([UNIX_TIMESTAMP_2024_01_15 + 86399]))
+
+    assert result.to_pylist() == [date(2024, 1, 15)]
+
+
+def test_to_date_parses_custom_format():
+    """YYYYMMDD strings parse with an explicit format."""
+    result = to_date(pa.array(["20240115"]), "%Y%m%d")
+
+    assert result.to_pylist() == [date(2024, 1, 15)]
+
+
+def test_to_date_rejects_overflowing_day():
+    """Invalid calendar dates become null instead of rolling over."""
+    result = to_date(pa.array(["2024-02-30", "2024-02-29"]))
+
+    assert result.to_pylist() == [None, date(2024, 2, 29)]
+
+
+def test_to_float64_nulls_unparseable_values():
+    """Non-numeric strings become null."""
+    result = to_float64(pa.array(["1.5", "-4.65", "1e3", "abc", ""]))
+
+    assert result.to_pylist() == [1.5, -4.65, 1000.0, None, None]
+
+
+def test_to_int64_nulls_unparseable_values():
+    """Non-integer strings become null."""
+    result = to_int64(pa.array(["10", "-3", "1.5", "abc", None]))
+
+    assert result.to_pylist() == [10, -3, None, None, None]
+
+
+def test_to_int64_passes_integers_through():
+    """Integer input is cast without string matching."""
+    result = to_int64(pa.array([1, 2], type=pa.int32()))
+
+    assert result.type == pa.int64()
+    assert result.to_pylist() == [1, 2]
@@ -0,0 +1,119 @@
+"""Tests for row-level change data capture."""
+
+import io
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from extract.cdc import (
+    DELETE,
+    INSERT,
+    OPERATION_COLUMN,
+    ROW_HASH_COLUMN,
+    UPDATE,
+    diff,
+    row_hashes,
+    state_date,
+)
+
+KEY = "sku_id"
+CAPTURED = date(2024, 1, 15)
+EARLIER = date(2024, 1, 14)
+SNAPSHOT = pa.table({KEY: ["a", "b", "c"], "quantity": ["1", "2", "3"]})
+
+
+def test_first_diff_inserts_every_row():
+    """Without previous state, every row is an insert."""
+    changes, state = diff(SNAPSHOT, None, KEY, CAPTURED)
+
+    assert changes.column(OPERATION_COLUMN).to_pylist() == [INSERT] * len(SNAPSHOT)
+    assert state.column_names == [KEY, ROW_HASH_COLUMN]
+    assert state.column(KEY).to_pylist() == SNAPSHOT.column(KEY).to_pylist()
+
+
+def test_unchanged_snapshot_has_no_changes():
+    """Diffing the same snapshot twice yields no changes."""
+    _, state = diff(SNAPSHOT, None, KEY, CAPTURED)
+
+    changes, _ = diff(SNAPSHOT, state, KEY, CAPTURED)
+
+    assert changes.num_rows == 0
+
+
+def test_diff_tags_inserts_updates_and_deletes():
+    """Changed rows are updates, new keys inserts, missing keys deletes."""
+    _, state = diff(SNAPSHOT, None, KEY, CAPTURED)
+    current = pa.table({KEY: ["a", "b", "d"], "quantity": ["1", "5", "4"]})
+
+    changes, _ = diff(current, state, KEY, CAPTURED)
+
+    assert changes.column(KEY).to_pylist() == ["b", "d", "c"]
+    assert changes.column(OPERATION_COLUMN).to_pylist() == [UPDATE, INSERT, DELETE]
+    assert changes.column("quantity").to_pylist() == ["5", "4", None]
+
+
+def test_diff_returns_state_of_current_snapshot():
+    """The returned state lists the current keys and their row hashes."""
+    current = SNAPSHOT.slice(0, 2)
+
+    _, state = diff(current, diff(SNAPSHOT, None, KEY, CAPTURED)[1], KEY, CAPTURED)
+
+    assert state.column(KEY).to_pylist() == current.column(KEY).to_pylist()
+    hashes = state.column(ROW_HASH_COLUMN).to_pylist()
+    assert hashes == row_hashes(current).to_pylist()
+
+
+def test_state_records_capture_date_through_parquet():
+    """The state keeps its capture date when written to parquet."""
+    _, state = diff(SNAPSHOT, None, KEY, CAPTURED)
+    buffer = io.BytesIO()
+    pq.write_table(state, buffer)
+
+    assert state_date(pq.read_table(io.BytesIO(buffer.getvalue()))) == CAPTURED
+
+
+def test_rerun_for_capture_date_of_state_is_allowed():
+    """A snapshot for the state's own date diffs against it."""
+    _, state = diff(SNAPSHOT, None, KEY, CAPTURED)
+
+    changes, _ = diff(SNAPSHOT, state, KEY, CAPTURED)
+
+    assert changes.num_rows == 0
+
+
+def test_snapshot_older_than_state_raises():
+    """An earlier partition cannot be diffed against a later state."""
+    _, state = diff(SNAPSHOT, None, KEY, CAPTURED)
+
+    with pytest.raises(ValueError, match=str(CAPTURED)):
+        diff(SNAPSHOT, state, KEY, EARLIER)
+
+
+@pytest.mark.parametrize("keys", [["a", "a", "c"], ["a", None, "c"]])
+def test_duplicate_or_missing_keys_raise(keys):
+    """Keys must identify one row each."""
+    current = SNAPSHOT.set_column(0, KEY, pa.array(keys, pa.string()))
+
+    with pytest.raises(ValueError, match=KEY):
+        diff(current, None, KEY, CAPTURED)
+
+
+def test_row_hashes_change_with_columns():
+    """Renaming a column changes every row's hash."""
+    renamed = SNAPSHOT.rename_columns([KEY, "on_hand"])
+
+    before = row_hashes(SNAPSHOT).to_pylist()
+    after = row_hashes(renamed).to_pylist()
+
+    assert all(b != a for b, a in zip(before, after, strict=True))
+
+
+def test_row_hashes_depend_only_on_row_content():
+    """The same row hashes the same in any table or position."""
+    reversed_rows = SNAPSHOT.take([2, 1, 0])
+
+    assert (
+        row_hashes(reversed_rows).to_pylist() == row_hashes(SNAPSHOT).to_pylist()[::-1]
+    )
@@ -0,0 +1,129 @@
+"""Tests for streaming batch extraction."""
+
+import itertools
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+from extract.stream import BatchStream, batched, fan_out
+
+RAW_SCHEMA = pa.schema([pa.field("amount", pa.string())])
+SCHEMA = pa.schema([pa.field("amount", pa.int64())])
+WORKERS = 2
+BUFFER = 1
+SETTLE_SECONDS = 0.2
+
+
+def _parse_batch(raw: pa.Table) -> tuple[pa.Table, pa.Table]:
+    """Keeps numeric amounts and rejects the rest."""
+    valid = pc.match_substring_regex(raw.column("amount"), r"^\d+$")
+    table = pa.table(
+        {"amount": pc.cast(raw.filter(valid).column("amount"), pa.int64())},
+        schema=SCHEMA,
+    )
+    rejected = raw.filter(pc.invert(valid))
+    rejects = rejected.append_column(
+        "reason", pa.array(["invalid amount"] * rejected.num_rows, pa.string())
+    )
+    return table, rejects
+
+
+def _raw_batches(*pages: list[str]) -> list[pa.RecordBatch]:
+    """Builds one raw record batch per page."""
+    return [pa.record_batch({"amount": page}, schema=RAW_SCHEMA) for page in pages]
+
+
+def test_batch_stream_yields_typed_batches():
+    """Each raw page is parsed into typed record batches."""
+    stream = BatchStream(_raw_batches(["1", "2"], ["3"]), RAW_SCHEMA, _parse_batch)
+
+    result = pa.Table.from_batches(list(stream), schema=SCHEMA)
+
+    assert result.column("amount").to_pylist() == [1, 2, 3]
+
+
+def test_batch_stream_collects_rejects():
+    """Rejected rows from every page are available after draining."""
+    stream = BatchStream(_raw_batches(["1", "x"], ["y"]), RAW_SCHEMA, _parse_batch)
+
+    list(stream)
+
+    assert stream.rejects.column("amount").to_pylist() == ["x", "y"]
+
+
+def test_batch_stream_empty_rejects_has_reason_column():
+    """With no rejects, an empty table with a reason column is returned."""
+    stream = BatchStream(_raw_batches(["1"]), RAW_SCHEMA, _parse_batch)
+
+    list(stream)
+
+    assert stream.rejects.num_rows == 0
+    assert stream.rejects.column_names == ["amount", "reason"]
+
+
+def test_batched_groups_items():
+    """Items are grouped into lists of at most size items."""
+    result = list(batched(range(5), 2))
+
+    assert result == [[0, 1], [2, 3], [4]]
+
+
+class _Counter:
+    """Produces an endless count per source and records how far it got."""
+
+    def __init__(self) -> None:
+        """Starts with nothing produced."""
+        self.produced = 0
+
+    def __call__(self, source: str):
+        """Yields source-tagged items forever."""
+        for i in itertools.count():
+            self.produced += 1
+            yield f"{source}{i}"
+
+
+def test_fan_out_yields_every_item_of_every_source():
+    """Each source's items are all yielded, in order within the source."""
+    result = list(fan_out(range, [2, 3], WORKERS, BUFFER))
+
+    assert sorted(result) == [0, 0, 1, 1, 2]
+
+
+def test_fan_out_bounds_items_ahead_of_consumer():
+    """Workers stop producing once the queue is full."""
+    counter = _Counter()
+    items = fan_out(counter, ["a"], WORKERS, BUFFER)
+
+    next(items)
+    time.sleep(SETTLE_SECONDS)
+
+    # One consumed, BUFFER queued and one waiting to be put.
+    assert counter.produced <= BUFFER + 2
+    items.close()
+
+
+def test_fan_out_reraises_worker_errors_and_stops_others():
+    """An error fails the iterator without waiting for endless sources."""
+
+    def produce(source: str):
+        if source == "bad":
+            raise ValueError("boom")
+        yield from _Counter()(source)
+
+    with pytest.raises(ValueError, match="boom"):
+        list(fan_out(produce, ["good", "bad"], WORKERS, BUFFER))
+
+
+def test_fan_out_close_stops_workers():
+    """Closing the iterator stops workers before their next item."""
+    counter = _Counter()
+    items = fan_out(counter, ["a", "b"], WORKERS, BUFFER)
+    next(items)
+
+    items.close()
+    stopped_at = counter.produced
+    time.sleep(SETTLE_SECONDS)
+
+    assert counter.produced == stopped_at
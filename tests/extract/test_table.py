@@ -0,0 +1,130 @@
+"""Tests for shared schema-first table conversion."""
+
+from datetime import date
+
+import pyarrow as pa
+import pytest
+from pydantic import BaseModel, ConfigDict
+
+from extract.table import build_table, split_by, to_table
+
+SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("day", pa.date32()),
+        ("clicks", pa.int64()),
+        ("spend", pa.float64()),
+    ]
+)
+EXPECTED_ROW_COUNT = 2
+
+
+class Sample(BaseModel):
+    """A minimal record matching SCHEMA."""
+
+    model_config = ConfigDict(frozen=True)
+
+    id: str
+    day: date
+    clicks: int
+    spend: float
+
+
+@pytest.fixture
+def records():
+    """Sample records."""
+    return [
+        Sample(id="a", day=date(2024, 1, 15), clicks=10, spend=1.5),
+        Sample(id="b", day=date(2024, 1, 16), clicks=20, spend=2.5),
+    ]
+
+
+def test_build_table_casts_to_declared_types():
+    """Columns use the declared Arrow types rather than inferred ones."""
+    result = build_table(
+        {"id": ["a"], "day": [date(2024, 1, 15)], "clicks": [1], "spend": [1]},
+        SCHEMA,
+    )
+
+    assert result.schema == SCHEMA
+    assert result.column("spend").to_pylist() == [1.0]
+
+
+def test_build_table_ignores_extra_columns():
+    """Columns not in the schema are dropped."""
+    result = build_table(
+        {"id": [], "day": [], "clicks": [], "spend": [], "extra": []},
+        SCHEMA,
+    )
+
+    assert result.column_names == SCHEMA.names
+
+
+def test_build_table_missing_column_raises():
+    """A schema field without a column raises KeyError."""
+    with pytest.raises(KeyError):
+        build_table({"id": ["a"]}, SCHEMA)
+
+
+def test_to_table_column_order_follows_schema(records):
+    """Column order matches the schema field order."""
+    result = to_table(records, SCHEMA)
+
+    assert result.column_names == SCHEMA.names
+
+
+def test_to_table_empty_records_keeps_schema():
+    """Empty records still produce a table with the full schema."""
+    result = to_table([], SCHEMA)
+
+    assert result.num_rows == 0
+    assert result.schema == SCHEMA
+
+
+def test_to_table_preserves_date_type(records):
+    """Dates are stored as date32 rather than ISO strings."""
+    result = to_table(records, SCHEMA)
+
+    assert result.column("day").to_pylist() == [date(2024, 1, 15), date(2024, 1, 16)]
+
+
+def test_to_table_row_count(records):
+    """Table has one row per record."""
+    result = to_table(records, SCHEMA)
+
+    assert result.num_rows == EXPECTED_ROW_COUNT
+
+
+def test_split_by_yields_one_slice_per_value():
+    """Each distinct value gets a slice holding exactly its rows."""
+    table = pa.table(
+        {
+            "day": [date(2024, 1, 16), date(2024, 1, 15), date(2024, 1, 16)],
+            "n": [1, 2, 3],
+        }
+    )
+
+    result = {value: part["n"].to_pylist() for value, part in split_by(table, "day")}
+
+    assert result == {date(2024, 1, 15): [2], date(2024, 1, 16): [1, 3]}
+
+
+def test_split_by_yields_values_in_ascending_order():
+    """Slices come out sorted on the split column across chunks."""
+    table = pa.concat_tables(
+        [
+            pa.table({"day": [date(2024, 1, 17), date(2024, 1, 15)]}),
+            pa.table({"day": [date(2024, 1, 16), date(2024, 1, 15)]}),
+        ]
+    )
+
+    result = [value for value, _ in split_by(table, "day")]
+
+    assert result == [date(2024, 1, 15), date(2024, 1, 16), date(2024, 1, 17)]
+
+
+def test_split_by_empty_table_yields_nothing():
+    """An empty table has no slices."""
+    table = pa.table({"day": pa.array([], type=pa.date32())})
+
+    assert list(split_by(table, "day")) == []
@@ -4,9 +4,19 @@ from datetime import date
 from unittest.mock import MagicMock
 
 import pytest
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 
-from load.bigquery.load import _build_job_config, _build_partition_ref, load
+from load.bigquery.load import (
+    _build_job_config,
+    _build_merge_query,
+    _build_partition_ref,
+    _build_repartition_query,
+    append,
+    load,
+    merge,
+    repartition,
+)
 from load.config import BigQueryConfig
 
 PROJECT = "my-project"
@@ -20,6 +30,10 @@ GCS_URI = "gs://my-bucket/google_ads/date=2024-01-15/google_ads-abc-123.parquet"
 EXPECTED_IDEMPOTENT_CALL_COUNT = 2
 EXPECTED_PARTITION_REF = "my-project.raw.google_ads$20240115"
 EXPECTED_ROWS_LOADED = 100
+EXPECTED_ROWS_MERGED = 3
+MERGE_KEY = "charge_id"
+STAGING_COLUMNS = ["charge_id", "date", "fee_usd"]
+NEW_PARTITION_FIELD = "captured_date"
 
 
 @pytest.fixture
@@ -50,6 +64,10 @@ def mock_client():
     """Mocked BigQuery client."""
     client = MagicMock(spec=bigquery.Client)
     client.load_table_from_uri.return_value.output_rows = EXPECTED_ROWS_LOADED
+    client.get_table.return_value.schema = [
+        bigquery.SchemaField(name, "STRING") for name in STAGING_COLUMNS
+    ]
+    client.query.return_value.num_dml_affected_rows = EXPECTED_ROWS_MERGED
     return client
 
 
@@ -60,6 +78,15 @@ def test_build_job_config_autodetect_is_false(config):
     assert result.autodetect is False
 
 
+def test_build_job_config_allows_field_addition(config):
+    """Loads may add new columns to the table schema."""
+    result = _build_job_config(config)
+
+    assert result.schema_update_options == [
+        bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION
+    ]
+
+
 def test_build_job_config_clustering_fields_set(config_with_clustering):
     """Clustering fields are set when provided in config."""
     result = _build_job_config(config_with_clustering)
@@ -162,3 +189,145 @@ def test_load_uses_correct_partition_ref(mock_client, config):
 
     call_args = mock_client.load_table_from_uri.call_args
     assert call_args.args[1] == EXPECTED_PARTITION_REF
+
+
+def test_append_targets_partition_without_truncating(mock_client, config):
+    """append() loads into the partition with WRITE_APPEND."""
+    append(GCS_URI, config, mock_client)
+
+    call_args = mock_client.load_table_from_uri.call_args
+    assert call_args.args[1] == EXPECTED_PARTITION_REF
+    job_config = call_args.kwargs["job_config"]
+    assert job_config.write_disposition == bigquery.WriteDisposition.WRITE_APPEND
+    assert job_config.time_partitioning.field == config.partition_field
+
+
+def test_append_returns_row_count(mock_client, config):
+    """Returns number of rows appended."""
+    assert append(GCS_URI, config, mock_client) == EXPECTED_ROWS_LOADED
+
+
+def test_build_merge_query_prunes_to_partition(config):
+    """The MERGE matches on the key and the partition date parameter."""
+    result = _build_merge_query(config, "staging", MERGE_KEY, STAGING_COLUMNS)
+
+    assert "ON target.charge_id = source.charge_id" in result
+    assert "AND target.date = @partition_date" in result
+
+
+def test_build_merge_query_updates_every_column(config):
+    """Matched rows have every staging column overwritten."""
+    result = _build_merge_query(config, "staging", MERGE_KEY, STAGING_COLUMNS)
+
+    assert (
+        "UPDATE SET charge_id = source.charge_id, date = source.date, "
+        "fee_usd = source.fee_usd" in result
+    )
+
+
+def test_build_merge_query_inserts_staging_columns_by_name(config):
+    """New rows insert only the staging columns, named explicitly."""
+    result = _build_merge_query(config, "staging", MERGE_KEY, STAGING_COLUMNS)
+
+    assert (
+        "WHEN NOT MATCHED THEN INSERT (charge_id, date, fee_usd) "
+        "VALUES (source.charge_id, source.date, source.fee_usd)" in result
+    )
+
+
+def test_merge_loads_into_staging_table(mock_client, config):
+    """The parquet file is loaded into a staging table, not the partition."""
+    merge(GCS_URI, config, mock_client, MERGE_KEY)
+
+    staging_ref = mock_client.load_table_from_uri.call_args[0][1]
+    assert staging_ref.startswith("my-project.raw.google_ads__merge_20240115_")
+
+
+def test_merge_drops_staging_table(mock_client, config):
+    """The staging table is deleted after the MERGE."""
+    merge(GCS_URI, config, mock_client, MERGE_KEY)
+
+    staging_ref = mock_client.load_table_from_uri.call_args[0][1]
+    mock_client.delete_table.assert_called_once_with(staging_ref, not_found_ok=True)
+
+
+def test_merge_drops_staging_table_on_failure(mock_client, config):
+    """The staging table is deleted even when the MERGE fails."""
+    mock_client.query.return_value.result.side_effect = RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        merge(GCS_URI, config, mock_client, MERGE_KEY)
+
+    mock_client.delete_table.assert_called_once()
+
+
+def test_merge_returns_affected_rows(mock_client, config):
+    """Returns the number of rows the MERGE updated or inserted."""
+    result = merge(GCS_URI, config, mock_client, MERGE_KEY)
+
+    assert result == EXPECTED_ROWS_MERGED
+
+
+def test_merge_raises_when_row_count_missing(mock_client, config):
+    """A MERGE without an affected row count raises ValueError."""
+    mock_client.query.return_value.num_dml_affected_rows = None
+
+    with pytest.raises(ValueError, match="no row count"):
+        merge(GCS_URI, config, mock_client, MERGE_KEY)
+
+
+def _partitioned_on(mock_client, field):
+    """Makes the mocked client report a table partitioned on field."""
+    mock_client.get_table.return_value.time_partitioning = bigquery.TimePartitioning(
+        field=field
+    )
+
+
+def test_build_repartition_query_copies_old_partition_date(config):
+    """Existing rows take the new partition field from the old one."""
+    repartitioned = config.model_copy(update={"partition_field": NEW_PARTITION_FIELD})
+
+    result = _build_repartition_query(repartitioned, "date")
+
+    assert "CREATE OR REPLACE TABLE `my-project.raw.google_ads`" in result
+    assert "PARTITION BY captured_date" in result
+    assert "SELECT *, DATE(date) AS captured_date" in result
+
+
+def test_build_repartition_query_keeps_clustering(config_with_clustering):
+    """The recreated table is clustered on the configured fields."""
+    result = _build_repartition_query(config_with_clustering, "snapshot_date")
+
+    assert "CLUSTER BY customer_id, campaign_id" in result
+
+
+def test_repartition_recreates_table_on_new_field(mock_client, config):
+    """A table partitioned on another column is recreated."""
+    _partitioned_on(mock_client, NEW_PARTITION_FIELD)
+
+    assert repartition(config, mock_client) is True
+    assert "PARTITION BY date" in mock_client.query.call_args[0][0]
+
+
+def test_repartition_skips_table_on_partition_field(mock_client, config):
+    """A table already partitioned on partition_field is left alone."""
+    _partitioned_on(mock_client, config.partition_field)
+
+    assert repartition(config, mock_client) is False
+    mock_client.query.assert_not_called()
+
+
+def test_repartition_skips_missing_table(mock_client, config):
+    """A table that does not exist yet is left for the first load to create."""
+    mock_client.get_table.side_effect = NotFound("missing")
+
+    assert repartition(config, mock_client) is False
+    mock_client.query.assert_not_called()
+
+
+def test_repartition_raises_without_partition_column(mock_client, config):
+    """A table not partitioned on a column cannot be repartitioned."""
+    mock_client.get_table.return_value.time_partitioning = None
+
+    with pytest.raises(ValueError, match="not partitioned"):
+        repartition(config, mock_client)
@@ -7,10 +7,18 @@ from unittest.mock import MagicMock, patch
 import pyarrow as pa
 import pyarrow.parquet as pq
 import pytest
+from google.api_core.exceptions import NotFound
 from google.cloud import storage
 
 from load.config import GCSConfig
-from load.gcs.load import _serialize, _upload, load
+from load.gcs.load import (
+    _serialize,
+    _upload,
+    load,
+    load_state,
+    load_stream,
+    read_state,
+)
 
 BUCKET = "my-bucket"
 SOURCE = "google_ads"
@@ -18,6 +26,8 @@ RUN_ID = "abc-123"
 PARTITION_DATE = date(2024, 1, 15)
 EXPECTED_BLOB_PATH = "google_ads/date=2024-01-15/google_ads-abc-123.parquet"
 EXPECTED_GCS_URI = f"gs://{BUCKET}/{EXPECTED_BLOB_PATH}"
+STREAM_PAGES = 3
+EXPECTED_STATE_PATH = "google_ads/_state/google_ads-state.parquet"
 
 
 @pytest.fixture
@@ -43,6 +53,13 @@ def sample_table():
     )
 
 
+class _Sink(io.BytesIO):
+    """BytesIO that keeps its contents readable after close."""
+
+    def close(self):
+        """Keeps the buffer open so tests can read what was written."""
+
+
 @pytest.fixture
 def mock_client():
     """Mocked GCS client."""
@@ -149,3 +166,63 @@ def test_upload_returns_gcs_uri(mock_client):
     result = _upload(mock_client, BUCKET, EXPECTED_BLOB_PATH, b"data")
 
     assert result == EXPECTED_GCS_URI
+
+
+def test_load_stream_returns_uri_and_row_count(mock_client, config, sample_table):
+    """load_stream() returns the blob URI and the number of rows written."""
+    blob = mock_client.bucket.return_value.blob.return_value
+    blob.open.return_value = _Sink()
+    batches = sample_table.to_batches() * STREAM_PAGES
+
+    gcs_uri, rows_written = load_stream(batches, config, mock_client)
+
+    assert gcs_uri == EXPECTED_GCS_URI
+    assert rows_written == STREAM_PAGES
+
+
+def test_load_stream_writes_readable_parquet(mock_client, config, sample_table):
+    """The streamed blob contents read back as the concatenated batches."""
+    blob = mock_client.bucket.return_value.blob.return_value
+    sink = _Sink()
+    blob.open.return_value = sink
+
+    load_stream(sample_table.to_batches() * 2, config, mock_client)
+
+    result = pq.read_table(io.BytesIO(sink.getvalue()))
+    assert result.equals(pa.concat_tables([sample_table, sample_table]))
+
+
+def test_load_stream_skips_upload_when_empty(mock_client, config, sample_table):
+    """No blob is opened when the stream yields no rows."""
+    blob = mock_client.bucket.return_value.blob.return_value
+
+    _, rows_written = load_stream(
+        sample_table.slice(0, 0).to_batches(), config, mock_client
+    )
+
+    assert rows_written == 0
+    blob.open.assert_not_called()
+
+
+def test_load_state_overwrites_fixed_path(mock_client, sample_table):
+    """State is uploaded to one path per source, outside date partitions."""
+    uri = load_state(sample_table, BUCKET, SOURCE, mock_client)
+
+    mock_client.bucket.return_value.blob.assert_called_once_with(EXPECTED_STATE_PATH)
+    assert uri == f"gs://{BUCKET}/{EXPECTED_STATE_PATH}"
+
+
+def test_read_state_returns_saved_table(mock_client, sample_table):
+    """read_state() reads back the parquet written by load_state()."""
+    blob = mock_client.bucket.return_value.blob.return_value
+    blob.download_as_bytes.return_value = _serialize(sample_table)
+
+    assert read_state(BUCKET, SOURCE, mock_client).equals(sample_table)
+
+
+def test_read_state_missing_returns_none(mock_client):
+    """A source without saved state reads as None."""
+    blob = mock_client.bucket.return_value.blob.return_value
+    blob.download_as_bytes.side_effect = NotFound("no state")
+
+    assert read_state(BUCKET, SOURCE, mock_client) is None
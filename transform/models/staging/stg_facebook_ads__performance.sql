@@ -10,6 +10,7 @@ MODEL (
 
 SELECT
   DATE(date)                        AS date,
+  CAST(ad_account_id    AS STRING)  AS ad_account_id,
   CAST(campaign_id      AS STRING)  AS campaign_id,
   CAST(campaign_name    AS STRING)  AS campaign_name,
   CAST(impressions      AS INT64)   AS impressions,
@@ -8,6 +8,28 @@ MODEL (
   audits (assert_no_nulls(column := sku_id))
 );
 
+-- Change rows are appended per capture; keep each key's latest row.
+WITH latest AS (
+  SELECT *
+  FROM raw.google_sheets_inventory
+  QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY sku_id, snapshot_date
+    ORDER BY captured_date DESC, loaded_at DESC
+  ) = 1
+),
+
+-- Deletes carry only sku_id, so a sku whose latest row is a delete
+-- masks every snapshot of it.
+deleted AS (
+  SELECT sku_id
+  FROM raw.google_sheets_inventory
+  QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY sku_id
+    ORDER BY captured_date DESC, loaded_at DESC
+  ) = 1
+    AND operation = 'delete'
+)
+
 SELECT
   CAST(sku_id             AS STRING)  AS sku_id,
   CAST(sku_name           AS STRING)  AS sku_name,
@@ -19,6 +41,8 @@ SELECT
   CAST(units_per_student  AS NUMERIC) AS units_per_student,  -- expected usage per student per program
   DATE(snapshot_date)                 AS snapshot_date,
   CAST(loaded_at          AS TIMESTAMP) AS loaded_at
-FROM raw.google_sheets_inventory
+FROM latest
 WHERE
-  snapshot_date BETWEEN @start_date AND @end_date
+  operation IS DISTINCT FROM 'delete'
+  AND sku_id NOT IN (SELECT sku_id FROM deleted)
+  AND snapshot_date BETWEEN @start_date AND @end_date
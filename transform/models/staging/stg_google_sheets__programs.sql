@@ -6,6 +6,16 @@ MODEL (
   audits (assert_no_nulls(column := program_id))
 );
 
+-- Change rows are appended per capture; keep each key's latest row.
+WITH latest AS (
+  SELECT *
+  FROM raw.google_sheets_programs
+  QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY program_id
+    ORDER BY captured_date DESC, loaded_at DESC
+  ) = 1
+)
+
 SELECT
   CAST(program_id          AS STRING)  AS program_id,
   CAST(program_name        AS STRING)  AS program_name,
@@ -14,4 +24,6 @@ SELECT
   CAST(max_enrollment      AS INT64)   AS max_enrollment,
   CAST(is_active           AS BOOL)    AS is_active,
   CAST(loaded_at           AS TIMESTAMP) AS loaded_at
-FROM raw.google_sheets_programs
+FROM latest
+WHERE
+  operation IS DISTINCT FROM 'delete'
@@ -8,6 +8,16 @@ MODEL (
   audits (assert_no_nulls(column := student_id))
 );
 
+-- Change rows are appended per capture; keep each key's latest row.
+WITH latest AS (
+  SELECT *
+  FROM raw.google_sheets_students
+  QUALIFY ROW_NUMBER() OVER (
+    PARTITION BY student_id
+    ORDER BY captured_date DESC, loaded_at DESC
+  ) = 1
+)
+
 SELECT
   CAST(student_id       AS STRING)  AS student_id,
   CAST(first_name       AS STRING)  AS first_name,
@@ -20,6 +30,7 @@ SELECT
   DATE(expected_grad_date)          AS expected_grad_date,
   DATE(actual_grad_date)            AS actual_grad_date,
   CAST(loaded_at        AS TIMESTAMP) AS loaded_at
-FROM raw.google_sheets_students
+FROM latest
 WHERE
-  enrolled_at BETWEEN @start_date AND @end_date
+  operation IS DISTINCT FROM 'delete'
+  AND enrolled_at BETWEEN @start_date AND @end_date